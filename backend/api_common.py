@@ -0,0 +1,393 @@
+"""
+✅ Shared API helpers
+Payload checks, initial graph state and response bodies used by both the
+Flask API (flask_api.py) and the async ASGI API (asgi_api.py), so the two
+servers answer with identical JSON.
+"""
+
+import json
+import logging
+import re
+from datetime import datetime
+import pandas as pd
+
+from state import AgentState
+from core.metadata_store import StaleSchemaKey, resolve_schema_description
+from core.result_formats import dumps
+from core.result_store import load_result, store_result
+from core.result_pages import page_size_for
+from core.db_utils import to_dataframe
+
+logger = logging.getLogger(__name__)
+
+# Small, JSON-safe fields pushed with each node event (DataFrames and prompts stay server-side)
+PROGRESS_FIELDS = ("detected_intent", "cache_hit", "generated_sql", "validation_passed",
+                   "validation_error", "execution_error", "result_truncated", "error")
+
+RESULT_NOT_FOUND = "Unknown or expired result_id: send query_result instead"
+
+PAGING_NOT_FOUND = "Unknown or expired paging id: run the query again"
+INVALID_CURSOR = "cursor must be a next_cursor returned by /query or /results"
+
+UNSUPPORTED_FORMAT = "Unsupported result format: use json, columnar, arrow or parquet (arrow and parquet need pyarrow)"
+
+# Nodes whose LLM tokens are SQL (or the combined {intent, sql} JSON, see SqlTokenFilter)
+SQL_TOKEN_NODES = ("sql_generator", "speculative_retrieval")
+SQL_FIELD = re.compile(r'"sql"\s*:\s*"')
+
+
+class SqlTokenFilter:
+  """
+  The sql_token text of one node's LLM token stream. Plain SQL passes
+  through. A combined intent + SQL response is a JSON object: only the
+  characters of its "sql" string are passed on, unescaped, as they arrive.
+  """
+
+  def __init__(self):
+    self.buffer = ""
+    self.is_json = None  # decided by the first non-blank character
+    self.position = None  # next unread character of the "sql" string
+    self.done = False
+
+  def feed(self, token: str) -> str:
+    if self.is_json is False:
+      return token
+    self.buffer += token
+    if self.is_json is None:
+      head = self.buffer.lstrip()
+      if not head:
+        return ""
+      self.is_json = head.startswith("{")
+      if not self.is_json:
+        return self.buffer
+    if self.done:
+      return ""
+    if self.position is None:
+      match = SQL_FIELD.search(self.buffer)
+      if match is None:
+        return ""
+      self.position = match.end()
+    # Stop before an incomplete escape sequence; decode the rest as a JSON string
+    end = self.position
+    while end < len(self.buffer):
+      char = self.buffer[end]
+      if char == '"':
+        self.done = True
+        break
+      if char == "\\":
+        step = 6 if self.buffer[end + 1:end + 2] == "u" else 2
+        if end + step > len(self.buffer):
+          break
+        end += step
+      else:
+        end += 1
+    raw, self.position = self.buffer[self.position:end], end
+    if not raw:
+      return ""
+    try:
+      # strict=False: models put raw newlines and tabs inside the string
+      return json.loads(f'"{raw}"', strict=False)
+    except ValueError:
+      return raw  # only the token preview degrades; the result event carries the parsed SQL
+
+
+def error_body(error_msg: str) -> dict:
+  return {
+    "status": "error",
+    "error": error_msg,
+    "timestamp": datetime.now().isoformat()
+  }
+
+def new_agent_state(user_input: str, defer_execution: bool = False) -> AgentState:
+  return AgentState(
+    user_input=user_input,
+    defer_execution=defer_execution,
+    detected_intent=None,
+    relevant_columns=None,
+    relevant_tables=None,
+    similarity_scores=None,
+    generated_sql=None,
+    used_prompt=None,
+    schema_key=None,
+    validated_sql=None,
+    validation_passed=None,
+    validation_error=None,
+    query_result=None,
+    execution_error=None,
+    explanation=None,
+    suggestions=None,
+    final_output=None,
+    insights=None,
+    visualization_config=None,
+    visualization_data=None,
+    error=None,
+    debug_info={
+      'prompt': None,  # Will store the prompt sent to LLM
+      'schema_context': None  # Will store relevant schema context
+    }
+  )
+
+def read_query_payload(is_json: bool, data) -> (str, str):
+  """Validate a /query JSON payload. Returns (user_input, None) or (None, error message) for a 400."""
+  if not is_json:
+    return None, "Content-Type must be application/json"
+
+  # Validate required fields
+  if not data or 'user_input' not in data:
+    return None, "Missing required field: user_input"
+
+  user_input = data.get('user_input', '').strip()
+
+  if not user_input:
+    return None, "user_input cannot be empty"
+
+  return user_input, None
+
+def read_page_size(data) -> (int, str):
+  """Optional /query page_size: a positive integer, or true for paging.default_page_size. Returns (page_size or None, error)."""
+  page_size = (data or {}).get('page_size')
+  if page_size is None or page_size is False:
+    return None, None
+  if page_size is not True and (not isinstance(page_size, int) or page_size < 1):
+    return None, "page_size must be a positive integer or true"
+  return page_size_for(page_size), None
+
+def read_result_payload(is_json: bool, data, empty_error: str):
+  """
+  Validate an /insights or /visualization payload: the result is either a
+  result_id returned by /query (kept in core/result_store.py) or the
+  query_result rows themselves.
+  Returns (user_input, query_result, result_df, None) or (None, None, None, error message);
+  query_result is None when the result came from the store.
+  """
+  if not is_json:
+    return None, None, None, "Content-Type must be application/json"
+
+  if not data or 'user_input' not in data or ('query_result' not in data and 'result_id' not in data):
+    return None, None, None, "Missing required fields: user_input, result_id or query_result"
+
+  user_input = data.get('user_input', '').strip()
+
+  if not user_input:
+    return None, None, None, "user_input cannot be empty"
+
+  # ✅ A stored result skips re-uploading and re-parsing the rows
+  if 'result_id' in data and 'query_result' not in data:
+    result_df = load_result(data.get('result_id'))
+    if result_df is None:
+      return None, None, None, RESULT_NOT_FOUND
+    return user_input, None, result_df, None
+
+  query_result = data.get('query_result', [])
+
+  # Convert query_result to DataFrame if it's a list of dicts
+  if isinstance(query_result, list) and query_result:
+    return user_input, query_result, pd.DataFrame(query_result), None
+  return None, None, None, empty_error
+
+def result_payload_status(error: str) -> int:
+  """HTTP status for a read_result_payload error: 404 lets clients resend the rows for an expired result_id."""
+  return 404 if error == RESULT_NOT_FOUND else 400
+
+def state_dict(state) -> dict:
+  """Final graph output as a dict (invoke returns a dict, stream "values" may return the model)."""
+  return state.dict() if isinstance(state, AgentState) else dict(state or {})
+
+def node_progress(update) -> dict:
+  if not isinstance(update, dict):
+    return {}
+  return {key: update[key] for key in PROGRESS_FIELDS if key in update}
+
+def schema_description(schema_key: str):
+  """Schema text the request ran against; None when the metadata was reloaded too often since."""
+  try:
+    return resolve_schema_description(schema_key)
+  except StaleSchemaKey as e:
+    logger.warning(str(e))
+    return None
+
+def build_query_response(user_input: str, result: dict, execution_time: float) -> dict:
+  """The /query response body for a final graph state."""
+  query_results = []
+  result_id = None
+  query_metadata = {
+    "row_count": 0,
+    "columns": [],
+    "message": None,
+    "truncated": False
+  }
+  # ✅ sql_executor_node already ran the SQL; its result is the single source of truth
+  execution_error = result.get("execution_error")
+  result_df = result.get("query_result")
+
+  if isinstance(result_df, pd.DataFrame):
+    if not result_df.empty:
+      query_results = result_df.to_dict('records')
+      result_id = store_result(result_df)
+      truncated = result_df.attrs.get("truncated", False)
+      query_metadata = {
+        "message": f"Query returned {len(result_df)} row(s)" + (" (truncated to max_result_rows)" if truncated else ""),
+        "columns": result_df.columns.tolist(),
+        "row_count": len(result_df),
+        "truncated": truncated
+      }
+    else:
+      query_metadata = {
+        "columns": [],
+        "row_count": 0,
+        "message": "No data found for this query",
+        "truncated": False
+      }
+    logger.info(f"SQL executed successfully, returned {len(result_df)} rows")
+  elif execution_error:
+    logger.error(f"Error executing SQL: {execution_error}")
+    query_metadata = {
+      "row_count": 0,
+      "columns": [],
+      "message": f"SQL execution failed: {execution_error}",
+      "truncated": False
+    }
+
+  debug_info = result.get("debug_info") or {}
+  return {
+    "status": "success",
+    "timestamp": datetime.now().isoformat(),
+    "execution_time": execution_time,
+    "user_input": user_input,
+    "prompt_sent_to_llm": debug_info.get("prompt"),
+    "relevant_schema_context": debug_info.get("schema_context"),
+    "detected_intent": result.get("detected_intent"),
+    "relevant_columns": result.get("relevant_columns", []),
+    "relevant_tables": result.get("relevant_tables", []),
+    "similarity_scores": result.get("similarity_scores", {}),
+    "generated_sql": result.get("generated_sql"),
+    "used_prompt": result.get("used_prompt"),
+    "cache_hit": bool(result.get("cache_hit")),
+    "schema_description": schema_description(result.get("schema_key")),
+    "validated_sql": result.get("validated_sql"),
+    "validation_passed": result.get("validation_passed"),
+    "validation_error": result.get("validation_error"),
+    "query_result": query_results,
+    "result_id": result_id,
+    "query_metadata": query_metadata,
+    "execution_error": execution_error,
+    "sql_executions": result.get("sql_executions") or 0,
+    "explanation": result.get("explanation"),
+    "suggestions": result.get("suggestions", []),
+    "final_output": result.get("final_output"),
+    "insights": result.get("insights"),
+    "visualization_config": result.get("visualization_config"),
+    "visualization_data": result.get("visualization_data"),
+    "error": result.get("error")
+  }
+
+def ndjson_line(value) -> str:
+  return dumps(value).decode("utf-8") + "\n"
+
+def rows_to_stream(result: dict):
+  """The SQL /query/rows should execute, or None when the graph produced nothing runnable."""
+  if result.get("detected_intent") != "ask_question" or not result.get("validation_passed"):
+    return None
+  return result.get("validated_sql") or result.get("generated_sql") or None
+
+def result_metadata(user_input: str, result: dict, execution_time: float, columns: list,
+                    row_count: int = None, truncated: bool = False) -> dict:
+  """The /query body without the rows, for results sent as NDJSON, columnar JSON, Arrow or Parquet."""
+  body = build_query_response(user_input, result, execution_time)
+  body.pop("query_result")
+  body.pop("result_id")
+  execution_error = result.get("execution_error")
+  body["query_metadata"] = {
+    "columns": [getattr(column, "name", column) for column in columns],
+    "row_count": row_count,
+    "message": f"SQL execution failed: {execution_error}" if execution_error else
+               f"Query returned {row_count} row(s)" + (" (truncated to max_result_rows)" if truncated else "")
+               if row_count is not None else "Streaming rows",
+    "truncated": truncated
+  }
+  return body
+
+def build_rows_meta(user_input: str, result: dict, execution_time: float, columns: list,
+                    execution_error: str = None) -> dict:
+  """First NDJSON line of /query/rows; row_count is sent in the last line."""
+  if execution_error:
+    result = {**result, "execution_error": execution_error}
+  return {"meta": result_metadata(user_input, result, execution_time, columns)}
+
+def page_body(columns: list, rows: list, paging_id: str, offset: int, next_cursor: str) -> dict:
+  """query_result, query_metadata and paging of one page (/query with page_size, GET /results/<id>)."""
+  names = [column.name for column in columns]
+  return {
+    "query_result": to_dataframe(names, rows, False).to_dict('records'),  # same values as /query
+    "query_metadata": {
+      "columns": names,
+      "row_count": len(rows),
+      "message": f"Rows {offset + 1} to {offset + len(rows)}" + ("" if next_cursor else " (last page)") if rows else "No rows at this cursor",
+      "truncated": False
+    },
+    "paging": {
+      "id": paging_id,  # None when the first page holds every row
+      "cursor": str(offset),
+      "next_cursor": next_cursor
+    }
+  }
+
+def columnar_headers(builder) -> dict:
+  return {"X-Row-Count": str(builder.row_count), "X-Result-Truncated": str(builder.truncated).lower()}
+
+def build_insights_response(user_input: str, result_df: pd.DataFrame, insights_state) -> dict:
+  return {
+    "status": "success",
+    "timestamp": datetime.now().isoformat(),
+    "user_input": user_input,
+    "insights": insights_state.explanation,
+    "data_summary": {
+      "row_count": len(result_df),
+      "columns": result_df.columns.tolist()
+    }
+  }
+
+def build_visualization_response(user_input: str, query_result: list, result_df: pd.DataFrame, vis_state) -> dict:
+  # Parse visualization suggestions
+  visualization_config = None
+  explanation = None
+  if query_result is None:
+    query_result = result_df.to_dict('records')  # result_id payload: the chart data comes from the stored result
+  processed_data = query_result
+
+  if vis_state.suggestions:
+    try:
+      # Split LLM response into explanation and JSON
+      suggestion_lines = vis_state.suggestions.split('\n', 1)
+      explanation = suggestion_lines[0].strip()
+      suggestion_json = suggestion_lines[1].strip() if len(suggestion_lines) > 1 else '{}'
+      visualization_config = json.loads(suggestion_json)
+
+      # Process data based on visualization config
+      top_n = visualization_config.get("top_n")
+      chart_type = visualization_config.get("chart_type")
+
+      if top_n and isinstance(top_n, int):
+        if chart_type in ["bar", "line"] and visualization_config.get("y"):
+          processed_data = result_df.sort_values(visualization_config["y"], ascending=False).head(top_n).to_dict('records')
+        elif chart_type == "pie" and visualization_config.get("values"):
+          processed_data = result_df.sort_values(visualization_config["values"], ascending=False).head(top_n).to_dict('records')
+
+    except Exception as parse_error:
+      logger.warning(f"Failed to parse visualization config: {str(parse_error)}")
+      explanation = "Unable to generate visualization configuration"
+      visualization_config = None
+      processed_data = query_result
+
+  return {
+    "status": "success",
+    "timestamp": datetime.now().isoformat(),
+    "user_input": user_input,
+    "explanation": explanation,
+    "visualization_config": visualization_config,
+    "visualization_data": processed_data,
+    "data_summary": {
+      "row_count": len(result_df),
+      "columns": result_df.columns.tolist()
+    }
+  }
@@ -0,0 +1,395 @@
+"""
+⚡ Async ASGI API
+Same endpoints and responses as flask_api.py, served by Quart (Flask's ASGI
+twin). The graph runs with ainvoke / astream: intent classification and SQL
+generation await the LLM (ChatOpenAI.ainvoke), schema retrieval awaits the
+AsyncQdrantClient and sql_executor awaits an asyncpg pool, so one process
+keeps many questions in flight while they wait on I/O. Other sync nodes
+(validation, formatting) run in LangGraph's thread pool.
+
+Run from backend/:  uvicorn asgi_api:app --host 0.0.0.0 --port 5000
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
+
+from quart import Quart, Response, request, jsonify
+from quart_cors import cors
+import logging
+from datetime import datetime
+import traceback
+
+from graph import create_graph
+from state import AgentState
+from api_common import (
+  INVALID_CURSOR, PAGING_NOT_FOUND, SQL_TOKEN_NODES, UNSUPPORTED_FORMAT, SqlTokenFilter, build_insights_response, build_query_response, build_rows_meta, build_visualization_response,
+  columnar_headers, error_body, ndjson_line, new_agent_state, node_progress, page_body, read_page_size,
+  read_query_payload, read_result_payload, result_metadata, result_payload_status, rows_to_stream, state_dict
+)
+from nodes.answer_cache import record_deferred_execution
+from core.result_formats import JSON_MIMETYPE, negotiate_format, result_builder
+from core.async_db import afetch_result, astream_rows, async_pool_stats, close_async_pool
+from core.db_utils import query_stats
+from core.model_registry import registry_stats
+from core.fewshot_selector import get_fewshot_library
+from core.answer_cache import answer_cache_stats
+from core.llm_cache import llm_cache_stats
+from core.intent_index import intent_stats
+from core.result_store import result_store_stats
+from core.result_pages import aclose_all_paged_results, aclose_paged_result, aopen_paged_result, aread_page, paging_stats, parse_cursor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = cors(Quart(__name__))
+
+try:
+  text_to_sql_graph = create_graph()
+  logger.info("text-to-sql graph initialized successfully")
+except Exception as e:
+  logger.error(f"Failed in initialize graph: {str(e)}")
+  text_to_sql_graph = None
+
+# Load and pre-render the few-shot examples once, off the request path
+try:
+  get_fewshot_library()
+except Exception as e:
+  logger.warning(f"Few-shot library will load on first request: {str(e)}")
+
+@app.after_serving
+async def close_connections():
+  await aclose_all_paged_results()
+  await close_async_pool()
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+  return jsonify({
+    "status": "healthy",
+    "timestamp": datetime.now().isoformat(),
+    "graph_initialized": text_to_sql_graph is not None,
+    "model_registry": registry_stats(),
+    "db_pool": async_pool_stats(),
+    "db_queries": query_stats(),
+    "answer_cache": answer_cache_stats(),
+    "llm_cache": llm_cache_stats(),
+    "intent_classifier": intent_stats(),
+    "result_store": result_store_stats(),
+    "paging": paging_stats()
+  }), 200
+
+@app.route('/insights', methods=['POST'])
+async def get_insights():
+  try:
+    user_input, query_result, result_df, error = read_result_payload(
+      request.is_json, await request.get_json(silent=True), "No data available for insights generation"
+    )
+    if error:
+      return jsonify({"error": error, "status": "error"}), result_payload_status(error)
+
+    from nodes.insights import insights_node
+    state = AgentState(user_input=user_input, query_result=result_df)
+    insights_state = await insights_node.ainvoke(state)
+
+    response_data = build_insights_response(user_input, result_df, insights_state)
+
+    logger.info("✅ Insights generated successfully")
+    return jsonify(response_data), 200
+
+  except Exception as e:
+    error_msg = str(e)
+    logger.error(f"❌ Error generating insights: {error_msg}")
+    logger.error(traceback.format_exc())
+
+    return jsonify(error_body(error_msg)), 500
+
+@app.route('/visualization', methods=["POST"])
+async def get_visualization():
+  """Generate visualization configuration from query results (payload as in flask_api.py)."""
+  try:
+    user_input, query_result, result_df, error = read_result_payload(
+      request.is_json, await request.get_json(silent=True), "No data available for visualization"
+    )
+    if error:
+      return jsonify({"error": error, "status": "error"}), result_payload_status(error)
+
+    from nodes.visualization import visualization_node
+    state = AgentState(user_input=user_input, query_result=result_df)
+    vis_state = await visualization_node.ainvoke(state)
+
+    response_data = build_visualization_response(user_input, query_result, result_df, vis_state)
+
+    logger.info("✅ Visualization config generated successfully")
+    return jsonify(response_data), 200
+
+  except Exception as e:
+    error_msg = str(e)
+    logger.error(f"❌ Error generating visualization: {error_msg}")
+    logger.error(traceback.format_exc())
+
+    return jsonify(error_body(error_msg)), 500
+
+async def read_user_input():
+  """Validate the /query JSON payload. Returns (user_input, None) or (None, error response)."""
+  user_input, error = read_query_payload(request.is_json, await request.get_json(silent=True))
+  if error:
+    return None, (jsonify({"error": error, "status": "error"}), 400)
+
+  # Check if graph is initialized
+  if text_to_sql_graph is None:
+    return None, (jsonify({
+      "error": "Text-to-SQL graph not initialized",
+      "status": "error"
+    }), 500)
+
+  return user_input, None
+
+async def columnar_query_response(user_input: str, mimetype: str):
+  """/query as columnar JSON, Arrow IPC or Parquet; see flask_api.columnar_query_response."""
+  start_time = datetime.now()
+  result = await text_to_sql_graph.ainvoke(new_agent_state(user_input, defer_execution=True))
+  sql = rows_to_stream(result)
+  builder = None
+  if sql:
+    result["sql_executions"] = 1
+    try:
+      builder = await afetch_result(sql, result_builder(mimetype))
+    except Exception as e:
+      result["execution_error"] = str(e)
+    record_deferred_execution(result, result.get("execution_error") is None)
+  execution_time = (datetime.now() - start_time).total_seconds()
+
+  if builder is None:
+    # Nothing to encode (greeting, failed validation or execution): the JSON body says why
+    return jsonify(build_query_response(user_input, result, execution_time)), 200
+
+  body = result_metadata(user_input, result, execution_time, builder.columns, builder.row_count, builder.truncated)
+  payload = builder.encode(mimetype, body)
+  logger.info(f"✅ Query processed in {execution_time:.2f}s, {builder.row_count} rows as {mimetype} ({len(payload)} bytes)")
+  return Response(payload, mimetype=mimetype, headers=columnar_headers(builder))
+
+async def paged_query_response(user_input: str, page_size: int):
+  """/query with page_size; see flask_api.paged_query_response."""
+  start_time = datetime.now()
+  result = await text_to_sql_graph.ainvoke(new_agent_state(user_input, defer_execution=True))
+  sql = rows_to_stream(result)
+  page = None
+  if sql:
+    result["sql_executions"] = 1
+    try:
+      page = await aopen_paged_result(sql, page_size)
+    except Exception as e:
+      result["execution_error"] = str(e)
+    record_deferred_execution(result, result.get("execution_error") is None)
+  execution_time = (datetime.now() - start_time).total_seconds()
+  
+  if page is None:
+    return jsonify(build_query_response(user_input, result, execution_time)), 200
+  
+  paging_id, columns, rows, next_cursor = page
+  body = result_metadata(user_input, result, execution_time, columns)
+  body.update(page_body(columns, rows, paging_id, 0, next_cursor))
+  logger.info(f"✅ Query processed in {execution_time:.2f}s, first page of {len(rows)} rows" + (" (cursor held)" if paging_id else ""))
+  return jsonify(body), 200
+
+@app.route('/query', methods=['POST'])
+async def process_query():
+  """Main endpoint for processing text-to-SQL queries (payload as in flask_api.py)."""
+  try:
+    user_input, error_response = await read_user_input()
+    if error_response:
+      return error_response
+
+    # ✅ Content negotiation: columnar JSON / Arrow IPC / Parquet on request, row-oriented JSON by default
+    mimetype = negotiate_format(request.args.get("format"), request.headers.get("Accept"))
+    if mimetype is None:
+      return jsonify({"error": UNSUPPORTED_FORMAT, "status": "error"}), 406
+
+    logger.info(f"Processing query: {user_input[:100]}...")
+
+    if mimetype != JSON_MIMETYPE:
+      return await columnar_query_response(user_input, mimetype)
+
+    page_size, error = read_page_size(await request.get_json())
+    if error:
+      return jsonify({"error": error, "status": "error"}), 400
+    if page_size:
+      return await paged_query_response(user_input, page_size)
+
+    # Execute the graph; the event loop serves other requests while this one awaits I/O
+    start_time = datetime.now()
+    result = await text_to_sql_graph.ainvoke(new_agent_state(user_input))
+    end_time = datetime.now()
+    execution_time = (end_time - start_time).total_seconds()
+
+    response_data = build_query_response(user_input, result, execution_time)
+
+    logger.info(f"✅ Query processed successfully in {execution_time:.2f}s")
+    return jsonify(response_data), 200
+
+  except Exception as e:
+    error_msg = str(e)
+    logger.error(f"❌ Error processing query: {error_msg}")
+    logger.error(traceback.format_exc())
+
+    return jsonify(error_body(error_msg)), 500
+
+def sse_event(event: str, data) -> str:
+  return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+@app.route('/query/stream', methods=['POST'])
+async def stream_query():
+  """Server-Sent Events version of /query; same events as flask_api.stream_query."""
+  user_input, error_response = await read_user_input()
+  if error_response:
+    return error_response
+
+  logger.info(f"Streaming query: {user_input[:100]}...")
+
+  async def generate():
+    start_time = datetime.now()
+    final_state = None
+    sql_tokens = {}  # node -> SqlTokenFilter
+    try:
+      async for mode, payload in text_to_sql_graph.astream(
+        new_agent_state(user_input), stream_mode=["updates", "messages", "values"]
+      ):
+        if mode == "messages":
+          chunk, metadata = payload
+          token = getattr(chunk, "content", "")
+          node = metadata.get("langgraph_node")
+          if token and node in SQL_TOKEN_NODES:
+            token = sql_tokens.setdefault(node, SqlTokenFilter()).feed(token)
+            if token:
+              yield sse_event("sql_token", {"node": node, "token": token})
+        elif mode == "updates":
+          elapsed_ms = round((datetime.now() - start_time).total_seconds() * 1000, 1)
+          for node, update in payload.items():
+            yield sse_event("node", {"node": node, "elapsed_ms": elapsed_ms, **node_progress(update)})
+        else:
+          final_state = payload
+
+      execution_time = (datetime.now() - start_time).total_seconds()
+      yield sse_event("result", build_query_response(user_input, state_dict(final_state), execution_time))
+      logger.info(f"✅ Streamed query processed in {execution_time:.2f}s")
+    except Exception as e:
+      logger.error(f"❌ Error streaming query: {str(e)}")
+      logger.error(traceback.format_exc())
+      yield sse_event("error", error_body(str(e)))
+
+  return Response(
+    generate(),
+    mimetype="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # no proxy buffering
+  )
+
+@app.route('/query/rows', methods=['POST'])
+async def stream_query_rows():
+  """NDJSON rows from a server-side cursor; same lines as flask_api.stream_query_rows."""
+  try:
+    user_input, error_response = await read_user_input()
+    if error_response:
+      return error_response
+
+    logger.info(f"Streaming rows for query: {user_input[:100]}...")
+
+    # The graph stops after validation; the SQL runs while the response streams
+    start_time = datetime.now()
+    result = await text_to_sql_graph.ainvoke(new_agent_state(user_input, defer_execution=True))
+    execution_time = (datetime.now() - start_time).total_seconds()
+    sql = rows_to_stream(result)
+    chunk_size = (await request.get_json()).get("chunk_size")
+
+  except Exception as e:
+    error_msg = str(e)
+    logger.error(f"❌ Error processing query: {error_msg}")
+    logger.error(traceback.format_exc())
+    return jsonify(error_body(error_msg)), 500
+
+  async def generate():
+    if sql is None:
+      yield ndjson_line(build_rows_meta(user_input, result, execution_time, []))
+      yield ndjson_line({"end": {"row_count": 0}})
+      return
+    chunks = astream_rows(sql, chunk_size if isinstance(chunk_size, int) and chunk_size > 0 else None)
+    row_count = 0
+    try:
+      try:
+        columns = await chunks.__anext__()
+      except Exception as e:
+        record_deferred_execution(result, False)
+        yield ndjson_line(build_rows_meta(user_input, result, execution_time, [], execution_error=str(e)))
+        yield ndjson_line({"end": {"row_count": 0}})
+        return
+      yield ndjson_line(build_rows_meta(user_input, result, execution_time, columns))
+      async for rows in chunks:
+        row_count += len(rows)
+        yield "".join(ndjson_line(row) for row in rows)
+      record_deferred_execution(result, True)
+      yield ndjson_line({"end": {"row_count": row_count}})
+      logger.info(f"✅ Streamed {row_count} rows")
+    except Exception as e:
+      logger.error(f"❌ Error streaming rows after {row_count}: {str(e)}")
+      record_deferred_execution(result, False)
+      yield ndjson_line({"error": str(e)})
+    finally:
+      await chunks.aclose()  # returns the connection when the client disconnects early
+
+  return Response(
+    generate(),
+    mimetype="application/x-ndjson",
+    headers={"X-Accel-Buffering": "no"}
+  )
+
+@app.route('/results/<paging_id>', methods=['GET'])
+async def get_result_page(paging_id):
+  """A later page of a paged /query; same responses as flask_api.get_result_page."""
+  try:
+    offset = parse_cursor(request.args.get("cursor"))
+  except ValueError:
+    return jsonify({"error": INVALID_CURSOR, "status": "error"}), 400
+  
+  try:
+    page = await aread_page(paging_id, offset)
+  except Exception as e:
+    error_msg = str(e)
+    logger.error(f"❌ Error reading result page: {error_msg}")
+    logger.error(traceback.format_exc())
+    return jsonify(error_body(error_msg)), 500
+  
+  if page is None:
+    return jsonify({"error": PAGING_NOT_FOUND, "status": "error"}), 404
+  
+  columns, rows, next_cursor = page
+  return jsonify({
+    "status": "success",
+    "timestamp": datetime.now().isoformat(),
+    **page_body(columns, rows, paging_id, offset, next_cursor)
+  }), 200
+
+@app.route('/results/<paging_id>', methods=['DELETE'])
+async def close_result_pages(paging_id):
+  """Release the held cursor before it goes idle."""
+  return jsonify({"status": "success", "closed": await aclose_paged_result(paging_id)}), 200
+
+@app.errorhandler(404)
+async def not_found(error):
+  """Handle 404 errors"""
+  return jsonify({
+      "status": "error",
+      "error": "Endpoint not found",
+      "timestamp": datetime.now().isoformat()
+  }), 404
+
+@app.errorhandler(500)
+async def internal_error(error):
+  """Handle 500 errors"""
+  return jsonify({
+      "status": "error",
+      "error": "Internal server error",
+      "timestamp": datetime.now().isoformat()
+  }), 500
+
+if __name__ == '__main__':
+  import uvicorn
+  uvicorn.run(app, host='0.0.0.0', port=5000)
@@ -0,0 +1,95 @@
+# benchmarks/bench_greet_path.py
+
+"""
+⏱️ Greet-path benchmark
+Compares local overhead of a "hello" request before and after intent-first
+routing: the legacy graph re-read and formatted metadata_template.json at the
+entry point and copied the schema text through every node, the current graph
+goes intent_classifier → formatter → logger without touching the schema.
+
+The intent LLM call is stubbed so only in-process latency and allocations are
+measured. Run from backend/:  python benchmarks/bench_greet_path.py
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import nodes.intent_classifier as intent_classifier
+intent_classifier.detect_intent_and_reason = lambda query, vector=None, allow_undecided=False: ("greet", "")
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph
+from pydantic import create_model
+from graph import create_graph
+from state import AgentState
+from nodes.formatter import formatter_node
+from nodes.logger import logger_node
+
+REQUESTS = 200
+
+
+def legacy_build_schema_description():
+    """The pre-store schema_initializer: parse and format the template on every request."""
+    metadata_path = os.path.join(os.path.dirname(__file__), '../core/metadata_template.json')
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    lines = []
+    for table in metadata:
+        lines.append(f"Table: {table['table_name']} - {table.get('description', '')}")
+        for col in table['columns']:
+            col_line = f"  Column: {col['name']} ({col['type']}) - {col.get('description','')}"
+            if col.get('possible_values'):
+                col_line += f" | Possible values: {col['possible_values']}"
+            if col.get('value_mappings'):
+                col_line += f" | Value mappings: {col['value_mappings']}"
+            lines.append(col_line)
+    return '\n'.join(lines)
+
+
+def create_legacy_graph():
+    """schema_init → intent_classifier → formatter → logger, carrying schema_description."""
+    LegacyState = create_model("LegacyState", __base__=AgentState, schema_description=(str, None))
+    graph = StateGraph(LegacyState)
+    graph.add_node("schema_init", RunnableLambda(
+        lambda state: state.copy(update={"schema_description": legacy_build_schema_description()})
+    ))
+    graph.add_node("intent_classifier", intent_classifier.intent_classifier_node)
+    graph.add_node("formatter", formatter_node)
+    graph.add_node("logger", logger_node)
+    graph.set_entry_point("schema_init")
+    graph.add_edge("schema_init", "intent_classifier")
+    graph.add_edge("intent_classifier", "formatter")
+    graph.add_edge("formatter", "logger")
+    graph.set_finish_point("logger")
+    return graph.compile()
+
+
+def measure(app, label: str):
+    app.invoke(AgentState(user_input="hello"))  # warm-up
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        app.invoke(AgentState(user_input="hello"))
+    latency_ms = (time.perf_counter() - start) * 1000 / REQUESTS
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(REQUESTS):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        app.invoke(AgentState(user_input="hello"))
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    peak_kib = sum(peaks) / len(peaks) / 1024
+
+    print(f"{label:<8} {latency_ms:8.3f} ms/request   {peak_kib:8.1f} KiB peak allocation/request")
+
+
+if __name__ == "__main__":
+    print(f"Greet path, {REQUESTS} requests, intent LLM call stubbed")
+    measure(create_legacy_graph(), "before")
+    measure(create_graph(), "after")
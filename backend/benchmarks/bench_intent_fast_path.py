@@ -0,0 +1,90 @@
+# benchmarks/bench_intent_fast_path.py
+
+"""
+⏱️ Intent fast-path benchmark
+Leave-one-out evaluation of the local kNN intent classifier on its own
+labelled utterances (intent prompt examples + few-shot questions): each
+utterance is classified by an index built from all the others.
+
+Reports how often the fast path fires (overall and per label, plus on
+held-out greetings that are not in the index), its accuracy when it does,
+the local classification cost, and the LLM latency saved. The numbers depend
+on the encoder: run it with the configured sentence-transformer. The LLM latency is measured
+on --llm-samples real intent calls (default 0: pass --llm-ms instead).
+
+Run from backend/:  python benchmarks/bench_intent_fast_path.py [--llm-samples 5 | --llm-ms 600]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.fewshot_selector import get_fewshot_library
+from core.intent_index import IntentIndex, build_intent_index
+from core.model_registry import get_sentence_transformer
+from nodes.intent_classifier import FAST_PATH_EXAMPLES, INTENT_EXAMPLES, INTENT_PROMPT, llm
+
+# Greetings users type that are not labelled utterances
+GREETING_PROBES = ["Hi!", "hello", "Hey!", "Good morning", "hi there, how are you?", "Yo",
+                   "Hello, good evening", "hey hey", "Hi assistant!", "Good day"]
+
+
+def leave_one_out(index: IntentIndex):
+    vectors = index.index.matrix
+    fired = correct = 0
+    fired_by_label = {}
+    seconds = 0.0
+    for i, (text, label) in enumerate(index.utterances):
+        keep = [j for j in range(len(index)) if j != i]
+        held_out = IntentIndex([index.utterances[j] for j in keep], vectors[keep], index.k,
+                               index.min_similarity, index.min_agreement)
+        start = time.perf_counter()
+        predicted, _, _ = held_out.classify(vectors[i])
+        seconds += time.perf_counter() - start
+        if predicted is not None:
+            fired += 1
+            correct += predicted == label
+            fired_by_label[label] = fired_by_label.get(label, 0) + 1
+    return fired, correct, seconds / len(index), fired_by_label
+
+
+def measure_llm_ms(samples: int) -> float:
+    from langchain_core.messages import HumanMessage
+    # llm.invoke directly: the response cache would hide the round trip
+    texts = [text for text, _ in INTENT_EXAMPLES][:samples]
+    start = time.perf_counter()
+    for text in texts:
+        llm.invoke([HumanMessage(content=INTENT_PROMPT.format(query=text))])
+    return (time.perf_counter() - start) * 1000 / len(texts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-samples", type=int, default=0)
+    parser.add_argument("--llm-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    get_fewshot_library()
+    index = build_intent_index(FAST_PATH_EXAMPLES)
+    labels = [label for _, label in index.utterances]
+    print(f"{len(index)} labelled utterances: " +
+          ", ".join(f"{label}={labels.count(label)}" for label in sorted(set(labels))))
+    print(f"k={index.k} min_similarity={index.min_similarity} min_agreement={index.min_agreement}")
+
+    fired, correct, local_s, fired_by_label = leave_one_out(index)
+    print(f"fast path fired   {fired}/{len(index)} ({fired / len(index):.1%})")
+    print(f"accuracy if fired {correct}/{fired} ({(correct / fired if fired else 0):.1%})")
+    for label in sorted(set(labels)):
+        print(f"  {label:<14}  {fired_by_label.get(label, 0)}/{labels.count(label)}")
+    probes = [index.classify(vector)[0] for vector in get_sentence_transformer().encode(GREETING_PROBES)]
+    print(f"greeting probes   {probes.count('greet')}/{len(probes)} fast-path greet, "
+          f"{sum(p is None for p in probes)} to the LLM, {sum(p not in (None, 'greet') for p in probes)} wrong")
+    print(f"local classify    {local_s * 1e6:.1f} µs (excluding the question embedding)")
+
+    llm_ms = measure_llm_ms(args.llm_samples) if args.llm_samples else args.llm_ms
+    if llm_ms is not None:
+        saved_ms = fired / len(index) * (llm_ms - local_s * 1000)
+        print(f"LLM intent call   {llm_ms:.1f} ms  →  {saved_ms:.1f} ms saved per request on average")
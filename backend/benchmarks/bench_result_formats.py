@@ -0,0 +1,104 @@
+# benchmarks/bench_result_formats.py
+
+"""
+⏱️ Result format benchmark: records JSON vs columnar JSON vs Arrow IPC vs Parquet
+Encodes a synthetic wide transaction result (int ids, numeric amounts,
+timestamps, dates, text) the way /query does:
+
+- json:    DataFrame.from_records → to_dict('records') → Flask's JSON
+           provider (jsonify), the default /query path
+- columnar: fetched chunks → one list per column → orjson (?format=columnar;
+           the json module when orjson is not installed)
+- arrow:   fetched chunks → RecordBatches → Arrow IPC stream (?format=arrow)
+- parquet: fetched chunks → RecordBatches → Parquet (?format=parquet)
+
+The rows are generated up front as the tuples a cursor returns, so only
+the encoding is timed. Reports encode time and payload size per row count.
+
+Run from backend/:  python benchmarks/bench_result_formats.py [--rows 1000 100000 1000000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask
+from core.db_utils import ResultColumn, to_dataframe
+from core.result_formats import ARROW_MIMETYPE, COLUMNAR_MIMETYPE, PARQUET_MIMETYPE, result_builder
+
+CHUNK_ROWS = 1000
+COLUMNS = [
+    ResultColumn("transaction_id", 20),
+    ResultColumn("account_id", 23),
+    ResultColumn("amount", 1700),
+    ResultColumn("balance_after", 1700),
+    ResultColumn("transaction_type", 1043),
+    ResultColumn("description", 25),
+    ResultColumn("created_at", 1114),
+    ResultColumn("value_date", 1082),
+]
+TYPES = ["deposit", "withdrawal", "transfer", "payment"]
+
+
+def make_chunks(rows: int) -> list:
+    start = datetime(2024, 1, 1)
+    chunks = []
+    for offset in range(0, rows, CHUNK_ROWS):
+        chunks.append([
+            (
+                i,
+                i % 5000,
+                Decimal(i % 100000) / 100,
+                Decimal(i % 1000000) / 100,
+                TYPES[i % 4],
+                f"Card payment #{i}",
+                start + timedelta(seconds=i),
+                date(2024, 1, 1) + timedelta(days=i % 365),
+            )
+            for i in range(offset, min(offset + CHUNK_ROWS, rows))
+        ])
+    return chunks
+
+
+def encode_json(chunks: list, provider) -> bytes:
+    rows = [row for chunk in chunks for row in chunk]
+    df = to_dataframe([column.name for column in COLUMNS], rows, False)
+    return provider.dumps({"query_result": df.to_dict('records')}).encode("utf-8")
+
+
+def encode_columnar(chunks: list, mimetype: str) -> bytes:
+    builder = result_builder(mimetype)(COLUMNS)
+    for chunk in chunks:
+        builder.add(chunk)
+    return builder.encode(mimetype, {})
+
+
+def measure(label: str, encode, rows: int, baseline: tuple = None):
+    gc.collect()
+    start = time.perf_counter()
+    payload = encode()
+    seconds = time.perf_counter() - start
+    versus = f"   {baseline[0] / seconds:6.1f}x faster, {baseline[1] / len(payload):5.1f}x smaller" if baseline else ""
+    print(f"{rows:>9,} rows  {label:<9} {seconds * 1000:10.1f} ms  {len(payload) / 2**20:9.2f} MiB{versus}")
+    return seconds, len(payload)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000])
+    args = parser.parse_args()
+
+    provider = Flask(__name__).json
+    for rows in args.rows:
+        chunks = make_chunks(rows)
+        baseline = measure("json", lambda: encode_json(chunks, provider), rows)
+        measure("columnar", lambda: encode_columnar(chunks, COLUMNAR_MIMETYPE), rows, baseline)
+        measure("arrow", lambda: encode_columnar(chunks, ARROW_MIMETYPE), rows, baseline)
+        measure("parquet", lambda: encode_columnar(chunks, PARQUET_MIMETYPE), rows, baseline)
+        del chunks
@@ -0,0 +1,243 @@
+# benchmarks/bench_server_throughput.py
+
+"""
+⏱️ Server throughput benchmark: flask_api.py (threads) vs asgi_api.py (asyncio)
+Starts each server in a child process pinned to one CPU core, with the I/O
+replaced by fixed-latency fakes (LLM calls sleep --llm-ms, Postgres --db-ms,
+the schema vector search --vector-ms; embeddings are random vectors), then
+keeps --concurrency clients posting distinct questions to /query for
+--seconds. Reports requests/s, p50/p95 latency and requests per CPU-second
+of the server process (utime + stime from /proc), i.e. throughput per core.
+
+Run from backend/:  python benchmarks/bench_server_throughput.py [--concurrency 50 200] [--seconds 15]
+Against running servers (real LLM, Qdrant and Postgres):
+    python benchmarks/bench_server_throughput.py --flask-url http://host:5000 --asgi-url http://host:5001 --cores 1
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+FAKE_SQL = "SELECT customer_id, first_name FROM customers LIMIT 10"
+
+
+class FakeEncoder:
+    """Deterministic random unit vectors in place of the SentenceTransformer."""
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        vectors = [np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(384) for text in texts]
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def install_fakes(llm_ms: float, db_ms: float, vector_ms: float):
+    """Patch the I/O before the server module imports the nodes."""
+    import pandas as pd
+    import core.config_loader as config_loader
+    load_config = config_loader.load_config
+
+    def bench_config(*args, **kwargs):
+        config = load_config(*args, **kwargs)
+        config.setdefault("semantic_search", {})["backend"] = "numpy"  # no Qdrant server; latency faked below
+        config["llm_cache"] = {"enabled": False}
+        return config
+    config_loader.load_config = bench_config
+
+    import core.model_registry as model_registry
+    encoder = FakeEncoder()
+    model_registry.get_sentence_transformer = lambda model_name=None: encoder
+
+    def fake_response(prompt) -> str:
+        # The intent prompt is a message list, the SQL prompt a string
+        return "ask_question" if isinstance(prompt, list) else FAKE_SQL
+
+    def fake_invoke(llm, prompt, **options):
+        time.sleep(llm_ms / 1000)
+        return fake_response(prompt)
+
+    async def fake_ainvoke(llm, prompt, **options):
+        await asyncio.sleep(llm_ms / 1000)
+        return fake_response(prompt)
+
+    import core.llm_cache as llm_cache
+    llm_cache.cached_invoke = fake_invoke
+    llm_cache.cached_ainvoke = fake_ainvoke
+
+    def fake_result():
+        df = pd.DataFrame({"customer_id": range(10), "first_name": ["Asha"] * 10})
+        df.attrs["truncated"] = False
+        return df
+
+    def fake_run_query(sql):
+        time.sleep(db_ms / 1000)
+        return fake_result()
+
+    async def fake_arun_query(sql):
+        await asyncio.sleep(db_ms / 1000)
+        return fake_result()
+
+    import core.db_utils as db_utils
+    import core.async_db as async_db
+    db_utils.run_query = fake_run_query
+    async_db.arun_query = fake_arun_query
+
+    from core.vector_index import NumpyVectorIndex
+    search_batch = NumpyVectorIndex.search_batch
+
+    def slow_search_batch(self, vector, requests):
+        time.sleep(vector_ms / 1000)
+        return search_batch(self, vector, requests)
+
+    async def slow_asearch_batch(self, vector, requests):
+        await asyncio.sleep(vector_ms / 1000)
+        return search_batch(self, vector, requests)
+
+    NumpyVectorIndex.search_batch = slow_search_batch
+    NumpyVectorIndex.asearch_batch = slow_asearch_batch
+
+
+def serve(server: str, port: int, args):
+    import logging
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {args.cpu})
+    install_fakes(args.llm_ms, args.db_ms, args.vector_ms)
+    if server == "flask":
+        from flask_api import app
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        logging.getLogger().setLevel(logging.WARNING)
+        app.run(host="127.0.0.1", port=port, threaded=True)
+    else:
+        import uvicorn
+        from asgi_api import app
+        logging.getLogger().setLevel(logging.WARNING)
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def wait_until_healthy(url: str, timeout: float = 120):
+    import httpx
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{url}/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not become healthy within {timeout}s")
+
+
+async def load(url: str, concurrency: int, seconds: float) -> dict:
+    import httpx
+    latencies, errors = [], 0
+    counter = iter(range(10 ** 9))
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            # Distinct questions: no semantic-cache hits
+            question = f"List the first 10 customers, request {next(counter)}"
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/query", json={"user_input": question})
+                ok = response.status_code == 200 and response.json().get("execution_error") is None
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(limits=limits, timeout=300) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def report(label: str, concurrency: int, result: dict, cpu: float = None, cores: float = None):
+    per_core = (
+        f"{result['requests'] / cpu:8.1f} req/CPU-s" if cpu
+        else f"{result['rps'] / cores:8.1f} req/s/core" if cores else ""
+    )
+    print(f"{label:<6} c={concurrency:<4} {result['rps']:8.1f} req/s   p50 {result['p50_ms']:7.0f} ms   "
+          f"p95 {result['p95_ms']:7.0f} ms   errors {result['errors']:<4} {per_core}")
+
+
+def run_spawned(args):
+    print(f"Fake I/O: LLM {args.llm_ms} ms x2, Postgres {args.db_ms} ms, vector search {args.vector_ms} ms; "
+          f"each server pinned to CPU {args.cpu}, {args.seconds}s per run")
+    for server, port in (("flask", args.port), ("asgi", args.port + 1)):
+        child = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", server, "--port", str(port),
+             "--llm-ms", str(args.llm_ms), "--db-ms", str(args.db_ms),
+             "--vector-ms", str(args.vector_ms), "--cpu", str(args.cpu)],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            url = f"http://127.0.0.1:{port}"
+            asyncio.run(wait_until_healthy(url))
+            asyncio.run(load(url, min(args.concurrency), 2))  # warm-up
+            for concurrency in args.concurrency:
+                cpu_before = cpu_seconds(child.pid)
+                result = asyncio.run(load(url, concurrency, args.seconds))
+                report(server, concurrency, result, cpu=cpu_seconds(child.pid) - cpu_before)
+        finally:
+            child.terminate()
+            child.wait()
+
+
+def run_against(args):
+    for server, url in (("flask", args.flask_url), ("asgi", args.asgi_url)):
+        if not url:
+            continue
+        for concurrency in args.concurrency:
+            report(server, concurrency, asyncio.run(load(url.rstrip("/"), concurrency, args.seconds)),
+                   cores=args.cores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--llm-ms", type=float, default=600)
+    parser.add_argument("--db-ms", type=float, default=50)
+    parser.add_argument("--vector-ms", type=float, default=10)
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--cpu", type=int, default=0)
+    parser.add_argument("--flask-url")
+    parser.add_argument("--asgi-url")
+    parser.add_argument("--cores", type=float, default=None, help="server cores, with --flask-url / --asgi-url")
+    parser.add_argument("--serve", choices=["flask", "asgi"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args)
+    elif args.flask_url or args.asgi_url:
+        run_against(args)
+    else:
+        run_spawned(args)
@@ -0,0 +1,67 @@
+# benchmarks/bench_sql_guard.py
+
+"""
+⏱️ SQL guard microbenchmark
+Per-query cost of the AST read-only guard (core/sql_guard.py) on the SQL of
+the few-shot library, compared with the three keyword checks it replaced:
+
+- legacy:  intent substring check + sql_generator regex + run_query first token
+- cold:    guard_sql with an empty cache (one sqlglot parse per query)
+- cached:  guard_sql again for the same SQL, as the executor does after the validator
+
+Run from backend/:  python benchmarks/bench_sql_guard.py
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.fewshot_selector import load_fewshot
+from core.sql_guard import guard_sql, parse_sql, check_read_only
+
+ROUNDS = 20
+
+LEGACY_INTENT_WORDS = ["delete", "update", "remove", "insert", "drop", "alter", "truncate", "create", "grant", "revoke", "erase"]
+LEGACY_GENERATOR_WORDS = ['insert', 'update', 'delete', 'drop', 'alter', 'truncate']
+LEGACY_EXECUTOR_WORDS = ["insert", "update", "delete", "drop", "alter", "truncate", "create", "grant", "revoke"]
+
+
+def legacy_checks(question: str, sql: str) -> bool:
+    lowered = question.lower()
+    if any(word in lowered for word in LEGACY_INTENT_WORDS):
+        return False
+    normalized = sql.strip().lower()
+    if any(re.match(fr"^{kw}\b", normalized) for kw in LEGACY_GENERATOR_WORDS):
+        return False
+    return normalized.split()[0] not in LEGACY_EXECUTOR_WORDS
+
+
+def per_query_us(fn, queries, clear_cache: bool) -> float:
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        if clear_cache:
+            parse_sql.cache_clear()
+            guard_sql.cache_clear()
+        start = time.perf_counter()
+        for question, sql in queries:
+            fn(question, sql)
+        elapsed += time.perf_counter() - start
+    return elapsed * 1e6 / (ROUNDS * len(queries))
+
+
+if __name__ == "__main__":
+    examples = load_fewshot().examples
+    queries = [(ex["question"], ex["sql"]) for ex in examples if check_read_only(ex["sql"])[0]]
+    lengths = sorted(len(sql) for _, sql in queries)
+    print(f"{len(queries)} read-only few-shot queries, median {lengths[len(lengths) // 2]} chars, {ROUNDS} rounds")
+
+    results = [
+        ("legacy", per_query_us(legacy_checks, queries, clear_cache=False)),
+        ("cold", per_query_us(lambda q, sql: check_read_only(sql), queries, clear_cache=True)),
+        ("cached", per_query_us(lambda q, sql: check_read_only(sql), queries, clear_cache=False)),
+    ]
+    for label, us in results:
+        print(f"{label:<8} {us:10.1f} µs/query")
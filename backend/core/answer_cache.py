@@ -0,0 +1,222 @@
+# core/answer_cache.py
+
+"""
+✅ Semantic Answer Cache
+Maps question embeddings to SQL that already validated and executed. A new
+question whose cosine similarity to a cached one reaches the threshold reuses
+that SQL, skipping intent classification, schema retrieval and generation.
+
+- LRU order with a max_entries bound and a per-entry TTL
+- a hit also requires the same literals (numbers and quoted values) and the
+  same content words (everything but articles, pronouns and request verbs
+  such as "show"), so "top 5 customers" never reuses the SQL of "top 10
+  customers", nor "highest balance" that of "lowest balance": only
+  rephrasings with the same words in another order or wrapping hit
+- off by default: a hit answers without the LLM, so a wrong match returns a
+  confident wrong result (the response carries cache_hit: true)
+- the whole cache is dropped when the metadata store fingerprint changes,
+  i.e. when core/metadata_template.json is edited
+
+Configured from config["semantic_cache"]:
+    enabled, similarity_threshold, max_entries, ttl_seconds
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from core.config_loader import load_config
+
+config = load_config()
+
+LITERAL_PATTERN = re.compile(r"\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"")
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+# Words that change how a question is phrased, not what it asks for
+STOPWORDS = frozenset("""
+    a an the of to for and is are was were be been do does did what which who whose
+    show list give get find display tell return me my our us we i you please there all
+    this that these those it its their them can could would will
+""".split())
+
+
+def question_literals(question: str) -> tuple:
+    """Numbers and quoted values of a question; cached SQL is only reused when these match."""
+    return tuple(sorted(match.lower() for match in LITERAL_PATTERN.findall(question or "")))
+
+
+def _content_word(word: str) -> str:
+    # "customers" and "customer" ask for the same thing
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def content_words(question: str) -> frozenset:
+    """Words of a question other than STOPWORDS (plural s removed); cached SQL is only reused when these match."""
+    text = LITERAL_PATTERN.sub(" ", (question or "").lower())
+    return frozenset(_content_word(word) for word in WORD_PATTERN.findall(text) if word not in STOPWORDS)
+
+
+def question_signature(question: str) -> tuple:
+    """What must be equal, beyond embedding similarity, for two questions to share SQL."""
+    return question_literals(question), content_words(question)
+
+
+class CachedAnswer:
+    __slots__ = ("question", "signature", "vector", "sql", "created_at", "hits")
+
+    def __init__(self, question: str, vector, sql: str):
+        self.question = question
+        self.signature = question_signature(question)
+        self.vector = vector
+        self.sql = sql
+        self.created_at = time.monotonic()
+        self.hits = 0
+
+
+class SemanticAnswerCache:
+    """Thread-safe LRU of (question vector → SQL) with cosine-similarity lookup."""
+
+    def __init__(self, similarity_threshold: float = 0.93, max_entries: int = 500, ttl_seconds: float = 86400):
+        if max_entries < 1:
+            raise ValueError("❌ semantic_cache.max_entries must be at least 1")
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> CachedAnswer, least recently used first
+        self._next_key = 0
+        self._matrix = None            # stacked vectors of _entries, rebuilt after changes
+        self._keys = None
+        self._schema_key = None
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0,
+                       "expirations": 0, "invalidations": 0, "discards": 0}
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_schema(self, schema_key):
+        # Called with the lock held: a new schema fingerprint makes every entry stale
+        if schema_key != self._schema_key:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._matrix = None
+            self._schema_key = schema_key
+
+    def _expire(self):
+        if not self.ttl_seconds:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._stats["expirations"] += len(expired)
+            self._matrix = None
+
+    def _best_match(self, vector, signature):
+        if not self._entries:
+            return None, 0.0
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._entries[key].vector for key in self._keys])
+        scores = self._matrix @ vector
+        # Best-scoring entry whose literals and content words match the question
+        for i in np.argsort(-scores):
+            score = float(scores[i])
+            if score < self.similarity_threshold:
+                break
+            if self._entries[self._keys[i]].signature == signature:
+                return self._keys[i], score
+        return None, float(scores.max())
+
+    def lookup(self, question: str, vector, schema_key: str):
+        """Return (CachedAnswer, similarity) for a near-duplicate question, or (None, best similarity)."""
+        vector = self._normalize(vector)
+        with self._lock:
+            self._check_schema(schema_key)
+            self._expire()
+            key, score = self._best_match(vector, question_signature(question))
+            if key is None:
+                self._stats["misses"] += 1
+                return None, score
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self._stats["hits"] += 1
+            return entry, score
+
+    def store(self, question: str, vector, sql: str, schema_key: str):
+        """Remember SQL that validated and executed for question."""
+        vector = self._normalize(vector)
+        with self._lock:
+            self._check_schema(schema_key)
+            key, _ = self._best_match(vector, question_signature(question))
+            if key is not None:
+                # Near-duplicate already cached: refresh it instead of adding a second entry
+                del self._entries[key]
+            self._entries[self._next_key] = CachedAnswer(question, vector, sql)
+            self._next_key += 1
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._matrix = None
+
+    def discard(self, sql: str):
+        """Drop entries holding sql, e.g. after a cached query failed to validate or execute."""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry.sql == sql]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._stats["discards"] += len(stale)
+                self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                **self._stats,
+            }
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def answer_cache_enabled() -> bool:
+    return config.get("semantic_cache", {}).get("enabled", False)
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Return the process-wide answer cache, created from config["semantic_cache"] on first use."""
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _lock:
+        if _cache is None:
+            cache_config = config.get("semantic_cache", {})
+            _cache = SemanticAnswerCache(
+                similarity_threshold=cache_config.get("similarity_threshold", 0.93),
+                max_entries=cache_config.get("max_entries", 500),
+                ttl_seconds=cache_config.get("ttl_seconds", 86400),
+            )
+        return _cache
+
+
+def answer_cache_stats() -> dict:
+    """Cache metrics, or {} before the first lookup created the cache."""
+    return _cache.stats() if _cache is not None else {}
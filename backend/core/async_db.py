@@ -0,0 +1,219 @@
+# core/async_db.py
+
+"""
+✅ Async PostgreSQL Access (asyncpg)
+The ASGI server's counterpart of core/db_pool.py and core/db_utils.run_query:
+a process-wide asyncpg pool with the same session settings and the same row
+cap, so a question waiting on Postgres holds a coroutine instead of a thread.
+
+Configured from config["postgres"], sharing the psycopg2 pool keys:
+    pool.min_size, pool.max_size, pool.checkout_timeout (s)
+"""
+
+import asyncio
+import time
+import uuid
+import pandas as pd
+from core.config_loader import load_config
+from core.db_pool import PoolTimeout
+from core.db_utils import CursorClosed, ResultColumn, count_execution, ensure_read_only, to_dataframe
+
+config = load_config()
+db_config = config["postgres"]
+settings_config = config["settings"]
+
+_pool = None
+_pool_lock = asyncio.Lock()
+_stats = {"checkouts": 0, "timeouts": 0, "wait_seconds_total": 0.0}
+
+
+async def get_async_pool():
+    """Return the process-wide asyncpg pool, created on first use inside the server's event loop."""
+    global _pool
+    if _pool is not None:
+        return _pool
+    async with _pool_lock:
+        if _pool is None:
+            import asyncpg
+            pool_config = db_config.get("pool", {})
+            timeout = settings_config.get("max_query_timeout", 30)
+            _pool = await asyncpg.create_pool(
+                host=db_config["host"],
+                port=db_config["port"],
+                database=db_config["database"],
+                user=db_config["user"],
+                password=db_config["password"],
+                min_size=pool_config.get("min_size", 1),
+                max_size=pool_config.get("max_size", 10),
+                # ✅ Session settings applied once per connection, not per query
+                server_settings={
+                    "search_path": "public",
+                    "statement_timeout": str(int(timeout * 1000)),  # Convert to milliseconds
+                },
+            )
+        return _pool
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+async def fetch_limited_async(conn, sql_query: str, max_rows: int = None) -> (list, list, bool):
+    """
+    Async fetch_limited: a server-side cursor in a read-only transaction
+    fetches at most max_rows + 1 rows. Returns (columns, rows, truncated).
+    """
+    async with conn.transaction(readonly=True):
+        statement = await conn.prepare(sql_query)
+        columns = [attribute.name for attribute in statement.get_attributes()]
+        if max_rows:
+            cursor = await statement.cursor()
+            records = await cursor.fetch(max_rows + 1)
+        else:
+            records = await statement.fetch()
+    rows = [tuple(record) for record in records]
+
+    truncated = bool(max_rows) and len(rows) > max_rows
+    if truncated:
+        rows = rows[:max_rows]
+    return columns, rows, truncated
+
+
+async def arun_query(sql_query: str) -> pd.DataFrame:
+    """
+    Async run_query: same read-only guard, row cap and DataFrame (with
+    df.attrs["truncated"]) as core.db_utils.run_query.
+    """
+    ensure_read_only(sql_query)
+
+    try:
+        max_rows = settings_config.get("max_result_rows", 1000)
+        pool = await get_async_pool()
+        checkout_timeout = db_config.get("pool", {}).get("checkout_timeout", 30)
+        start = time.monotonic()
+        try:
+            conn = await pool.acquire(timeout=checkout_timeout)
+        except asyncio.TimeoutError:
+            _stats["timeouts"] += 1
+            raise PoolTimeout(f"❌ No database connection available within {checkout_timeout}s")
+        _stats["checkouts"] += 1
+        _stats["wait_seconds_total"] += time.monotonic() - start
+        try:
+            try:
+                columns, rows, truncated = await fetch_limited_async(conn, sql_query.strip().rstrip(";"), max_rows)
+            except Exception:
+                count_execution(failed=True)
+                raise
+            count_execution()
+        finally:
+            await pool.release(conn)
+
+        return to_dataframe(columns, rows, truncated, max_rows)
+
+    except Exception as e:
+        raise RuntimeError(f"❌ Query execution failed: {str(e)}")
+
+
+async def astream_rows(sql_query: str, chunk_size: int = None):
+    """Async stream_rows: yields the columns (ResultColumn), then lists of at most chunk_size rows."""
+    ensure_read_only(sql_query)
+    chunk_size = chunk_size or settings_config.get("stream_chunk_rows", 1000)
+    pool = await get_async_pool()
+    async with pool.acquire(timeout=db_config.get("pool", {}).get("checkout_timeout", 30)) as conn:
+        async with conn.transaction(readonly=True):
+            try:
+                statement = await conn.prepare(sql_query.strip().rstrip(";"))
+                cursor = await statement.cursor()
+                records = await cursor.fetch(chunk_size)
+            except Exception:
+                count_execution(failed=True)
+                raise
+            count_execution()
+            yield [ResultColumn(attribute.name, attribute.type.oid) for attribute in statement.get_attributes()]
+            while records:
+                yield [tuple(record) for record in records]
+                records = await cursor.fetch(chunk_size)
+
+
+async def afetch_result(sql_query: str, builder_class, max_rows: int = None):
+    """Async fetch_result: the cursor's chunks in a ResultBuilder, at most max_result_rows rows."""
+    max_rows = max_rows or settings_config.get("max_result_rows", 1000)
+    chunks = astream_rows(sql_query, min(settings_config.get("stream_chunk_rows", 1000), max_rows + 1))
+    try:
+        builder = builder_class(await chunks.__anext__(), max_rows)
+        async for rows in chunks:
+            if not builder.add(rows):
+                break
+    finally:
+        await chunks.aclose()
+    return builder
+
+
+class AsyncHeldCursor:
+    """Async HeldCursor: a SCROLL cursor on its own asyncpg connection; create with await AsyncHeldCursor.open(...)."""
+
+    def __init__(self, page_size: int):
+        self.page_size = page_size
+        self.columns = None
+        self._lock = asyncio.Lock()
+        self._pool = None
+        self._conn = None
+        self._transaction = None
+        self._fetch = None
+        self._name = f"paged_rows_{uuid.uuid4().hex}"
+
+    @classmethod
+    async def open(cls, sql_query: str, page_size: int, idle_timeout_ms: int):
+        ensure_read_only(sql_query)
+        self = cls(page_size)
+        self._pool = await get_async_pool()
+        self._conn = await self._pool.acquire(timeout=db_config.get("pool", {}).get("checkout_timeout", 30))
+        try:
+            self._transaction = self._conn.transaction(readonly=True)
+            await self._transaction.start()
+            # Postgres ends the transaction itself if the cursor is never closed (this transaction only)
+            await self._conn.execute(f"SET LOCAL idle_in_transaction_session_timeout = {int(idle_timeout_ms)}")
+            await self._conn.execute(f"DECLARE {self._name} SCROLL CURSOR FOR {sql_query.strip().rstrip(';')}")
+            self._fetch = await self._conn.prepare(f"FETCH FORWARD {page_size + 1} FROM {self._name}")
+        except Exception:
+            count_execution(failed=True)
+            await self.close()
+            raise
+        count_execution()
+        self.columns = [ResultColumn(attribute.name, attribute.type.oid) for attribute in self._fetch.get_attributes()]
+        return self
+
+    async def page(self, offset: int) -> list:
+        async with self._lock:
+            if self._conn is None:
+                raise CursorClosed()
+            await self._conn.execute(f"MOVE ABSOLUTE {int(offset)} IN {self._name}")
+            return [tuple(record) for record in await self._fetch.fetch()]
+
+    async def close(self):
+        async with self._lock:
+            if self._conn is None:
+                return
+            conn, self._conn = self._conn, None
+            try:
+                if self._transaction is not None:
+                    await self._transaction.rollback()
+            except Exception:
+                pass  # e.g. Postgres already ended the idle transaction; release() resets or drops the connection
+            await self._pool.release(conn)
+
+
+def async_pool_stats() -> dict:
+    """Pool metrics, or {} before the first query created the pool."""
+    if _pool is None:
+        return {}
+    return {
+        "size": _pool.get_size(),
+        "idle": _pool.get_idle_size(),
+        "in_use": _pool.get_size() - _pool.get_idle_size(),
+        "max_size": _pool.get_max_size(),
+        **_stats,
+    }
@@ -1,7 +1,10 @@
 # core/config_loader.py
 
+import os
 import yaml
 
-def load_config(config_path: str = "core/config.yaml") -> dict:
+def load_config(config_path: str = None) -> dict:
+    # TEXT2SQL_CONFIG points at another file, e.g. tests/config.yaml for the unit tests
+    config_path = config_path or os.environ.get("TEXT2SQL_CONFIG", "core/config.yaml")
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
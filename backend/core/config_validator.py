@@ -26,6 +26,13 @@ class ConfigValidator:
         self._validate_openai_config()
         self._validate_postgres_config()
         self._validate_embedding_config()
+        self._validate_semantic_search_config()
+        self._validate_semantic_cache_config()
+        self._validate_llm_cache_config()
+        self._validate_result_store_config()
+        self._validate_paging_config()
+        self._validate_intent_classifier_config()
+        self._validate_graph_config()
         self._validate_paths_config()
         self._validate_settings_config()
         self._validate_llm_config()
@@ -63,6 +70,15 @@ class ConfigValidator:
                     self.errors.append("❌ PostgreSQL port must be between 1 and 65535")
             except ValueError:
                 self.errors.append("❌ PostgreSQL port must be a valid integer")
+        
+        pool_config = postgres_config.get("pool", {})
+        for field in ["min_size", "max_size"]:
+            value = pool_config.get(field)
+            if value is not None and (not isinstance(value, int) or value < 0):
+                self.errors.append(f"❌ postgres.pool.{field} must be a non-negative integer")
+        if isinstance(pool_config.get("min_size"), int) and isinstance(pool_config.get("max_size"), int):
+            if pool_config["max_size"] < 1 or pool_config["min_size"] > pool_config["max_size"]:
+                self.errors.append("❌ postgres.pool requires 1 <= max_size and min_size <= max_size")
     
     def _validate_embedding_config(self):
         """Validate embedding configuration."""
@@ -74,6 +90,126 @@ class ConfigValidator:
         if not embedding_config.get("model"):
             self.errors.append("❌ Embedding model is required in config.yaml")
     
+    def _validate_semantic_search_config(self):
+        """Validate semantic search configuration."""
+        semantic_config = self.config.get("semantic_search", {})
+        
+        backend = semantic_config.get("backend", "qdrant")
+        if backend not in ["qdrant", "numpy"]:
+            self.errors.append("❌ semantic_search.backend must be one of: qdrant, numpy")
+        
+        fewshot_top_k = semantic_config.get("fewshot_top_k")
+        if fewshot_top_k is not None and (not isinstance(fewshot_top_k, int) or fewshot_top_k < 0):
+            self.errors.append("❌ semantic_search.fewshot_top_k must be a non-negative integer (0 = all examples)")
+    
+    def _validate_semantic_cache_config(self):
+        """Validate semantic answer cache configuration."""
+        cache_config = self.config.get("semantic_cache", {})
+        
+        if not isinstance(cache_config.get("enabled", False), bool):
+            self.errors.append("❌ semantic_cache.enabled must be true or false")
+        
+        threshold = cache_config.get("similarity_threshold", 0.93)
+        if not isinstance(threshold, (int, float)) or not (0 < threshold <= 1):
+            self.errors.append("❌ semantic_cache.similarity_threshold must be a number in (0, 1]")
+        
+        max_entries = cache_config.get("max_entries", 500)
+        if not isinstance(max_entries, int) or max_entries < 1:
+            self.errors.append("❌ semantic_cache.max_entries must be a positive integer")
+        
+        ttl_seconds = cache_config.get("ttl_seconds", 86400)
+        if not isinstance(ttl_seconds, (int, float)) or ttl_seconds < 0:
+            self.errors.append("❌ semantic_cache.ttl_seconds must be a non-negative number (0 = no expiry)")
+    
+    def _validate_llm_cache_config(self):
+        """Validate persistent LLM response cache configuration."""
+        cache_config = self.config.get("llm_cache", {})
+        
+        if not isinstance(cache_config.get("enabled", True), bool):
+            self.errors.append("❌ llm_cache.enabled must be true or false")
+        
+        if not isinstance(cache_config.get("path", "cache/llm_responses.sqlite3"), str):
+            self.errors.append("❌ llm_cache.path must be a file path")
+        
+        for field in ("max_entries", "max_megabytes"):
+            value = cache_config.get(field)
+            if value is not None and (not isinstance(value, (int, float)) or value < 0):
+                self.errors.append(f"❌ llm_cache.{field} must be a non-negative number (0 = unbounded)")
+    
+    def _validate_result_store_config(self):
+        """Validate server-side result store configuration."""
+        store_config = self.config.get("result_store", {})
+        
+        if not isinstance(store_config.get("enabled", True), bool):
+            self.errors.append("❌ result_store.enabled must be true or false")
+        
+        max_entries = store_config.get("max_entries", 100)
+        if not isinstance(max_entries, int) or max_entries < 1:
+            self.errors.append("❌ result_store.max_entries must be a positive integer")
+        
+        for field in ("max_megabytes", "max_spill_megabytes"):
+            value = store_config.get(field)
+            if value is not None and (not isinstance(value, (int, float)) or value < 0):
+                self.errors.append(f"❌ result_store.{field} must be a non-negative number (0 = unbounded)")
+        
+        ttl_seconds = store_config.get("ttl_seconds", 3600)
+        if not isinstance(ttl_seconds, (int, float)) or ttl_seconds < 0:
+            self.errors.append("❌ result_store.ttl_seconds must be a non-negative number (0 = no expiry)")
+        
+        spill_dir = store_config.get("spill_dir")
+        if spill_dir is not None and not isinstance(spill_dir, str):
+            self.errors.append("❌ result_store.spill_dir must be a directory path")
+    
+    def _validate_paging_config(self):
+        """Validate paged result (held cursor) configuration."""
+        paging_config = self.config.get("paging", {})
+        
+        for field, default in (("default_page_size", 100), ("max_page_size", 1000), ("max_open_cursors", 8)):
+            value = paging_config.get(field, default)
+            if not isinstance(value, int) or value < 1:
+                self.errors.append(f"❌ paging.{field} must be a positive integer")
+        
+        idle_seconds = paging_config.get("idle_seconds", 120)
+        if not isinstance(idle_seconds, (int, float)) or idle_seconds < 0:
+            self.errors.append("❌ paging.idle_seconds must be a non-negative number (0 = no idle timeout)")
+        
+        reopen_seconds = paging_config.get("reopen_seconds", 3600)
+        if not isinstance(reopen_seconds, (int, float)) or reopen_seconds < 0:
+            self.errors.append("❌ paging.reopen_seconds must be a non-negative number (0 = unknown paging ids are 404)")
+        
+        # Every open cursor holds a pooled connection
+        max_open = paging_config.get("max_open_cursors", 8)
+        pool_size = self.config.get("postgres", {}).get("pool", {}).get("max_size", 10)
+        if isinstance(max_open, int) and isinstance(pool_size, int) and max_open >= pool_size:
+            self.warnings.append("⚠️ paging.max_open_cursors should be below postgres.pool.max_size (each open cursor holds a connection)")
+    
+    def _validate_intent_classifier_config(self):
+        """Validate local intent classifier (kNN fast path) configuration."""
+        intent_config = self.config.get("intent_classifier", {})
+        
+        if not isinstance(intent_config.get("fast_path", True), bool):
+            self.errors.append("❌ intent_classifier.fast_path must be true or false")
+        
+        k = intent_config.get("k", 5)
+        if not isinstance(k, int) or k <= 0:
+            self.errors.append("❌ intent_classifier.k must be a positive integer")
+        
+        for field in ("min_similarity", "min_agreement"):
+            value = intent_config.get(field, 0.8)
+            if not isinstance(value, (int, float)) or not (0 <= value <= 1):
+                self.errors.append(f"❌ intent_classifier.{field} must be a number between 0 and 1")
+    
+    def _validate_graph_config(self):
+        """Validate graph execution (speculative parallel branches) configuration."""
+        graph_config = self.config.get("graph", {})
+        
+        for field in ("speculative_retrieval", "speculative_generation"):
+            if not isinstance(graph_config.get(field, False), bool):
+                self.errors.append(f"❌ graph.{field} must be true or false")
+        
+        if graph_config.get("speculative_generation") and not graph_config.get("speculative_retrieval", False):
+            self.warnings.append("⚠️ graph.speculative_generation has no effect without graph.speculative_retrieval")
+    
     def _validate_paths_config(self):
         """Validate paths configuration."""
         paths_config = self.config.get("paths", {})
@@ -99,10 +235,9 @@ class ConfigValidator:
         if not isinstance(threshold, (int, float)) or not (0 <= threshold <= 1):
             self.errors.append("❌ similarity_threshold must be a number between 0 and 1")
         
-        # Validate forbidden SQL keywords
-        forbidden_keywords = settings_config.get("forbidden_sql_keywords", [])
-        if not isinstance(forbidden_keywords, list) or len(forbidden_keywords) == 0:
-            self.errors.append("❌ forbidden_sql_keywords must be a non-empty list")
+        # Read-only enforcement is done by core/sql_guard.py on the parsed SQL
+        if "forbidden_sql_keywords" in settings_config:
+            self.warnings.append("⚠️ forbidden_sql_keywords is no longer used (read-only SQL is enforced by the AST guard)")
         
         # Validate column mappings
         column_mappings = settings_config.get("column_mappings", {})
@@ -123,6 +258,14 @@ class ConfigValidator:
         max_rows = settings_config.get("max_result_rows")
         if max_rows is not None and (not isinstance(max_rows, int) or max_rows <= 0):
             self.errors.append("❌ max_result_rows must be a positive integer")
+        
+        stream_chunk_rows = settings_config.get("stream_chunk_rows")
+        if stream_chunk_rows is not None and (not isinstance(stream_chunk_rows, int) or stream_chunk_rows <= 0):
+            self.errors.append("❌ stream_chunk_rows must be a positive integer")
+        
+        validate_with_explain = settings_config.get("validate_with_explain", False)
+        if not isinstance(validate_with_explain, bool):
+            self.errors.append("❌ validate_with_explain must be true or false")
     
     def _validate_llm_config(self):
         """Validate LLM configuration."""
@@ -138,6 +281,9 @@ class ConfigValidator:
         max_tokens = llm_config.get("max_tokens")
         if max_tokens is not None and (not isinstance(max_tokens, int) or max_tokens <= 0):
             self.errors.append("❌ LLM max_tokens must be a positive integer")
+        
+        if not isinstance(llm_config.get("combined_intent_sql", False), bool):
+            self.errors.append("❌ llm.combined_intent_sql must be true or false")
     
     def _validate_file_paths(self):
         """Validate that required files and directories exist."""
@@ -0,0 +1,216 @@
+# core/db_pool.py
+
+"""
+✅ PostgreSQL Connection Pool
+A bounded, thread-safe pool of psycopg2 connections. Session settings
+(autocommit, search_path, statement_timeout) are applied once when a
+connection is created, idle connections are health-checked on checkout, and
+pool metrics (in use, waits, creation rate) are exposed for monitoring.
+
+Configured from config["postgres"]["pool"]:
+    min_size, max_size, checkout_timeout (s), health_check_idle_seconds
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import psycopg2
+from core.config_loader import load_config
+
+config = load_config()
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no connection becomes available within checkout_timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, connect_kwargs: dict, session_statements=(), min_size: int = 1, max_size: int = 10,
+                 checkout_timeout: float = 30, health_check_idle_seconds: float = 30):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("❌ Connection pool requires 0 <= min_size <= max_size and max_size >= 1")
+        self.connect_kwargs = connect_kwargs
+        self.session_statements = tuple(session_statements)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_idle_seconds = health_check_idle_seconds
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, last_used monotonic time)
+        self._size = 0        # open connections, idle + in use
+        self._in_use = 0
+        self._created_at = deque(maxlen=1000)
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "failed_health_checks": 0,
+        }
+        for _ in range(min_size):
+            with self._cond:
+                self._size += 1
+            self._idle.append((self._create(), time.monotonic()))
+
+    def _create(self):
+        try:
+            conn = psycopg2.connect(**self.connect_kwargs)
+            conn.set_session(autocommit=True)
+            # ✅ Session settings applied once per connection, not per query
+            with conn.cursor() as cur:
+                for statement in self.session_statements:
+                    cur.execute(statement)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+            self._created_at.append(time.monotonic())
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats["closed"] += 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_idle_seconds:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def checkout(self):
+        """Borrow a connection, waiting up to checkout_timeout when the pool is exhausted."""
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            with self._cond:
+                waited_since = None
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"❌ No database connection available within {self.checkout_timeout}s")
+                    if waited_since is None:
+                        waited_since = time.monotonic()
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+                if waited_since is not None:
+                    self._stats["wait_seconds_total"] += time.monotonic() - waited_since
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    conn, last_used = None, None
+                    self._size += 1
+                self._in_use += 1
+                self._stats["checkouts"] += 1
+
+            if conn is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self._cond:
+                        self._in_use -= 1
+                    raise
+            if self._is_healthy(conn, last_used):
+                return conn
+            with self._cond:
+                self._in_use -= 1
+                self._stats["failed_health_checks"] += 1
+            self._close(conn)
+
+    def checkin(self, conn, discard: bool = False):
+        """Return a connection; broken or discarded connections are closed instead."""
+        with self._cond:
+            self._in_use -= 1
+        if discard or conn.closed:
+            self._close(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.checkin(conn, discard=discard)
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "created_last_minute": sum(1 for t in self._created_at if now - t <= 60),
+                **self._stats,
+            }
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._close(conn)
+
+
+_lock = threading.Lock()
+_pool = None
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, created from config["postgres"] on first use."""
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _lock:
+        if _pool is None:
+            db_config = config["postgres"]
+            pool_config = db_config.get("pool", {})
+            timeout = config["settings"].get("max_query_timeout", 30)
+            _pool = ConnectionPool(
+                connect_kwargs={
+                    "host": db_config["host"],
+                    "port": db_config["port"],
+                    "database": db_config["database"],
+                    "user": db_config["user"],
+                    "password": db_config["password"],
+                },
+                session_statements=(
+                    "SET search_path TO public",
+                    f"SET statement_timeout = {int(timeout * 1000)}",  # Convert to milliseconds
+                ),
+                min_size=pool_config.get("min_size", 1),
+                max_size=pool_config.get("max_size", 10),
+                checkout_timeout=pool_config.get("checkout_timeout", 30),
+                health_check_idle_seconds=pool_config.get("health_check_idle_seconds", 30),
+            )
+        return _pool
+
+
+def pool_stats() -> dict:
+    """Pool metrics, or {} before the first query created the pool."""
+    return _pool.stats() if _pool is not None else {}
@@ -1,59 +1,210 @@
 # core/db_utils.py
 
-import psycopg2
+import logging
+import threading
+import uuid
+from collections import namedtuple
 import pandas as pd
 from core.config_loader import load_config
+from core.db_pool import get_pool
+from core.sql_guard import check_read_only
 
 # Load DB config from config.yaml
 config = load_config()
 db_config = config["postgres"]
 settings_config = config["settings"]
+logger = logging.getLogger(__name__)
+
+# A streamed result column: name and Postgres type OID (core/result_formats.py maps it to Arrow)
+ResultColumn = namedtuple("ResultColumn", ["name", "type_oid"])
+
+# ✅ Process-wide count of queries sent to Postgres (one per question is expected)
+_stats_lock = threading.Lock()
+_query_stats = {"executions": 0, "failures": 0}
+
+def query_stats() -> dict:
+    with _stats_lock:
+        return dict(_query_stats)
+
+def count_execution(failed: bool = False):
+    with _stats_lock:
+        _query_stats["executions"] += 1
+        if failed:
+            _query_stats["failures"] += 1
+
+def begin_read_only(conn):
+    """
+    Start a read-only transaction on a pooled (autocommit) connection, as the
+    asyncpg paths do with transaction(readonly=True): Postgres rejects writes
+    even if SQL slipped past the AST guard. The caller rolls back.
+    """
+    # Named (server-side) cursors need a transaction; pooled connections are autocommit
+    conn.autocommit = False
+    with conn.cursor() as cur:
+        cur.execute("SET TRANSACTION READ ONLY")
+
+def fetch_limited(conn, sql_query: str, max_rows: int = None) -> (list, list, bool):
+    """
+    Execute sql_query on a server-side cursor and fetch at most max_rows + 1 rows,
+    so the database never ships more than the cap. Returns (columns, rows, truncated).
+    """
+    try:
+        begin_read_only(conn)
+        with conn.cursor(name=f"run_query_{uuid.uuid4().hex}") as cur:
+            cur.execute(sql_query)
+            if max_rows:
+                rows = cur.fetchmany(max_rows + 1)
+            else:
+                rows = cur.fetchall()
+            columns = [desc[0] for desc in cur.description] if cur.description else []
+    finally:
+        conn.rollback()  # read-only: nothing to commit, just close the transaction
+        conn.autocommit = True
+
+    truncated = bool(max_rows) and len(rows) > max_rows
+    if truncated:
+        rows = rows[:max_rows]
+    return columns, rows, truncated
+
+def stream_rows(sql_query: str, chunk_size: int = None):
+    """
+    Stream a SELECT from a server-side cursor without a row cap: yields the
+    columns (ResultColumn) first, then lists of at most chunk_size rows
+    (settings.stream_chunk_rows). The pooled connection and its transaction
+    are held until the generator is exhausted or closed, and only one chunk
+    is in memory at a time.
+    """
+    ensure_read_only(sql_query)
+    chunk_size = chunk_size or settings_config.get("stream_chunk_rows", 1000)
+
+    with get_pool().connection() as conn:
+        try:
+            begin_read_only(conn)
+            with conn.cursor(name=f"stream_rows_{uuid.uuid4().hex}") as cur:
+                try:
+                    cur.execute(sql_query.strip().rstrip(";"))
+                    rows = cur.fetchmany(chunk_size)  # a named cursor's description is set by the first fetch
+                except Exception:
+                    count_execution(failed=True)
+                    raise
+                count_execution()
+                yield [ResultColumn(desc.name, desc.type_code) for desc in cur.description or []]
+                while rows:
+                    yield rows
+                    rows = cur.fetchmany(chunk_size)
+        finally:
+            conn.rollback()  # also closes the cursor when the client went away mid-stream
+            conn.autocommit = True
+
+def fetch_result(sql_query: str, builder_class, max_rows: int = None):
+    """
+    Collect the server-side cursor's chunks into a core.result_formats
+    ResultBuilder (columnar JSON, Arrow), at most settings.max_result_rows rows.
+    """
+    max_rows = max_rows or settings_config.get("max_result_rows", 1000)
+    # One row over the cap in the first chunk is enough to detect truncation
+    chunks = stream_rows(sql_query, min(settings_config.get("stream_chunk_rows", 1000), max_rows + 1))
+    try:
+        builder = builder_class(next(chunks), max_rows)
+        for rows in chunks:
+            if not builder.add(rows):
+                break
+    finally:
+        chunks.close()
+    return builder
+
+class CursorClosed(Exception):
+    """The held cursor was closed (idle, evicted or DELETEd) while a page request was using it."""
+
+class HeldCursor:
+    """
+    A SCROLL cursor kept open on its own pooled connection for paging
+    (core/result_pages.py): page(offset) moves to any row offset and fetches
+    page_size + 1 rows, so only requested pages leave the server. close()
+    ends the transaction and returns the connection.
+    """
+
+    def __init__(self, sql_query: str, page_size: int, idle_timeout_ms: int):
+        ensure_read_only(sql_query)
+        self.page_size = page_size
+        self.columns = None
+        self._lock = threading.Lock()
+        self._pool = get_pool()
+        self._conn = self._pool.checkout()
+        self._cur = None
+        try:
+            begin_read_only(self._conn)
+            with self._conn.cursor() as cur:
+                # Postgres ends the transaction itself if the cursor is never closed (this transaction only)
+                cur.execute(f"SET LOCAL idle_in_transaction_session_timeout = {int(idle_timeout_ms)}")
+            self._cur = self._conn.cursor(name=f"paged_rows_{uuid.uuid4().hex}", scrollable=True)
+            self._cur.execute(sql_query.strip().rstrip(";"))
+        except Exception:
+            count_execution(failed=True)
+            self.close()
+            raise
+        count_execution()
+
+    def page(self, offset: int) -> list:
+        """Rows offset .. offset + page_size (one more when a later page exists)."""
+        with self._lock:
+            if self._conn is None:
+                raise CursorClosed()
+            self._cur.scroll(offset, mode="absolute")
+            rows = self._cur.fetchmany(self.page_size + 1)
+            if self.columns is None:
+                self.columns = [ResultColumn(desc.name, desc.type_code) for desc in self._cur.description or []]
+            return rows
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            conn, self._conn = self._conn, None
+            discard = False
+            try:
+                if self._cur is not None:
+                    self._cur.close()
+                conn.rollback()  # read-only: nothing to commit, just close the transaction
+                conn.autocommit = True
+            except Exception:
+                discard = True  # e.g. Postgres already ended the idle transaction
+            self._pool.checkin(conn, discard=discard)
+
+def ensure_read_only(sql_query: str):
+    # ✅ Same AST guard as the validator; the parse result is cached, so this is a lookup
+    allowed, error = check_read_only(sql_query)
+    if not allowed:
+        raise ValueError(f"❌ Only read-only queries are allowed. {error}")
+
+def to_dataframe(columns: list, rows: list, truncated: bool, max_rows: int = None) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    df.attrs["truncated"] = truncated
+    if truncated:
+        logger.warning(f"⚠️ Query returned more than {max_rows} rows (limited to {max_rows})")
+    return df
 
 def run_query(sql_query: str) -> pd.DataFrame:
     """
     Run a SQL SELECT query and return a pandas DataFrame.
+    At most settings.max_result_rows rows are fetched from the server;
+    df.attrs["truncated"] is True when the query had more rows than that.
     Raises exceptions for invalid queries or connection errors.
     """
-    # Get forbidden keywords from config
-    forbidden_starts = config["settings"]["forbidden_sql_keywords"]
-    sql_start = sql_query.strip().lower().split()[0]
-    if sql_start in forbidden_starts:
-        raise ValueError(f"❌ Only read-only queries are allowed. Forbidden keywords: {', '.join(forbidden_starts)}")
+    ensure_read_only(sql_query)
 
-    conn = None
     try:
-        # ✅ Use context manager for better error safety
-        conn = psycopg2.connect(
-            host=db_config["host"],
-            port=db_config["port"],
-            database=db_config["database"],
-            user=db_config["user"],
-            password=db_config["password"]
-        )
-
-        # ✅ Set query timeout from config
-        timeout = settings_config.get("max_query_timeout", 30)
-        conn.set_session(autocommit=True)
-        
-        # ✅ Use cursor to test query execution separately (optional but useful for debugging)
-        with conn.cursor() as cur:
-            cur.execute("SET search_path TO public")  # optional if needed
-            cur.execute(f"SET statement_timeout = {timeout * 1000}")  # Convert to milliseconds
-
-        # ✅ Read as DataFrame with row limit from config
         max_rows = settings_config.get("max_result_rows", 1000)
-        df = pd.read_sql_query(sql_query, conn)
-        
-        # Apply row limit if specified
-        if max_rows and len(df) > max_rows:
-            df = df.head(max_rows)
-            print(f"⚠️ Query returned {len(df)} rows (limited to {max_rows})")
+        # ✅ Borrow a pooled connection; session settings were applied when it was created
+        with get_pool().connection() as conn:
+            try:
+                columns, rows, truncated = fetch_limited(conn, sql_query.strip().rstrip(";"), max_rows)
+            except Exception:
+                count_execution(failed=True)
+                raise
+            count_execution()
 
-        return df
+        return to_dataframe(columns, rows, truncated, max_rows)
 
     except Exception as e:
         raise RuntimeError(f"❌ Query execution failed: {str(e)}")
-
-    finally:
-        if conn:
-            conn.close()
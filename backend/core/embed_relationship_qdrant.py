@@ -1,5 +1,6 @@
 import json
 from config_loader import load_config
+from schema_documents import relationship_documents, RELATIONSHIP_ID_OFFSET
 config = load_config()
 
 from sentence_transformers import SentenceTransformer
@@ -16,28 +17,13 @@ model = SentenceTransformer(config['sentence_transformer']['model'])
 client = QdrantClient(config['qdrant']['host'], port=config['qdrant']['port'])
 
 # Prepare data
-texts = []
-payloads = []
-for rel in relationships:
-    rel_text = (
-        f"Relationship: {rel['from_table']}.{rel['from_column']}  {rel['to_table']}.{rel['to_column']}. {rel.get('description', '')}"
-    )
-    texts.append(rel_text)
-    payload = {
-        "type": "relationship",
-        "from_table": rel["from_table"],
-        "from_column": rel["from_column"],
-        "to_table": rel["to_table"],
-        "to_column": rel["to_column"],
-        "description": rel.get("description", "")
-    }
-    payloads.append(payload)
+texts, payloads = relationship_documents(relationships)
 
 # Generate embeddings
 embeddings = model.encode(texts, convert_to_numpy=True)
 
 # Get a unique starting ID (e.g., 1_000_000 to avoid collision)
-start_id = 1_000_000
+start_id = RELATIONSHIP_ID_OFFSET
 points = [
     PointStruct(id=start_id + i, vector=embeddings[i], payload=payloads[i])
     for i in range(len(texts))
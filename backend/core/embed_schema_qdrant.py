@@ -1,5 +1,6 @@
-import json
 from config_loader import load_config
+from schema_documents import table_documents
+from metadata_store import MetadataStore
 config = load_config()
 
 from sentence_transformers import SentenceTransformer
@@ -15,32 +16,12 @@ client.recreate_collection(
 )
 
 # Load metadata
-with open("core/metadata_template.json", "r", encoding="utf-8") as f:
-    metadata = json.load(f)
+metadata = MetadataStore.from_file()
 
 model = SentenceTransformer(config['sentence_transformer']['model'])
 
 # Prepare data
-texts = []
-payloads = []
-for table in metadata:
-    table_text = f"Table: {table['table_name']}. {table.get('description', '')}"
-    texts.append(table_text)
-    payloads.append({"type": "table", "table_name": table["table_name"], "description": table.get("description", "")})
-    for col in table["columns"]:
-        col_text = f"Column: {col['name']} in table {table['table_name']}. {col.get('description', '')}"
-        texts.append(col_text)
-        payload = {
-            "type": "column",
-            "table_name": table["table_name"],
-            "column_name": col["name"],
-            "description": col.get("description", "")
-        }
-        if col.get("possible_values") is not None:
-            payload["possible_values"] = json.dumps(col["possible_values"])
-        if col.get("value_mappings") is not None:
-            payload["value_mappings"] = json.dumps(col["value_mappings"])
-        payloads.append(payload)
+texts, payloads = table_documents(metadata.tables)
 
 # Generate embeddings
 embeddings = model.encode(texts, convert_to_numpy=True)
@@ -0,0 +1,163 @@
+# core/fewshot_selector.py
+
+"""
+✅ Few-Shot Example Selector
+Embeds the FewShotPrompt questions once into an in-process index and picks the
+`semantic_search.fewshot_top_k` examples most similar to the user question, so
+each prompt carries a handful of examples instead of the whole library.
+Set fewshot_top_k to 0 to inject every example as before.
+
+The prompt module is executed and rendered once, then only re-loaded when the
+file's mtime changes, so examples can still be edited without a restart.
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+from core.config_loader import load_config
+from core.model_registry import get_sentence_transformer
+from core.retrieval_context import RetrievalContext, as_retrieval_context
+from core.vector_index import NumpyVectorIndex
+
+config = load_config()
+SEM_SEARCH = config['semantic_search']
+logger = logging.getLogger(__name__)
+
+EXAMPLE_SEPARATOR = "\n\n---\n\n"
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or encoding unavailable offline
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count with tiktoken when available, else the ~4 chars/token rule of thumb."""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+FEWSHOT_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'prompts', 'sql_generator_few_shot_prompts.py')
+)
+
+
+def load_fewshot():
+    """Load FewShotPrompt from prompts/sql_generator_few_shot_prompts.py. Raise error if missing."""
+    fewshot_path = FEWSHOT_PATH
+    if not os.path.exists(fewshot_path):
+        raise ImportError("FewShotPrompt file not found: prompts/sql_generator_few_shot_prompts.py is required.")
+    spec = importlib.util.spec_from_file_location("prompts.sql_generator_few_shot_prompts", fewshot_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "FewShotPrompt"):
+        raise ImportError("FewShotPrompt class not found in prompts/sql_generator_few_shot_prompts.py.")
+    return module.FewShotPrompt()
+
+
+def render_example(example: dict) -> str:
+    return f"Q: {example['question']}\nA: {example['sql']}"
+
+
+class FewShotSelection:
+    """Examples chosen for one request, with token counts for measuring the saving."""
+
+    __slots__ = ("block", "questions", "tokens", "library_tokens")
+
+    def __init__(self, block: str, questions: list, tokens: int, library_tokens: int):
+        self.block = block
+        self.questions = questions
+        self.tokens = tokens
+        self.library_tokens = library_tokens
+
+    def as_debug_info(self) -> dict:
+        return {
+            "fewshot_examples": len(self.questions),
+            "fewshot_tokens": self.tokens,
+            "fewshot_library_tokens": self.library_tokens,
+            "fewshot_tokens_saved": self.library_tokens - self.tokens,
+        }
+
+
+class FewShotLibrary:
+    """All few-shot examples, pre-rendered, with their question embeddings."""
+
+    def __init__(self, examples: list, model=None, previous: "FewShotLibrary" = None):
+        self.examples = list(examples)
+        self.rendered = [render_example(ex) for ex in self.examples]
+        self.full_block = EXAMPLE_SEPARATOR.join(self.rendered)
+        self.library_tokens = estimate_tokens(self.full_block)
+        self.vectors_by_question = {}
+        self.index = None
+        if self.examples:
+            questions = [ex['question'] for ex in self.examples]
+            # ✅ On reload, only questions that are new or edited are re-encoded
+            known = previous.vectors_by_question if previous is not None else {}
+            missing = [q for q in dict.fromkeys(questions) if q not in known]
+            if missing:
+                model = model or get_sentence_transformer()
+                known = dict(known)
+                known.update(zip(missing, model.encode(missing, convert_to_numpy=True)))
+            self.vectors_by_question = {q: known[q] for q in questions}
+            payloads = [{"type": "fewshot", "position": i} for i in range(len(self.examples))]
+            self.index = NumpyVectorIndex([known[q] for q in questions], payloads)
+        logger.info(f"Indexed {len(self.examples)} few-shot examples ({self.library_tokens} tokens in full)")
+
+    def select(self, query: "str | RetrievalContext", top_k: int = None) -> FewShotSelection:
+        top_k = SEM_SEARCH.get('fewshot_top_k', 5) if top_k is None else top_k
+        if top_k <= 0 or top_k >= len(self.examples) or self.index is None:
+            positions = list(range(len(self.examples)))
+        else:
+            ctx = as_retrieval_context(query)
+            hits = self.index.search(ctx.vector, top_k)
+            # Keep the library's original order so related examples stay grouped
+            positions = sorted(hit.payload["position"] for hit in hits)
+        block = EXAMPLE_SEPARATOR.join(self.rendered[i] for i in positions)
+        return FewShotSelection(
+            block=block,
+            questions=[self.examples[i]['question'] for i in positions],
+            tokens=estimate_tokens(block),
+            library_tokens=self.library_tokens,
+        )
+
+
+_lock = threading.Lock()
+_library = None
+_library_mtime = None
+
+
+def _fewshot_mtime():
+    try:
+        return os.stat(FEWSHOT_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_fewshot_library() -> FewShotLibrary:
+    """Return the process-wide few-shot library, rebuilt only when the prompt file changes."""
+    global _library, _library_mtime
+    mtime = _fewshot_mtime()
+    if _library is not None and mtime == _library_mtime:
+        return _library
+    with _lock:
+        if _library is None or mtime != _library_mtime:
+            few_shot = load_fewshot()
+            _library = FewShotLibrary(getattr(few_shot, 'examples', []), previous=_library)
+            _library_mtime = mtime
+        return _library
+
+
+def fewshot_library_current(library) -> bool:
+    """True when library is the one get_fewshot_library returns now (without loading a changed file)."""
+    return library is not None and library is _library and _fewshot_mtime() == _library_mtime
+
+
+def select_fewshot(query: "str | RetrievalContext") -> FewShotSelection:
+    """Pick the few-shot examples for a request; cached on its RetrievalContext."""
+    ctx = as_retrieval_context(query)
+    if ctx.fewshot is None:
+        ctx.fewshot = get_fewshot_library().select(ctx)
+    return ctx.fewshot
@@ -0,0 +1,163 @@
+# core/intent_index.py
+
+"""
+✅ Local Intent Classifier (embedding kNN)
+Labels a question greet / ask_question / fallback from its nearest labelled
+utterances, so clear-cut requests skip the LLM intent call. Labelled data:
+- the examples of the intent prompt (nodes/intent_classifier.py)
+- every few-shot question (ask_question, or fallback when its answer is a
+  refusal rather than read-only SQL)
+
+A label is only returned when the nearest neighbour is similar enough and
+the top-k neighbours agree; otherwise the caller asks the LLM.
+
+Configured from config["intent_classifier"]:
+    fast_path, k, min_similarity, min_agreement
+"""
+
+import logging
+import threading
+from collections import Counter
+from core.config_loader import load_config
+from core.fewshot_selector import fewshot_library_current, get_fewshot_library
+from core.model_registry import get_sentence_transformer
+from core.sql_guard import check_read_only
+from core.vector_index import NumpyVectorIndex
+
+config = load_config()
+logger = logging.getLogger(__name__)
+
+
+class IntentIndex:
+    """kNN over labelled utterance embeddings."""
+
+    def __init__(self, utterances: list, vectors, k: int = 5, min_similarity: float = 0.8,
+                 min_agreement: float = 0.8):
+        self.utterances = list(utterances)  # (text, label)
+        self.k = k
+        self.min_similarity = min_similarity
+        self.min_agreement = min_agreement
+        payloads = [{"type": label, "text": text} for text, label in self.utterances]
+        self.index = NumpyVectorIndex(vectors, payloads)
+
+    def __len__(self):
+        return len(self.utterances)
+
+    def classify(self, vector):
+        """Return (label or None when ambiguous, top similarity, agreement of the top-k)."""
+        hits = self.index.search(vector, self.k)
+        if not hits:
+            return None, 0.0, 0.0
+        # Similarity-weighted vote over the k nearest utterances
+        votes = Counter()
+        for hit in hits:
+            votes[hit.payload["type"]] += max(hit.score, 0.0)
+        label, weight = votes.most_common(1)[0]
+        total = sum(votes.values())
+        agreement = weight / total if total else 0.0
+        top_score = hits[0].score
+        confident = (
+            top_score >= self.min_similarity
+            and agreement >= self.min_agreement
+            and hits[0].payload["type"] == label
+        )
+        return (label if confident else None), top_score, agreement
+
+
+def labelled_utterances(prompt_examples: list, fewshot_examples: list) -> list:
+    utterances = list(prompt_examples)
+    for example in fewshot_examples:
+        read_only, _ = check_read_only(example.get("sql", ""))
+        utterances.append((example["question"], "ask_question" if read_only else "fallback"))
+    # Drop duplicate texts, keeping the first label
+    seen = set()
+    unique = []
+    for text, label in utterances:
+        if text not in seen:
+            seen.add(text)
+            unique.append((text, label))
+    return unique
+
+
+def build_intent_index(prompt_examples: list, model=None) -> IntentIndex:
+    """Embed the labelled utterances, reusing the few-shot library's question vectors."""
+    library = get_fewshot_library()
+    utterances = labelled_utterances(prompt_examples, library.examples)
+    missing = [text for text, _ in utterances if text not in library.vectors_by_question]
+    encoded = {}
+    if missing:
+        model = model or get_sentence_transformer()
+        encoded = dict(zip(missing, model.encode(missing, convert_to_numpy=True)))
+    vectors = [library.vectors_by_question.get(text, encoded.get(text)) for text, _ in utterances]
+    intent_config = config.get("intent_classifier", {})
+    index = IntentIndex(
+        utterances,
+        vectors,
+        k=intent_config.get("k", 5),
+        min_similarity=intent_config.get("min_similarity", 0.8),
+        min_agreement=intent_config.get("min_agreement", 0.8),
+    )
+    logger.info(f"Built intent index: {len(index)} labelled utterances")
+    counts = Counter(label for _, label in utterances)
+    for label, count in counts.items():
+        if count <= index.k:
+            logger.warning(f"Intent index has {count} '{label}' utterances for k={index.k}: "
+                           f"the fast path can rarely decide '{label}'")
+    return index
+
+
+_lock = threading.Lock()
+_index = None
+_index_library = None
+_stats_lock = threading.Lock()
+_stats = {"fast_path": 0, "llm": 0, "fast_path_seconds": 0.0, "llm_seconds": 0.0}
+
+
+def fast_path_enabled() -> bool:
+    return config.get("intent_classifier", {}).get("fast_path", True)
+
+
+def intent_index_ready() -> bool:
+    """True when get_intent_index would return without building (encoding) the index."""
+    return _index is not None and fewshot_library_current(_index_library)
+
+
+def get_intent_index(prompt_examples: list) -> IntentIndex:
+    """Return the process-wide intent index, rebuilt when the few-shot library reloads."""
+    global _index, _index_library
+    library = get_fewshot_library()
+    if _index is not None and _index_library is library:
+        return _index
+    with _lock:
+        if _index is None or _index_library is not library:
+            _index = build_intent_index(prompt_examples)
+            _index_library = library
+        return _index
+
+
+def record_intent_call(path: str, seconds: float):
+    """Count a classification answered by "fast_path" or "llm"."""
+    with _stats_lock:
+        _stats[path] += 1
+        _stats[f"{path}_seconds"] += seconds
+
+
+def intent_stats() -> dict:
+    """Fast-path rate and the LLM latency it saved, estimated from the mean LLM call."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["fast_path"] + stats["llm"]
+    mean_fast = stats["fast_path_seconds"] / stats["fast_path"] if stats["fast_path"] else 0.0
+    mean_llm = stats["llm_seconds"] / stats["llm"] if stats["llm"] else None
+    return {
+        "classifications": total,
+        "fast_path": stats["fast_path"],
+        "llm": stats["llm"],
+        "fast_path_rate": round(stats["fast_path"] / total, 4) if total else 0.0,
+        "mean_fast_path_ms": round(mean_fast * 1000, 3),
+        "mean_llm_ms": round(mean_llm * 1000, 1) if mean_llm is not None else None,
+        "latency_saved_seconds": (
+            round(stats["fast_path"] * (mean_llm - mean_fast), 3) if mean_llm is not None else None
+        ),
+    }
+
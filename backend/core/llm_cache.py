@@ -0,0 +1,230 @@
+# core/llm_cache.py
+
+"""
+✅ Persistent LLM Response Cache
+Exact-match cache for LLM calls whose prompt fully determines the answer
+(intent classification and SQL generation at temperature 0). Responses are
+stored in SQLite keyed on sha256(model, temperature, call options, prompt),
+so the cache survives restarts and is shared by every worker process on the
+host (WAL mode, one connection per thread). Least recently used rows are
+evicted once max_entries or max_megabytes is exceeded.
+
+Configured from config["llm_cache"]:
+    enabled, path (relative to backend/), max_entries, max_megabytes
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from core.config_loader import load_config
+
+config = load_config()
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+EVICTION_INTERVAL = 50  # check the size bounds every N writes per process
+
+
+def _prompt_payload(prompt):
+    """JSON-serializable form of a string prompt or a list of chat messages."""
+    if isinstance(prompt, str):
+        return prompt
+    return [[getattr(message, "type", type(message).__name__), getattr(message, "content", str(message))]
+            for message in prompt]
+
+
+def cache_key(model: str, temperature, prompt, **options) -> str:
+    payload = json.dumps([model, temperature, sorted(options.items()), _prompt_payload(prompt)],
+                         ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, path: str, max_entries: int = 10000, max_megabytes: float = 100):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = int(max_megabytes * 1024 * 1024) if max_megabytes else None
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def get(self, key: str):
+        """Cached response text for key, or None."""
+        try:
+            with self._connection() as conn:
+                row = conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+        self._count("hits" if row is not None else "misses")
+        return row[0] if row is not None else None
+
+    def put(self, key: str, model: str, content: str):
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, content, size, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, content, len(content.encode("utf-8")), now, now),
+                )
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.warning(f"LLM cache write failed: {e}")
+            return
+        self._count("stores")
+        with self._stats_lock:
+            self._writes += 1
+            due = self._writes % EVICTION_INTERVAL == 1
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used rows beyond max_entries / max_megabytes."""
+        try:
+            with self._connection() as conn:
+                deleted = 0
+                if self.max_entries:
+                    deleted += conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    ).rowcount
+                if self.max_bytes:
+                    deleted += conn.execute(
+                        "DELETE FROM responses WHERE key IN (SELECT key FROM "
+                        "(SELECT key, SUM(size) OVER (ORDER BY last_used DESC) AS running FROM responses) "
+                        "WHERE running > ?)",
+                        (self.max_bytes,),
+                    ).rowcount
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.warning(f"LLM cache eviction failed: {e}")
+            return
+        if deleted:
+            self._count("evictions", deleted)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        try:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            stats.update({"entries": entries, "bytes": size})
+        except sqlite3.Error:
+            pass
+        return stats
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_llm_cache():
+    """Return the process-wide response cache, or None when llm_cache.enabled is false."""
+    global _cache
+    cache_config = config.get("llm_cache", {})
+    if not cache_config.get("enabled", True):
+        return None
+    if _cache is not None:
+        return _cache
+    with _lock:
+        if _cache is None:
+            path = cache_config.get("path", "cache/llm_responses.sqlite3")
+            _cache = LLMResponseCache(
+                path=path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path),
+                max_entries=cache_config.get("max_entries", 10000),
+                max_megabytes=cache_config.get("max_megabytes", 100),
+            )
+        return _cache
+
+
+def _model_name(llm) -> str:
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+def cached_invoke(llm, prompt, **options) -> str:
+    """
+    llm.invoke(prompt, **options) and return the response text, answered from
+    the persistent cache when the same model, temperature, options and prompt
+    were seen before. Exceptions and empty responses are never cached.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        response = llm.invoke(prompt, **options)
+        return getattr(response, "content", str(response))
+
+    model = _model_name(llm)
+    key = cache_key(model, getattr(llm, "temperature", None), prompt, **options)
+    content = cache.get(key)
+    if content is not None:
+        return content
+    response = llm.invoke(prompt, **options)
+    content = getattr(response, "content", str(response))
+    if content:
+        cache.put(key, model, content)
+    return content
+
+
+async def cached_ainvoke(llm, prompt, **options) -> str:
+    """
+    Async cached_invoke for the ASGI server: the LLM round trip is awaited.
+    The SQLite lookup and write stay synchronous; they are local and take
+    well under a millisecond, far less than a thread hop would cost.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        response = await llm.ainvoke(prompt, **options)
+        return getattr(response, "content", str(response))
+
+    model = _model_name(llm)
+    key = cache_key(model, getattr(llm, "temperature", None), prompt, **options)
+    content = cache.get(key)
+    if content is not None:
+        return content
+    response = await llm.ainvoke(prompt, **options)
+    content = getattr(response, "content", str(response))
+    if content:
+        cache.put(key, model, content)
+    return content
+
+
+def llm_cache_stats() -> dict:
+    """Cache metrics, or {} before the first LLM call created the cache."""
+    return _cache.stats() if _cache is not None else {}
@@ -0,0 +1,151 @@
+# core/metadata_store.py
+
+"""
+✅ Schema Metadata Store
+Parses core/metadata_template.json once into immutable, compact records with
+dict indexes by table and by (table, column), and pre-renders the context
+lines used in prompts. Every node shares the same store; it is rebuilt only
+when the file's mtime changes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+METADATA_PATH = os.path.join(os.path.dirname(__file__), 'metadata_template.json')
+
+
+class ColumnRecord(NamedTuple):
+    table_name: str
+    name: str
+    type: str
+    description: str
+    possible_values: Optional[list]
+    value_mappings: Optional[dict]
+    context_line: str  # "  Column: name (TYPE) - description | Possible values: ..."
+
+
+class TableRecord(NamedTuple):
+    name: str
+    description: str
+    columns: Tuple[ColumnRecord, ...]
+    header_line: str    # "Table: name - description"
+    context_block: str  # header_line followed by every column's context_line
+
+
+def render_column_line(col: dict) -> str:
+    col_line = f"  Column: {col['name']} ({col['type']}) - {col.get('description','')}"
+    if col.get('possible_values'):
+        col_line += f" | Possible values: {col['possible_values']}"
+    if col.get('value_mappings'):
+        col_line += f" | Value mappings: {col['value_mappings']}"
+    return col_line
+
+
+class MetadataStore:
+    """Read-only view of the schema metadata with O(1) table and column lookups."""
+
+    __slots__ = ("tables", "by_table", "by_column", "schema_description", "fingerprint")
+
+    def __init__(self, metadata: list, fingerprint: str = ""):
+        tables = []
+        for table in metadata:
+            table_name = table["table_name"]
+            columns = tuple(
+                ColumnRecord(
+                    table_name=table_name,
+                    name=col["name"],
+                    type=col["type"],
+                    description=col.get("description", ""),
+                    possible_values=col.get("possible_values"),
+                    value_mappings=col.get("value_mappings"),
+                    context_line=render_column_line(col),
+                )
+                for col in table["columns"]
+            )
+            header_line = f"Table: {table_name} - {table.get('description', '')}"
+            tables.append(TableRecord(
+                name=table_name,
+                description=table.get("description", ""),
+                columns=columns,
+                header_line=header_line,
+                context_block='\n'.join([header_line] + [col.context_line for col in columns]),
+            ))
+        self.tables = tuple(tables)
+        self.by_table = {table.name: table for table in self.tables}
+        self.by_column = {(col.table_name, col.name): col for table in self.tables for col in table.columns}
+        self.schema_description = '\n'.join(table.context_block for table in self.tables)
+        self.fingerprint = fingerprint
+
+    def get_table(self, table_name: str) -> Optional[TableRecord]:
+        return self.by_table.get(table_name)
+
+    def get_column(self, table_name: str, column_name: str) -> Optional[ColumnRecord]:
+        return self.by_column.get((table_name, column_name))
+
+    def get_table_columns(self, table_name: str) -> Tuple[ColumnRecord, ...]:
+        table = self.by_table.get(table_name)
+        return table.columns if table else ()
+
+    @classmethod
+    def from_file(cls, path: str = METADATA_PATH) -> "MetadataStore":
+        with open(path, "rb") as f:
+            raw = f.read()
+        return cls(json.loads(raw.decode("utf-8")), fingerprint=hashlib.sha1(raw).hexdigest())
+
+
+class StaleSchemaKey(LookupError):
+    """A schema_key that matches neither the current metadata nor a recently replaced version."""
+
+
+RETAINED_VERSIONS = 4  # replaced stores kept, so requests in flight across a reload resolve their own schema_key
+
+_lock = threading.Lock()
+_store = None
+_store_mtime = None
+_previous = {}  # fingerprint -> replaced MetadataStore, oldest first
+
+
+def _metadata_mtime():
+    try:
+        return os.stat(METADATA_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_metadata_store() -> MetadataStore:
+    """Return the process-wide metadata store, rebuilt only when the file changes."""
+    global _store, _store_mtime
+    mtime = _metadata_mtime()
+    if _store is not None and mtime == _store_mtime:
+        return _store
+    with _lock:
+        if _store is None or mtime != _store_mtime:
+            if _store is not None:
+                _previous.pop(_store.fingerprint, None)
+                _previous[_store.fingerprint] = _store
+                while len(_previous) > RETAINED_VERSIONS:
+                    del _previous[next(iter(_previous))]
+            _store = MetadataStore.from_file()
+            _store_mtime = mtime
+        return _store
+
+
+def resolve_schema_description(schema_key: Optional[str]) -> Optional[str]:
+    """
+    Schema text for a state's schema_key (None when the schema was never
+    initialized): the current metadata (reloaded if the file changed) or a
+    recently replaced version with that fingerprint. Raises StaleSchemaKey
+    for any other key.
+    """
+    if not schema_key:
+        return None
+    store = get_metadata_store()
+    if store.fingerprint == schema_key:
+        return store.schema_description
+    previous = _previous.get(schema_key)
+    if previous is None:
+        raise StaleSchemaKey(f"❌ schema_key {schema_key} does not match the metadata (now {store.fingerprint})")
+    return previous.schema_description
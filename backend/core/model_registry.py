@@ -0,0 +1,91 @@
+# core/model_registry.py
+
+"""
+✅ Shared Model Registry
+Loads each SentenceTransformer and the Qdrant clients (sync, and async for
+the ASGI server) once per process, on first use, and hands the same
+instance to every caller.
+"""
+
+import logging
+import threading
+import time
+from core.config_loader import load_config
+
+config = load_config()
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_models = {}        # model name -> SentenceTransformer
+_model_stats = {}   # model name -> {"bytes": int, "load_seconds": float}
+_clients = {}       # (host, port) -> QdrantClient
+_async_clients = {} # (host, port) -> AsyncQdrantClient
+
+
+def _model_size_bytes(model) -> int:
+    """Bytes held by the model's parameters and buffers."""
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def get_sentence_transformer(model_name: str = None):
+    """Return the process-wide SentenceTransformer for model_name (config default)."""
+    model_name = model_name or config['sentence_transformer']['model']
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+    with _lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            start = time.perf_counter()
+            model = SentenceTransformer(model_name)
+            _model_stats[model_name] = {
+                "bytes": _model_size_bytes(model),
+                "load_seconds": round(time.perf_counter() - start, 3),
+            }
+            _models[model_name] = model
+            logger.info(
+                f"Loaded SentenceTransformer '{model_name}' "
+                f"({_model_stats[model_name]['bytes'] / 2**20:.1f} MiB, "
+                f"{_model_stats[model_name]['load_seconds']}s)"
+            )
+        return _models[model_name]
+
+
+def get_qdrant_client(host: str = None, port: int = None):
+    """Return the process-wide QdrantClient for host/port (config default)."""
+    key = (host or config['qdrant']['host'], port or config['qdrant']['port'])
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        if key not in _clients:
+            from qdrant_client import QdrantClient
+            _clients[key] = QdrantClient(key[0], port=key[1])
+        return _clients[key]
+
+
+def get_async_qdrant_client(host: str = None, port: int = None):
+    """Return the process-wide AsyncQdrantClient for host/port (config default)."""
+    key = (host or config['qdrant']['host'], port or config['qdrant']['port'])
+    client = _async_clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        if key not in _async_clients:
+            from qdrant_client import AsyncQdrantClient
+            _async_clients[key] = AsyncQdrantClient(key[0], port=key[1])
+        return _async_clients[key]
+
+
+def registry_stats() -> dict:
+    """Memory footprint of everything loaded so far, for container sizing."""
+    models = {name: dict(stats) for name, stats in _model_stats.items()}
+    return {
+        "models": models,
+        "model_bytes_total": sum(stats["bytes"] for stats in models.values()),
+        "qdrant_clients": [f"{host}:{port}" for host, port in _clients],
+        "async_qdrant_clients": [f"{host}:{port}" for host, port in _async_clients],
+    }
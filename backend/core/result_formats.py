@@ -0,0 +1,251 @@
+# core/result_formats.py
+
+"""
+✅ Columnar Result Formats (columnar JSON, Arrow IPC, Parquet)
+/query answers with columnar JSON, an Arrow IPC stream or Parquet bytes when
+the client asks for them (Accept header or ?format=); row-oriented JSON
+stays the default.
+
+The response is built from the server-side cursor's fetched chunks, with no
+DataFrame or per-row dicts in between:
+- columnar JSON: the /query body with query_result as
+  {"columns": [{"name", "type"}], "data": [one array per column]}
+- Arrow / Parquet: every chunk becomes one RecordBatch typed from the
+  Postgres column OIDs; the /query body (SQL, intent, column metadata)
+  travels as schema metadata under b"query_response".
+
+Values are converted by the same rules in every format: json_default (the
+/query/rows NDJSON rules) for what JSON cannot encode, and for Arrow, which
+needs one type per column, json/jsonb and arrays as JSON text.
+
+pyarrow and orjson are optional: without pyarrow only JSON is offered,
+without orjson the JSON is encoded by the json module.
+"""
+
+import io
+import json
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_MIMETYPE = "application/json"
+COLUMNAR_MIMETYPE = "application/vnd.text2sql.columnar+json"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MIMETYPE = "application/vnd.apache.parquet"
+FORMATS = {"json": JSON_MIMETYPE, "columnar": COLUMNAR_MIMETYPE, "arrow": ARROW_MIMETYPE, "parquet": PARQUET_MIMETYPE}
+ARROW_FORMATS = (ARROW_MIMETYPE, PARQUET_MIMETYPE)
+METADATA_KEY = b"query_response"
+
+# Postgres type OID -> Arrow type name; anything else is sent as text
+PG_ARROW_TYPES = {
+    16: "bool",
+    20: "int64", 21: "int16", 23: "int32", 26: "int64",
+    700: "float32", 701: "float64",
+    1700: "float64",  # numeric: float, as in the JSON path (DataFrame coerce_float)
+    1186: "float64",  # interval: seconds, as json_default
+    1082: "date32",
+    1083: "time64",
+    1114: "timestamp",
+    1184: "timestamptz",
+    19: "string", 25: "string", 1042: "string", 1043: "string",
+}
+
+
+def json_default(value):
+    """Row values psycopg2 / asyncpg / numpy return that JSON cannot encode natively."""
+    if isinstance(value, Decimal):
+        return float(value)  # as in /query, where the DataFrame coerces decimals to float
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def json_text(value) -> str:
+    """A value of a column Arrow stores as text: JSON for json/jsonb and arrays, else json_default."""
+    if isinstance(value, (dict, list, tuple)):
+        return dumps(value).decode("utf-8")
+    value = json_default(value)
+    return value if isinstance(value, str) else str(value)
+
+
+def dumps(value) -> bytes:
+    """UTF-8 JSON; orjson encodes datetimes, UUIDs and numpy arrays itself and calls json_default for the rest."""
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=json_default, ensure_ascii=False).encode("utf-8")
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def negotiate_format(format_param: str = None, accept: str = None):
+    """
+    Response mimetype for ?format= (wins) or the Accept header, JSON by
+    default. Returns None for an unknown or unavailable format (406).
+    """
+    if format_param:
+        mimetype = FORMATS.get(format_param.strip().lower())
+    else:
+        mimetype = JSON_MIMETYPE
+        offered = []
+        for part in (accept or "").split(","):
+            media_range, _, params = part.strip().partition(";")
+            quality = 1.0
+            for param in params.split(";"):
+                key, _, value = param.strip().partition("=")
+                if key == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if media_range in (COLUMNAR_MIMETYPE, *ARROW_FORMATS) and quality > 0:
+                offered.append((quality, media_range))
+        if offered:
+            mimetype = max(offered, key=lambda item: item[0])[1]  # first of the highest quality
+    if mimetype in ARROW_FORMATS and not pyarrow_available():
+        return None
+    return mimetype
+
+
+def column_type(type_oid) -> str:
+    """Arrow type name for a Postgres type OID; the type header of columnar JSON."""
+    return PG_ARROW_TYPES.get(type_oid, "string")
+
+
+def _arrow_type(pa, type_oid):
+    name = column_type(type_oid)
+    if name == "time64":
+        return pa.time64("us")
+    if name == "timestamp":
+        return pa.timestamp("us")
+    if name == "timestamptz":
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, name)()
+
+
+class ResultBuilder(ABC):
+    """Collects fetched row chunks, up to max_rows; subclasses store and encode them."""
+
+    def __init__(self, columns: list, max_rows: int = None):
+        self.columns = columns
+        self.converters = [self._converter(column.type_oid) for column in columns]
+        self.max_rows = max_rows
+        self.row_count = 0
+        self.truncated = False
+
+    def add(self, rows: list) -> bool:
+        """Append a chunk; False once max_rows is reached and no more rows are wanted."""
+        if self.max_rows:
+            remaining = self.max_rows - self.row_count
+            if len(rows) > remaining:
+                self.truncated = True
+                rows = rows[:remaining]
+        if rows:
+            self._append([
+                values if convert is None else [None if value is None else convert(value) for value in values]
+                for convert, values in zip(self.converters, zip(*rows))
+            ])
+            self.row_count += len(rows)
+        return not self.truncated
+
+    def _converter(self, type_oid):
+        """Function applied to a column's non-null values before _append, or None to keep them."""
+        return None
+
+    @abstractmethod
+    def _append(self, column_values: list):
+        """Store one chunk, given as one list of values per column."""
+
+    @abstractmethod
+    def encode(self, mimetype: str, body: dict) -> bytes:
+        """The response payload: body with the collected rows as query_result."""
+
+
+class ColumnarResultBuilder(ResultBuilder):
+    """Columnar JSON: one list per column, encoded once with dumps() (values as in /query/rows)."""
+
+    def __init__(self, columns: list, max_rows: int = None):
+        super().__init__(columns, max_rows)
+        self.data = [[] for _ in columns]
+
+    def _append(self, column_values: list):
+        for data, values in zip(self.data, column_values):
+            data.extend(values)
+
+    def encode(self, mimetype: str, body: dict) -> bytes:
+        return dumps({**body, "query_result": {
+            "columns": [{"name": column.name, "type": column_type(column.type_oid)} for column in self.columns],
+            "data": self.data,
+        }})
+
+
+class ArrowResultBuilder(ResultBuilder):
+    """Collects fetched row chunks as RecordBatches."""
+
+    def __init__(self, columns: list, max_rows: int = None):
+        import pyarrow as pa
+        super().__init__(columns, max_rows)
+        self.pa = pa
+        self.schema = pa.schema([pa.field(column.name, _arrow_type(pa, column.type_oid)) for column in columns])
+        self.batches = []
+
+    def _converter(self, type_oid):
+        if type_oid in (1700, 1186):
+            return json_default  # Decimal -> float, timedelta -> seconds
+        if type_oid not in PG_ARROW_TYPES:
+            return json_text
+        return None
+
+    def _append(self, column_values: list):
+        arrays = [self.pa.array(values, type=field.type) for field, values in zip(self.schema, column_values)]
+        self.batches.append(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def _schema(self, metadata: bytes):
+        return self.schema.with_metadata({METADATA_KEY: metadata}) if metadata else self.schema
+
+    def to_arrow_ipc(self, metadata: bytes = None) -> bytes:
+        sink = self.pa.BufferOutputStream()
+        schema = self._schema(metadata)
+        with self.pa.ipc.new_stream(sink, schema) as writer:
+            for batch in self.batches:
+                writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    def to_parquet(self, metadata: bytes = None) -> bytes:
+        import pyarrow.parquet as pq
+        sink = io.BytesIO()
+        table = self.pa.Table.from_batches(self.batches, schema=self.schema).replace_schema_metadata(
+            self._schema(metadata).metadata
+        )
+        pq.write_table(table, sink)
+        return sink.getvalue()
+
+    def encode(self, mimetype: str, body: dict) -> bytes:
+        metadata = dumps(body)
+        if mimetype == PARQUET_MIMETYPE:
+            return self.to_parquet(metadata)
+        return self.to_arrow_ipc(metadata)
+
+
+def result_builder(mimetype: str):
+    """The ResultBuilder class for a negotiated non-JSON mimetype."""
+    return ColumnarResultBuilder if mimetype == COLUMNAR_MIMETYPE else ArrowResultBuilder
@@ -0,0 +1,390 @@
+# core/result_pages.py
+
+"""
+✅ Paged Results (held server-side cursors)
+/query with a page_size answers with the first page and, when more rows
+exist, a paging id; GET /results/<id>?cursor= returns the later pages.
+
+Each paged result keeps a SCROLL cursor open in a read-only transaction on
+its own pooled connection (core.db_utils.HeldCursor, or
+core.async_db.AsyncHeldCursor under the ASGI server). A cursor token is the
+row offset of a page, so any page can be read again while the cursor is open
+(retries, "previous"), and rows after the last requested page are never
+fetched. There is no max_result_rows cap.
+
+- a result whose first page is complete holds no cursor
+- cursors idle for idle_seconds are closed on the next paging call, and the
+  least recently used one is closed when max_open_cursors are open; Postgres
+  ends a forgotten transaction itself after twice idle_seconds
+- cursors belong to one worker process, but the SQL and page size of every
+  paging id are kept in SQLite (path, shared by the workers on the host like
+  core/llm_cache.py) for reopen_seconds after last use. A worker that does not
+  hold the cursor (another worker's, or one closed when idle or evicted) runs
+  the query again on a new cursor, so rows changed in between can shift pages
+
+Configured from config["paging"]:
+    default_page_size, max_page_size, idle_seconds, max_open_cursors,
+    reopen_seconds (0 = unknown ids are 404), path (relative to backend/)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from core.config_loader import load_config
+
+config = load_config()
+paging_config = config.get("paging", {})
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+class PageCursorRegistry:
+    """Thread-safe LRU of open cursors by paging id; returns the ones to close instead of closing them."""
+
+    def __init__(self, idle_seconds: float = 120, max_open: int = 8):
+        if max_open < 1:
+            raise ValueError("❌ paging.max_open_cursors must be at least 1")
+        self.idle_seconds = idle_seconds
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._cursors = OrderedDict()  # paging id -> (cursor, last used), least recently used first
+        self._stats = {"opened": 0, "reopened": 0, "pages": 0, "closed": 0, "expired": 0, "evicted": 0, "misses": 0}
+
+    def _reap(self) -> list:
+        # Called with the lock held
+        stale = []
+        if self.idle_seconds:
+            cutoff = time.monotonic() - self.idle_seconds
+            while self._cursors and next(iter(self._cursors.values()))[1] < cutoff:
+                stale.append(self._cursors.popitem(last=False)[1][0])
+                self._stats["expired"] += 1
+        return stale
+
+    def add(self, cursor, paging_id: str = None) -> (str, list):
+        """Register an open cursor, new or reopened under paging_id. Returns (paging id, cursors to close)."""
+        reopened = paging_id is not None
+        paging_id = paging_id or uuid.uuid4().hex
+        with self._lock:
+            stale = self._reap()
+            replaced = self._cursors.pop(paging_id, None)  # two requests reopened the same id
+            if replaced is not None:
+                stale.append(replaced[0])
+            while len(self._cursors) >= self.max_open:
+                stale.append(self._cursors.popitem(last=False)[1][0])
+                self._stats["evicted"] += 1
+            self._cursors[paging_id] = (cursor, time.monotonic())
+            self._stats["reopened" if reopened else "opened"] += 1
+        return paging_id, stale
+
+    def get(self, paging_id: str) -> (object, list):
+        """The cursor for paging_id (None when unknown or expired), and cursors to close."""
+        with self._lock:
+            stale = self._reap()
+            entry = self._cursors.get(paging_id)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None, stale
+            self._cursors[paging_id] = (entry[0], time.monotonic())
+            self._cursors.move_to_end(paging_id)
+            self._stats["pages"] += 1
+            return entry[0], stale
+
+    def pop(self, paging_id: str, cursor=None):
+        """Unregister paging_id (only while it still maps to cursor, when given); returns its cursor or None."""
+        with self._lock:
+            entry = self._cursors.get(paging_id)
+            if entry is None or (cursor is not None and entry[0] is not cursor):
+                return None
+            del self._cursors[paging_id]
+            self._stats["closed"] += 1
+            return entry[0]
+
+    def drain(self) -> list:
+        with self._lock:
+            cursors = [cursor for cursor, _ in self._cursors.values()]
+            self._cursors.clear()
+            return cursors
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open": len(self._cursors), "max_open": self.max_open, **self._stats}
+
+
+class PagedQueryLog:
+    """paging id -> (SQL, page size) in SQLite, so any worker process can reopen a cursor it does not hold."""
+
+    def __init__(self, path: str, ttl_seconds: float = 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS paged_queries (
+                    paging_id TEXT PRIMARY KEY,
+                    sql TEXT NOT NULL,
+                    page_size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS paged_queries_last_used ON paged_queries (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, paging_id: str, sql_query: str, page_size: int):
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM paged_queries WHERE last_used < ?", (now - self.ttl_seconds,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO paged_queries (paging_id, sql, page_size, last_used) VALUES (?, ?, ?, ?)",
+                    (paging_id, sql_query, page_size, now),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Paged query log write failed: {e}")
+
+    def get(self, paging_id: str):
+        """(SQL, page size) of paging_id, or None when unknown or unused for ttl_seconds."""
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT sql, page_size FROM paged_queries WHERE paging_id = ? AND last_used >= ?",
+                    (paging_id, now - self.ttl_seconds),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE paged_queries SET last_used = ? WHERE paging_id = ?", (now, paging_id))
+        except sqlite3.Error as e:
+            logger.warning(f"Paged query log read failed: {e}")
+            return None
+        return row
+
+    def delete(self, paging_id: str) -> bool:
+        try:
+            with self._connection() as conn:
+                return conn.execute("DELETE FROM paged_queries WHERE paging_id = ?", (paging_id,)).rowcount > 0
+        except sqlite3.Error as e:
+            logger.warning(f"Paged query log delete failed: {e}")
+            return False
+
+
+_registry = PageCursorRegistry(
+    idle_seconds=paging_config.get("idle_seconds", 120),
+    max_open=paging_config.get("max_open_cursors", 8),
+)
+
+_log_lock = threading.Lock()
+_log = None
+
+
+def get_paged_query_log():
+    """Return the process-wide paged query log, or None when paging.reopen_seconds is 0."""
+    global _log
+    if _log is not None or not paging_config.get("reopen_seconds", 3600):
+        return _log
+    with _log_lock:
+        if _log is None:
+            path = paging_config.get("path", "cache/paged_queries.sqlite3")
+            _log = PagedQueryLog(
+                path=path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path),
+                ttl_seconds=paging_config.get("reopen_seconds", 3600),
+            )
+        return _log
+
+
+def page_size_for(requested) -> int:
+    """A /query page_size: true for paging.default_page_size, capped at paging.max_page_size."""
+    if requested is True:
+        requested = paging_config.get("default_page_size", 100)
+    return min(int(requested), paging_config.get("max_page_size", 1000))
+
+
+def _idle_timeout_ms() -> int:
+    return int(_registry.idle_seconds * 2 * 1000) if _registry.idle_seconds else 0
+
+
+def _page(rows: list, offset: int, page_size: int) -> (list, str):
+    """Trim the look-ahead row; returns (rows, next cursor or None)."""
+    if len(rows) > page_size:
+        return rows[:page_size], str(offset + page_size)
+    return rows, None
+
+
+def parse_cursor(cursor) -> int:
+    """Row offset of a cursor token (None / "" = first page). Raises ValueError for anything else."""
+    if cursor in (None, ""):
+        return 0
+    offset = int(cursor)
+    if offset < 0:
+        raise ValueError("cursor must be a non-negative row offset")
+    return offset
+
+
+def open_paged_result(sql_query: str, page_size: int) -> (str, list, list, str):
+    """
+    Run sql_query on a held cursor and read the first page.
+    Returns (paging id or None, columns, rows, next cursor or None).
+    """
+    from core.db_utils import HeldCursor
+    cursor = HeldCursor(sql_query, page_size, _idle_timeout_ms())
+    try:
+        rows, next_cursor = _page(cursor.page(0), 0, page_size)
+    except Exception:
+        cursor.close()
+        raise
+    if next_cursor is None:
+        cursor.close()  # everything fit on the first page
+        return None, cursor.columns, rows, None
+    paging_id, stale = _registry.add(cursor)
+    for old in stale:
+        old.close()
+    log = get_paged_query_log()
+    if log is not None:
+        log.put(paging_id, sql_query, page_size)
+    return paging_id, cursor.columns, rows, next_cursor
+
+
+def _reopen(paging_id: str):
+    """A new held cursor for a logged paging id this worker does not hold, or None."""
+    from core.db_utils import HeldCursor
+    log = get_paged_query_log()
+    entry = log.get(paging_id) if log is not None else None
+    if entry is None:
+        return None
+    sql_query, page_size = entry
+    return HeldCursor(sql_query, page_size, _idle_timeout_ms())
+
+
+def read_page(paging_id: str, offset: int):
+    """(columns, rows, next cursor) of the page at offset, or None for an unknown or expired paging id."""
+    from core.db_utils import CursorClosed
+    cursor, stale = _registry.get(paging_id)
+    for old in stale:
+        old.close()
+    if cursor is not None:
+        try:
+            rows, next_cursor = _page(cursor.page(offset), offset, cursor.page_size)
+            return cursor.columns, rows, next_cursor
+        except CursorClosed:
+            pass  # closed by a concurrent request (idle or evicted): reopen below
+        except Exception:
+            # A failed FETCH aborts the transaction: the cursor is unusable
+            if _registry.pop(paging_id, cursor) is not None:
+                cursor.close()
+            raise
+
+    cursor = _reopen(paging_id)
+    if cursor is None:
+        return None
+    try:
+        rows, next_cursor = _page(cursor.page(offset), offset, cursor.page_size)
+    except Exception:
+        cursor.close()
+        raise
+    _, stale = _registry.add(cursor, paging_id)
+    for old in stale:
+        old.close()
+    return cursor.columns, rows, next_cursor
+
+
+def close_paged_result(paging_id: str) -> bool:
+    log = get_paged_query_log()
+    logged = log.delete(paging_id) if log is not None else False
+    cursor = _registry.pop(paging_id)
+    if cursor is None:
+        return logged
+    cursor.close()
+    return True
+
+
+async def aopen_paged_result(sql_query: str, page_size: int) -> (str, list, list, str):
+    """Async open_paged_result (core.async_db.AsyncHeldCursor)."""
+    from core.async_db import AsyncHeldCursor
+    cursor = await AsyncHeldCursor.open(sql_query, page_size, _idle_timeout_ms())
+    try:
+        rows, next_cursor = _page(await cursor.page(0), 0, page_size)
+    except Exception:
+        await cursor.close()
+        raise
+    if next_cursor is None:
+        await cursor.close()
+        return None, cursor.columns, rows, None
+    paging_id, stale = _registry.add(cursor)
+    for old in stale:
+        await old.close()
+    log = get_paged_query_log()
+    if log is not None:
+        log.put(paging_id, sql_query, page_size)
+    return paging_id, cursor.columns, rows, next_cursor
+
+
+async def _areopen(paging_id: str):
+    from core.async_db import AsyncHeldCursor
+    log = get_paged_query_log()
+    entry = log.get(paging_id) if log is not None else None
+    if entry is None:
+        return None
+    sql_query, page_size = entry
+    return await AsyncHeldCursor.open(sql_query, page_size, _idle_timeout_ms())
+
+
+async def aread_page(paging_id: str, offset: int):
+    from core.db_utils import CursorClosed
+    cursor, stale = _registry.get(paging_id)
+    for old in stale:
+        await old.close()
+    if cursor is not None:
+        try:
+            rows, next_cursor = _page(await cursor.page(offset), offset, cursor.page_size)
+            return cursor.columns, rows, next_cursor
+        except CursorClosed:
+            pass
+        except Exception:
+            if _registry.pop(paging_id, cursor) is not None:
+                await cursor.close()
+            raise
+
+    cursor = await _areopen(paging_id)
+    if cursor is None:
+        return None
+    try:
+        rows, next_cursor = _page(await cursor.page(offset), offset, cursor.page_size)
+    except Exception:
+        await cursor.close()
+        raise
+    _, stale = _registry.add(cursor, paging_id)
+    for old in stale:
+        await old.close()
+    return cursor.columns, rows, next_cursor
+
+
+async def aclose_paged_result(paging_id: str) -> bool:
+    log = get_paged_query_log()
+    logged = log.delete(paging_id) if log is not None else False
+    cursor = _registry.pop(paging_id)
+    if cursor is None:
+        return logged
+    await cursor.close()
+    return True
+
+
+async def aclose_all_paged_results():
+    for cursor in _registry.drain():
+        await cursor.close()
+
+
+def paging_stats() -> dict:
+    return _registry.stats()
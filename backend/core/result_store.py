@@ -0,0 +1,237 @@
+# core/result_store.py
+
+"""
+✅ Server-side Result Store
+/query keeps every non-empty result DataFrame under a result_id, so
+/insights and /visualization can name the result instead of POSTing the whole
+query_result back and rebuilding the DataFrame from JSON.
+
+- LRU bounded by max_entries and max_megabytes (DataFrame memory, deep)
+- results pushed out of memory are pickled to spill_dir when it is set (up to
+  max_spill_megabytes) and loaded back on access; otherwise they are dropped
+- entries expire ttl_seconds after they were stored
+- the store belongs to one worker process: an id from another worker or an
+  expired id is unknown, and clients then send query_result instead
+
+Configured from config["result_store"]:
+    enabled, max_entries, max_megabytes, ttl_seconds,
+    spill_dir (relative to backend/, unset = memory only), max_spill_megabytes
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import pandas as pd
+from core.config_loader import load_config
+
+config = load_config()
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+class StoredResult:
+    __slots__ = ("df", "size", "path", "disk_size", "created_at")
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.size = int(df.memory_usage(index=True, deep=True).sum())
+        self.path = None
+        self.disk_size = 0
+        self.created_at = time.monotonic()
+
+
+class ResultStore:
+    """Thread-safe LRU of result DataFrames with optional spill to disk."""
+
+    def __init__(self, max_entries: int = 100, max_megabytes: float = 256, ttl_seconds: float = 3600,
+                 spill_dir: str = None, max_spill_megabytes: float = 1024):
+        if max_entries < 1:
+            raise ValueError("❌ result_store.max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = int(max_megabytes * 1024 * 1024) if max_megabytes else None
+        self.ttl_seconds = ttl_seconds
+        self.max_spill_bytes = int(max_spill_megabytes * 1024 * 1024) if max_spill_megabytes else None
+        self.spill_dir = None
+        if spill_dir:
+            # One directory per worker process, emptied on start: spilled files never outlive their index
+            self.spill_dir = os.path.join(spill_dir, str(os.getpid()))
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            os.makedirs(self.spill_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()   # result_id -> StoredResult held in memory, least recently used first
+        self._spilled = OrderedDict()  # result_id -> StoredResult pickled in spill_dir
+        self._loading = {}             # result_id -> Event set once its spilled file was read back
+        self._memory_bytes = 0
+        self._spill_bytes = 0
+        self._stats = {"stores": 0, "hits": 0, "misses": 0, "spills": 0, "loads": 0,
+                       "evictions": 0, "expirations": 0}
+
+    def put(self, df: pd.DataFrame) -> str:
+        """Store a result and return its id."""
+        result_id = uuid.uuid4().hex
+        entry = StoredResult(df)
+        with self._lock:
+            self._expire()
+            self._memory[result_id] = entry
+            self._memory_bytes += entry.size
+            self._stats["stores"] += 1
+            self._shrink()
+        return result_id
+
+    def get(self, result_id: str):
+        """The stored DataFrame, or None for an unknown or expired id."""
+        with self._lock:
+            loading = self._loading.get(result_id)
+        if loading is not None:
+            loading.wait()  # another request is reading the same spilled file
+        with self._lock:
+            self._expire()
+            entry = self._memory.get(result_id)
+            if entry is not None:
+                self._memory.move_to_end(result_id)
+                self._stats["hits"] += 1
+                return entry.df
+            entry = self._spilled.pop(result_id, None)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._spill_bytes -= entry.disk_size
+            loading = self._loading[result_id] = threading.Event()
+
+        # Read the file without the lock: other requests keep storing and fetching meanwhile
+        try:
+            df = pd.read_pickle(entry.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load spilled result {result_id}: {str(e)}")
+            df = None
+        finally:
+            self._remove_file(entry)
+
+        with self._lock:
+            del self._loading[result_id]
+            loading.set()
+            if df is None:
+                self._stats["misses"] += 1
+                return None
+            entry.df = df
+            self._memory[result_id] = entry
+            self._memory_bytes += entry.size
+            self._stats["hits"] += 1
+            self._stats["loads"] += 1
+            self._shrink()
+            return df
+
+    def _shrink(self):
+        # Called with the lock held: move least recently used results out of memory
+        while self._memory and (len(self._memory) > self.max_entries
+                                or (self.max_bytes and self._memory_bytes > self.max_bytes)):
+            result_id, entry = self._memory.popitem(last=False)
+            self._memory_bytes -= entry.size
+            if self.spill_dir:
+                self._spill(result_id, entry)
+            else:
+                self._stats["evictions"] += 1
+
+    def _spill(self, result_id: str, entry: StoredResult):
+        entry.path = os.path.join(self.spill_dir, f"{result_id}.pkl")
+        try:
+            entry.df.to_pickle(entry.path)
+            entry.disk_size = os.path.getsize(entry.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not spill result {result_id}: {str(e)}")
+            self._remove_file(entry)
+            self._stats["evictions"] += 1
+            return
+        entry.df = None
+        self._spilled[result_id] = entry
+        self._spill_bytes += entry.disk_size
+        self._stats["spills"] += 1
+        while self._spilled and self.max_spill_bytes and self._spill_bytes > self.max_spill_bytes:
+            _, dropped = self._spilled.popitem(last=False)
+            self._spill_bytes -= dropped.disk_size
+            self._remove_file(dropped)
+            self._stats["evictions"] += 1
+
+    @staticmethod
+    def _remove_file(entry: StoredResult):
+        if entry.path:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+            entry.path = None
+
+    def _expire(self):
+        if not self.ttl_seconds:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        for result_id in [key for key, entry in self._memory.items() if entry.created_at < cutoff]:
+            self._memory_bytes -= self._memory.pop(result_id).size
+            self._stats["expirations"] += 1
+        for result_id in [key for key, entry in self._spilled.items() if entry.created_at < cutoff]:
+            entry = self._spilled.pop(result_id)
+            self._spill_bytes -= entry.disk_size
+            self._remove_file(entry)
+            self._stats["expirations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._memory),
+                "spilled": len(self._spilled),
+                "memory_megabytes": round(self._memory_bytes / (1024 * 1024), 2),
+                "spill_megabytes": round(self._spill_bytes / (1024 * 1024), 2),
+                "max_entries": self.max_entries,
+                **self._stats,
+            }
+
+
+_lock = threading.Lock()
+_store = None
+
+
+def result_store_enabled() -> bool:
+    return config.get("result_store", {}).get("enabled", True)
+
+
+def get_result_store() -> ResultStore:
+    """Return the process-wide result store, created from config["result_store"] on first use."""
+    global _store
+    if _store is not None:
+        return _store
+    with _lock:
+        if _store is None:
+            store_config = config.get("result_store", {})
+            spill_dir = store_config.get("spill_dir")
+            _store = ResultStore(
+                max_entries=store_config.get("max_entries", 100),
+                max_megabytes=store_config.get("max_megabytes", 256),
+                ttl_seconds=store_config.get("ttl_seconds", 3600),
+                spill_dir=os.path.join(BACKEND_DIR, spill_dir) if spill_dir else None,
+                max_spill_megabytes=store_config.get("max_spill_megabytes", 1024),
+            )
+        return _store
+
+
+def store_result(df: pd.DataFrame):
+    """Store a non-empty result; returns its result_id, or None when the store is disabled."""
+    if not result_store_enabled() or not isinstance(df, pd.DataFrame) or df.empty:
+        return None
+    return get_result_store().put(df)
+
+
+def load_result(result_id: str):
+    """The DataFrame stored under result_id, or None."""
+    if not result_store_enabled() or not isinstance(result_id, str):
+        return None
+    return get_result_store().get(result_id)
+
+
+def result_store_stats() -> dict:
+    """Store metrics, or {} before the first result was stored."""
+    return _store.stats() if _store is not None else {}
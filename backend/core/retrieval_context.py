@@ -0,0 +1,40 @@
+# core/retrieval_context.py
+
+"""
+✅ Per-request Retrieval Context
+Holds the user question and its embedding so the question is encoded once
+and shared by every semantic search of the request.
+"""
+
+
+class RetrievalContext:
+    """The user question plus its sentence-transformer embedding."""
+
+    __slots__ = ("question", "vector", "hits", "fewshot")
+
+    def __init__(self, question: str, vector):
+        self.question = question
+        self.vector = vector
+        self.hits = None  # {kind: hits}, filled by core.schema_search.search_schema
+        self.fewshot = None  # FewShotSelection, filled by core.fewshot_selector.select_fewshot
+
+    @classmethod
+    def encode(cls, question: str, model) -> "RetrievalContext":
+        """Encode the question once with the given SentenceTransformer."""
+        return cls(question, model.encode([question])[0])
+
+    def __repr__(self):
+        return f"RetrievalContext(question={self.question!r})"
+
+
+def as_retrieval_context(query, model=None) -> RetrievalContext:
+    """Accept either a RetrievalContext or a raw question string.
+
+    The shared SentenceTransformer is only loaded when a string must be encoded.
+    """
+    if isinstance(query, RetrievalContext):
+        return query
+    if model is None:
+        from core.model_registry import get_sentence_transformer
+        model = get_sentence_transformer()
+    return RetrievalContext.encode(query, model)
@@ -0,0 +1,58 @@
+# core/schema_documents.py
+
+"""
+✅ Schema Documents
+Builds the texts and payloads that are embedded into the schema_embeddings
+collection. Shared by the Qdrant embed scripts and the in-process NumPy index
+so both backends index exactly the same documents.
+"""
+
+import json
+
+RELATIONSHIP_ID_OFFSET = 1_000_000  # Relationship point ids start here to avoid collisions
+
+
+def table_documents(tables) -> (list, list):
+    """Return (texts, payloads) for every table and column of a MetadataStore's tables."""
+    texts = []
+    payloads = []
+    for table in tables:
+        table_text = f"Table: {table.name}. {table.description}"
+        texts.append(table_text)
+        payloads.append({"type": "table", "table_name": table.name, "description": table.description})
+        for col in table.columns:
+            col_text = f"Column: {col.name} in table {table.name}. {col.description}"
+            texts.append(col_text)
+            payload = {
+                "type": "column",
+                "table_name": table.name,
+                "column_name": col.name,
+                "description": col.description
+            }
+            if col.possible_values is not None:
+                payload["possible_values"] = json.dumps(col.possible_values)
+            if col.value_mappings is not None:
+                payload["value_mappings"] = json.dumps(col.value_mappings)
+            payloads.append(payload)
+    return texts, payloads
+
+
+def relationship_documents(relationships: list) -> (list, list):
+    """Return (texts, payloads) for every entry in schema_relationship_metadata.json."""
+    texts = []
+    payloads = []
+    for rel in relationships:
+        rel_text = (
+            f"Relationship: {rel['from_table']}.{rel['from_column']}  {rel['to_table']}.{rel['to_column']}. {rel.get('description', '')}"
+        )
+        texts.append(rel_text)
+        payload = {
+            "type": "relationship",
+            "from_table": rel["from_table"],
+            "from_column": rel["from_column"],
+            "to_table": rel["to_table"],
+            "to_column": rel["to_column"],
+            "description": rel.get("description", "")
+        }
+        payloads.append(payload)
+    return texts, payloads
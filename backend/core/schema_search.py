@@ -0,0 +1,82 @@
+# core/schema_search.py
+
+"""
+✅ Batched Schema Search
+Runs every schema_embeddings lookup of a request (general, table, column and
+relationship) as a single batched search on the configured backend (see
+core/vector_index.py). The hits are cached on the RetrievalContext so later
+helpers slice them without another call.
+"""
+
+from core.config_loader import load_config
+from core.retrieval_context import RetrievalContext, as_retrieval_context
+from core.vector_index import get_schema_index
+
+config = load_config()
+SEM_SEARCH = config['semantic_search']
+
+def search_limits() -> dict:
+    """Hits fetched per kind; each covers the widest slice any helper below takes."""
+    return {
+        "general": SEM_SEARCH['general_top_k'],
+        "table": SEM_SEARCH['table_top_k'] * 2,
+        "column": max(SEM_SEARCH['column_top_k'] * 2, SEM_SEARCH['value_top_k'] * 3),
+        "relationship": SEM_SEARCH.get('relationship_top_k', 5),
+    }
+
+def search_schema(query: "str | RetrievalContext") -> dict:
+    """Return {kind: hits} for the request, issuing at most one batched search."""
+    ctx = as_retrieval_context(query)
+    if ctx.hits is not None:
+        return ctx.hits
+    kinds = list(search_limits().items())
+    requests = [(None if kind == "general" else kind, limit) for kind, limit in kinds]
+    results = get_schema_index().search_batch(ctx.vector, requests)
+    ctx.hits = {kind: hits for (kind, _), hits in zip(kinds, results)}
+    return ctx.hits
+
+async def asearch_schema(ctx: RetrievalContext) -> dict:
+    """Async search_schema (ASGI server); fills ctx.hits so the sync helpers below reuse them."""
+    if ctx.hits is not None:
+        return ctx.hits
+    kinds = list(search_limits().items())
+    requests = [(None if kind == "general" else kind, limit) for kind, limit in kinds]
+    results = await get_schema_index().asearch_batch(ctx.vector, requests)
+    ctx.hits = {kind: hits for (kind, _), hits in zip(kinds, results)}
+    return ctx.hits
+
+def semantic_search(query: "str | RetrievalContext"):
+    return search_schema(query)["general"]
+
+def match_relevant_columns(query: "str | RetrievalContext") -> list:
+    top_k = SEM_SEARCH['column_top_k']
+    hits = search_schema(query)["column"]
+    # Return column names in format table.column
+    return [f"{hit.payload['table_name']}.{hit.payload['column_name']}" for hit in hits[:top_k]]
+
+def match_relevant_tables(query: "str | RetrievalContext") -> list:
+    top_k = SEM_SEARCH['table_top_k']
+    hits = search_schema(query)["table"]
+    return [hit.payload['table_name'] for hit in hits[:top_k]]
+
+def match_relevant_values(query: "str | RetrievalContext") -> list:
+    top_k = SEM_SEARCH['value_top_k']
+    # For value-level semantics, just return the top columns with possible_values
+    hits = search_schema(query)["column"][:top_k * 3]
+    results = []
+    for hit in hits:
+        payload = hit.payload
+        if payload.get('possible_values'):
+            results.append({
+                "table": payload['table_name'],
+                "column": payload['column_name'],
+                "possible_values": payload['possible_values'],
+                "description": payload.get('description', '')
+            })
+        if len(results) >= top_k:
+            break
+    return results
+
+def match_relevant_relationships(query: "str | RetrievalContext") -> list:
+    hits = search_schema(query)["relationship"]
+    return [hit.payload for hit in hits]
@@ -2,17 +2,14 @@ from core.config_loader import load_config
 config = load_config()
 SEM_SEARCH = config['semantic_search']
 
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
+from core.model_registry import get_sentence_transformer, get_qdrant_client
 
 COLLECTION_NAME = "schema_embeddings"
-model = SentenceTransformer(config['sentence_transformer']['model'])
-client = QdrantClient(config['qdrant']['host'], port=config['qdrant']['port'])
 
 def semantic_search(query):
     top_n = SEM_SEARCH['general_top_k']
-    query_emb = model.encode([query])[0]
-    hits = client.search(
+    query_emb = get_sentence_transformer().encode([query])[0]
+    hits = get_qdrant_client().search(
         collection_name=COLLECTION_NAME,
         query_vector=query_emb,
         limit=top_n
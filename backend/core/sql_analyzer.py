@@ -0,0 +1,124 @@
+# core/sql_analyzer.py
+
+"""
+✅ Offline SQL Analyzer
+Parses generated SQL into an AST (sqlglot, PostgreSQL dialect) and checks it
+locally, without a database round trip:
+- the SQL parses and is a single read-only SELECT / WITH query
+- every table exists in the metadata store
+- every column resolves against the tables (or aliases) it references
+
+Unknown tables and aliases are errors. A column missing from the metadata is
+reported separately: the metadata can lag the live database, so the
+validator asks PostgreSQL (EXPLAIN) before rejecting such a query.
+
+Parsing and the read-only check are delegated to core.sql_guard, whose
+cached parse result is shared with the executor.
+"""
+
+from sqlglot import exp
+from core.metadata_store import get_metadata_store
+from core.sql_guard import DIALECT, check_read_only, guard_sql
+
+SYSTEM_SCHEMAS = {"information_schema", "pg_catalog"}
+
+
+def _name(identifier) -> str:
+    """
+    An identifier as PostgreSQL resolves it: unquoted names fold to lowercase
+    (as in the metadata), quoted names keep their case, so "Customers" is not
+    customers.
+    """
+    if isinstance(identifier, exp.TableAlias):
+        identifier = identifier.this
+    if isinstance(identifier, exp.Identifier):
+        return identifier.this if identifier.quoted else identifier.this.lower()
+    return str(identifier).lower()
+
+
+def _alias(node: exp.Expression):
+    """Resolved alias of a table, CTE, subquery or output column, or None."""
+    alias = node.args.get("alias")
+    return _name(alias) if alias is not None and alias.name else None
+
+
+def schema_errors(tree: exp.Expression, store=None) -> (list, list):
+    """
+    Resolve table and column references in tree against the metadata store.
+    Returns (errors, unknown columns): messages for tables and aliases that do
+    not resolve, and for columns the metadata does not list.
+    """
+    store = store or get_metadata_store()
+    errors = []
+    unknown_columns = []
+
+    cte_names = {_alias(cte) for cte in tree.find_all(exp.CTE)}
+    aliases = {}          # alias or table name -> real table name, or None for derived sources
+    real_tables = []
+    for table in tree.find_all(exp.Table):
+        alias = _alias(table)
+        if not isinstance(table.this, exp.Identifier):
+            # Table-valued function such as generate_series(...) AS month
+            if alias:
+                aliases[alias] = None
+            continue
+        name = _name(table.this)
+        if name in cte_names:
+            aliases[alias or name] = None
+            continue
+        if table.db and _name(table.args["db"]) in SYSTEM_SCHEMAS:
+            aliases[alias or name] = None
+            continue
+        if store.get_table(name) is None:
+            errors.append(f"Unknown table '{table.name}'")
+            aliases[alias or name] = None
+            continue
+        aliases[name] = name
+        if alias:
+            aliases[alias] = name
+        real_tables.append(name)
+
+    derived_sources = bool(cte_names)
+    for source in tree.find_all(exp.Subquery, exp.Values, exp.Lateral, exp.Unnest):
+        derived_sources = True
+        if _alias(source):
+            aliases[_alias(source)] = None
+
+    output_aliases = {_alias(alias) for alias in tree.find_all(exp.Alias)}
+    referenced = sorted(set(real_tables))
+
+    for column in tree.find_all(exp.Column):
+        if isinstance(column.this, exp.Star):
+            continue
+        col_name = _name(column.this)
+        if column.table:
+            qualifier = _name(column.args["table"])
+            if qualifier not in aliases:
+                errors.append(f"Unknown table or alias '{column.table}' in '{column.sql(dialect=DIALECT)}'")
+                continue
+            table_name = aliases[qualifier]
+            if table_name is not None and store.get_column(table_name, col_name) is None:
+                unknown_columns.append(f"Column '{column.name}' does not exist in table '{table_name}'")
+        elif not derived_sources and col_name not in output_aliases and referenced:
+            if not any(store.get_column(table_name, col_name) for table_name in referenced):
+                unknown_columns.append(
+                    f"Column '{column.name}' not found in referenced table(s): {', '.join(referenced)}"
+                )
+
+    # Keep the first occurrence of each message, in order
+    return list(dict.fromkeys(errors)), list(dict.fromkeys(unknown_columns))
+
+
+def analyze_sql(sql: str, store=None) -> (bool, str, bool):
+    """
+    Offline validation. Returns (valid, error message, columns only), where
+    columns only is True when every problem is a column missing from the
+    metadata (the live database may still have it).
+    """
+    allowed, error = check_read_only(sql)
+    if not allowed:
+        return False, error, False
+    errors, unknown_columns = schema_errors(guard_sql(sql), store)
+    if errors or unknown_columns:
+        return False, "Schema Error: " + "; ".join(errors + unknown_columns), not errors
+    return True, '', False
@@ -0,0 +1,121 @@
+# core/sql_guard.py
+
+"""
+✅ Read-Only SQL Guard
+The single read-only check for generated SQL. The SQL is parsed once into an
+AST (sqlglot, PostgreSQL dialect) and rejected when it is not exactly one
+read-only query:
+- DML / DDL / utility statements (INSERT, UPDATE, DELETE, MERGE, CREATE,
+  DROP, ALTER, TRUNCATE, GRANT, COPY, SET, VACUUM, CALL, ...)
+- multi-statement payloads ("SELECT 1; DROP TABLE customers")
+- writable CTEs ("WITH x AS (DELETE ... RETURNING *) SELECT ...")
+- SELECT ... INTO, row locks (FOR UPDATE / FOR SHARE) and side-effecting
+  functions such as nextval() or pg_sleep()
+
+parse_sql is cached per SQL string, so the validator, the executor and any
+other stage checking the same query reuse one parse result.
+"""
+
+from functools import lru_cache
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError, TokenError
+
+DIALECT = "postgres"
+
+# Statement nodes that write or change session/server state, wherever they appear in the tree
+WRITE_NODES = tuple(node for node in (
+    exp.Insert, exp.Update, exp.Delete, getattr(exp, "Merge", None),
+    exp.Create, exp.Drop, getattr(exp, "Alter", None), getattr(exp, "AlterTable", None),
+    exp.TruncateTable, getattr(exp, "Copy", None), exp.Set, getattr(exp, "Grant", None),
+    getattr(exp, "Revoke", None), exp.Command, exp.Into, exp.Lock,
+) if node is not None)
+
+# Functions that modify state or hold the connection, even inside a SELECT
+FORBIDDEN_FUNCTIONS = {
+    "nextval", "setval", "set_config", "pg_sleep", "pg_sleep_for", "pg_sleep_until",
+    "pg_terminate_backend", "pg_cancel_backend", "pg_reload_conf", "pg_notify",
+    "dblink", "dblink_exec", "pg_read_file", "pg_read_binary_file", "pg_ls_dir",
+    # Advisory locks outlive the query (session locks) or block it
+    "pg_advisory_lock", "pg_advisory_lock_shared", "pg_advisory_xact_lock", "pg_advisory_xact_lock_shared",
+    "pg_try_advisory_lock", "pg_try_advisory_lock_shared", "pg_try_advisory_xact_lock",
+    "pg_try_advisory_xact_lock_shared", "pg_advisory_unlock", "pg_advisory_unlock_shared",
+    "pg_advisory_unlock_all",
+    # Large objects: server-side file access and writes
+    "lo_import", "lo_export", "lo_unlink", "lo_create", "lo_creat", "lo_from_bytea", "lo_put",
+    "lo_truncate", "lo_truncate64",
+    # Run the SQL text or cursor they are given, unseen by this guard
+    "query_to_xml", "query_to_xml_and_xmlschema", "query_to_xmlschema", "cursor_to_xml", "cursor_to_xmlschema",
+}
+
+
+class SQLParseError(ValueError):
+    """The SQL could not be parsed; the message carries line and column."""
+
+
+class UnsafeSQLError(ValueError):
+    """The SQL parsed but is not a single read-only query."""
+
+
+@lru_cache(maxsize=512)
+def parse_sql(sql: str) -> tuple:
+    """
+    Parse sql into a tuple of statement ASTs. Cached: callers must treat the
+    returned trees as read-only (use .copy() before transforming them).
+    """
+    try:
+        return tuple(tree for tree in sqlglot.parse(sql, read=DIALECT) if tree is not None)
+    except ParseError as e:
+        detail = e.errors[0] if e.errors else {}
+        if detail:
+            raise SQLParseError(
+                f"{detail.get('description', 'Invalid SQL')} near '{detail.get('highlight', '')}' "
+                f"(line {detail.get('line')}, column {detail.get('col')})"
+            ) from None
+        raise SQLParseError(str(e)) from None
+    except TokenError as e:
+        raise SQLParseError(str(e).splitlines()[0]) from None
+
+
+def _describe(node: exp.Expression) -> str:
+    if isinstance(node, exp.Into):
+        return "SELECT ... INTO"
+    if isinstance(node, exp.Lock):
+        return "row locking (FOR UPDATE / FOR SHARE)"
+    if isinstance(node, exp.Command):
+        return str(node.this).upper()
+    return node.key.upper()
+
+
+@lru_cache(maxsize=512)
+def guard_sql(sql: str) -> exp.Expression:
+    """
+    Return the AST of sql when it is a single read-only query.
+    Raises SQLParseError when it does not parse and UnsafeSQLError otherwise.
+    """
+    if not sql or not sql.strip():
+        raise UnsafeSQLError("No SQL was generated.")
+    statements = parse_sql(sql)
+    if len(statements) != 1:
+        raise UnsafeSQLError(f"Expected exactly one SQL statement, found {len(statements)}.")
+    tree = statements[0]
+    if not isinstance(tree, exp.Query):
+        raise UnsafeSQLError(f"Only read-only SELECT or WITH queries are allowed (got {_describe(tree)}).")
+    for node in tree.walk():
+        if isinstance(node, WRITE_NODES):
+            where = " in a CTE" if node.find_ancestor(exp.CTE) else ""
+            raise UnsafeSQLError(f"Only read-only queries are allowed (found {_describe(node)}{where}).")
+        if isinstance(node, exp.Anonymous) and node.name.lower() in FORBIDDEN_FUNCTIONS:
+            raise UnsafeSQLError(f"Function {node.name}() is not allowed in read-only queries.")
+    return tree
+
+
+def check_read_only(sql: str) -> (bool, str):
+    """Guard result as (allowed, error message)."""
+    try:
+        guard_sql(sql)
+        return True, ''
+    except SQLParseError as e:
+        return False, f"SQL Syntax Error: {e}"
+    except UnsafeSQLError as e:
+        return False, str(e)
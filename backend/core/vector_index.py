@@ -0,0 +1,176 @@
+# core/vector_index.py
+
+"""
+✅ Schema Vector Index Backends
+Pluggable backends for the schema_embeddings lookups, selected with
+`semantic_search.backend` in config.yaml:
+
+- qdrant: search_batch against the Qdrant server (default)
+- numpy:  exact cosine top-k over an in-process float32 matrix, built from
+          core/metadata_template.json and core/schema_relationship_metadata.json.
+          Needs no Qdrant server, which suits tests and edge deployments.
+
+Both expose search_batch(vector, requests) where requests is a list of
+(type_name or None, limit) and return one list of hits per request, plus an
+awaitable asearch_batch for the ASGI server.
+"""
+
+import json
+import logging
+import os
+import threading
+import numpy as np
+from core.config_loader import load_config
+from core.model_registry import get_sentence_transformer, get_qdrant_client, get_async_qdrant_client
+from core.metadata_store import get_metadata_store
+from core.schema_documents import table_documents, relationship_documents, RELATIONSHIP_ID_OFFSET
+
+config = load_config()
+SEM_SEARCH = config['semantic_search']
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "schema_embeddings"
+RELATIONSHIP_METADATA_PATH = os.path.join(os.path.dirname(__file__), 'schema_relationship_metadata.json')
+
+
+class VectorHit:
+    """Search hit with the same attributes the callers read from a Qdrant ScoredPoint."""
+
+    __slots__ = ("id", "score", "payload")
+
+    def __init__(self, id, score: float, payload: dict):
+        self.id = id
+        self.score = score
+        self.payload = payload
+
+    def __repr__(self):
+        return f"VectorHit(id={self.id!r}, score={self.score:.4f}, payload={self.payload!r})"
+
+
+class NumpyVectorIndex:
+    """Exact cosine top-k over a contiguous float32 matrix with payloads in parallel arrays."""
+
+    def __init__(self, vectors, payloads: list, ids: list = None):
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = matrix / norms
+        self.payloads = list(payloads)
+        self.ids = np.asarray(ids if ids is not None else range(len(self.payloads)))
+        types = np.asarray([payload.get("type") for payload in self.payloads])
+        self.rows_by_type = {t: np.flatnonzero(types == t) for t in set(types.tolist())}
+
+    def __len__(self):
+        return len(self.payloads)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def _top_k(self, scores, rows, limit: int) -> list:
+        if rows is not None:
+            scores = scores[rows]
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if rows is not None:
+            picked = rows[top]
+        else:
+            picked = top
+        return [
+            VectorHit(self.ids[i].item(), float(score), self.payloads[i])
+            for i, score in zip(picked, scores[top])
+        ]
+
+    def search(self, vector, limit: int, type_name: str = None) -> list:
+        return self.search_batch(vector, [(type_name, limit)])[0]
+
+    def search_batch(self, vector, requests: list) -> list:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        # ✅ One matrix-vector product serves every request of the batch
+        scores = self.matrix @ query
+        results = []
+        for type_name, limit in requests:
+            if type_name is None:
+                results.append(self._top_k(scores, None, limit))
+            else:
+                rows = self.rows_by_type.get(type_name)
+                results.append(self._top_k(scores, rows, limit) if rows is not None else [])
+        return results
+
+    async def asearch_batch(self, vector, requests: list) -> list:
+        # In-process and microseconds long: nothing to await
+        return self.search_batch(vector, requests)
+
+
+class QdrantVectorIndex:
+    """Batched searches against the Qdrant schema_embeddings collection."""
+
+    def __init__(self, client, collection_name: str = COLLECTION_NAME):
+        self.client = client
+        self.collection_name = collection_name
+
+    @staticmethod
+    def _search_requests(vector, requests: list) -> list:
+        from qdrant_client.http.models import Filter, FieldCondition, MatchValue, SearchRequest
+        vector = np.asarray(vector, dtype=np.float32).tolist()
+        return [
+            SearchRequest(
+                vector=vector,
+                limit=limit,
+                filter=None if type_name is None else Filter(
+                    must=[FieldCondition(key="type", match=MatchValue(value=type_name))]
+                ),
+                with_payload=True,
+            )
+            for type_name, limit in requests
+        ]
+
+    def search_batch(self, vector, requests: list) -> list:
+        return self.client.search_batch(collection_name=self.collection_name,
+                                        requests=self._search_requests(vector, requests))
+
+    async def asearch_batch(self, vector, requests: list) -> list:
+        # The async client is created on first use, inside the server's event loop
+        return await get_async_qdrant_client().search_batch(collection_name=self.collection_name,
+                                                            requests=self._search_requests(vector, requests))
+
+
+def build_numpy_schema_index(model=None) -> NumpyVectorIndex:
+    """Embed the schema and relationship metadata into an in-process index."""
+    model = model or get_sentence_transformer()
+    with open(RELATIONSHIP_METADATA_PATH, "r", encoding="utf-8") as f:
+        relationships = json.load(f)
+    table_texts, table_payloads = table_documents(get_metadata_store().tables)
+    rel_texts, rel_payloads = relationship_documents(relationships)
+    ids = list(range(len(table_texts))) + [RELATIONSHIP_ID_OFFSET + i for i in range(len(rel_texts))]
+    vectors = model.encode(table_texts + rel_texts, convert_to_numpy=True)
+    index = NumpyVectorIndex(vectors, table_payloads + rel_payloads, ids)
+    logger.info(f"Built NumPy schema index: {len(index)} vectors, {index.nbytes / 1024:.1f} KiB")
+    return index
+
+
+_lock = threading.Lock()
+_schema_index = None
+
+
+def get_schema_index():
+    """Return the process-wide schema index for the configured backend."""
+    global _schema_index
+    if _schema_index is not None:
+        return _schema_index
+    with _lock:
+        if _schema_index is None:
+            backend = SEM_SEARCH.get('backend', 'qdrant')
+            if backend == 'numpy':
+                _schema_index = build_numpy_schema_index()
+            elif backend == 'qdrant':
+                _schema_index = QdrantVectorIndex(get_qdrant_client())
+            else:
+                raise ValueError(f"❌ Unknown semantic_search.backend: {backend} (expected 'qdrant' or 'numpy')")
+        return _schema_index
@@ -2,16 +2,31 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import logging
 from datetime import datetime
 import traceback
-import pandas as pd
 
 from graph import create_graph
 from state import AgentState
-from core.db_utils import run_query
+from api_common import (
+  INVALID_CURSOR, PAGING_NOT_FOUND, SQL_TOKEN_NODES, UNSUPPORTED_FORMAT, SqlTokenFilter, build_insights_response, build_query_response, build_rows_meta, build_visualization_response,
+  columnar_headers, error_body, ndjson_line, new_agent_state, node_progress, page_body, read_page_size,
+  read_query_payload, read_result_payload, result_metadata, result_payload_status, rows_to_stream, state_dict
+)
+from nodes.answer_cache import record_deferred_execution
+from core.result_formats import JSON_MIMETYPE, negotiate_format, result_builder
+from core.db_utils import fetch_result, stream_rows
+from core.db_utils import query_stats
+from core.model_registry import registry_stats
+from core.db_pool import pool_stats
+from core.fewshot_selector import get_fewshot_library
+from core.answer_cache import answer_cache_stats
+from core.llm_cache import llm_cache_stats
+from core.intent_index import intent_stats
+from core.result_store import result_store_stats
+from core.result_pages import close_paged_result, open_paged_result, paging_stats, parse_cursor, read_page
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,64 +40,44 @@ try:
 except Exception as e:
   logger.error(f"Failed in initialize graph: {str(e)}")
   text_to_sql_graph = None
+
+# Load and pre-render the few-shot examples once, off the request path
+try:
+  get_fewshot_library()
+except Exception as e:
+  logger.warning(f"Few-shot library will load on first request: {str(e)}")
   
 @app.route('/health', methods=['GET'])
 def health_check():
   return jsonify({
     "status": "healthy",
     "timestamp": datetime.now().isoformat(),
-    "graph_initialized": text_to_sql_graph is not None
+    "graph_initialized": text_to_sql_graph is not None,
+    "model_registry": registry_stats(),
+    "db_pool": pool_stats(),
+    "db_queries": query_stats(),
+    "answer_cache": answer_cache_stats(),
+    "llm_cache": llm_cache_stats(),
+    "intent_classifier": intent_stats(),
+    "result_store": result_store_stats(),
+    "paging": paging_stats()
   }), 200
   
   
 @app.route('/insights', methods=['POST'])
 def get_insights():
   try:
-    if not request.is_json:
-      return jsonify({
-        "error": "Content-Type must be application/json",
-        "status": "error"
-      }),
-      
-    data = request.get_json()
-    
-    if not data or 'user_input' not in data or 'query_result' not in data:
-      return jsonify({
-        "error": "Missing required fields: user_input, query_result",
-        "status": "error"
-      }), 400
-      
-    user_input = data.get('user_input', '').strip()
-    query_result = data.get('query_result', [])
-    
-    if not user_input:
-      return jsonify({
-        "error": "user_input cannot be empty",
-        "status": "error"
-      }), 400
-      
-    if isinstance(query_result, list) and query_result:
-      result_df = pd.DataFrame(query_result)
-    else:
-      return jsonify({
-        "error": "No data available for insights generation",
-        "status": "error"
-      }), 400
+    user_input, query_result, result_df, error = read_result_payload(
+      request.is_json, request.get_json(silent=True), "No data available for insights generation"
+    )
+    if error:
+      return jsonify({"error": error, "status": "error"}), result_payload_status(error)
       
     from nodes.insights import insights_node
     state = AgentState(user_input=user_input, query_result=result_df)
     insights_state = insights_node.invoke(state)
     
-    response_data = {
-      "status": "success",
-      "timestamp": datetime.now().isoformat(),
-      "user_input": user_input,
-      "insights": insights_state.explanation,
-      "data_summary": {
-        "row_count": len(result_df),
-        "columns": result_df.columns.tolist()
-      }
-    }
+    response_data = build_insights_response(user_input, result_df, insights_state)
     
     logger.info("✅ Insights generated successfully")
     return jsonify(response_data), 200
@@ -92,11 +87,7 @@ def get_insights():
     logger.error(f"❌ Error generating insights: {error_msg}")
     logger.error(traceback.format_exc())
     
-    return jsonify({
-        "status": "error",
-        "error": error_msg,
-        "timestamp": datetime.now().isoformat()
-    }), 500
+    return jsonify(error_body(error_msg)), 500
 
 @app.route('/visualization', methods=["POST"])
 def get_visualization():
@@ -106,90 +97,24 @@ def get_visualization():
   Expected JSON payload:
   {
       "user_input": "Show me all customers from New York",
-      "query_result": [...],  # Query result data
+      "result_id": "...",     # result_id from /query (404 once expired) or
+      "query_result": [...],  # the query result data itself
       "session_id": "optional_session_id"
   }
   """
   try:
-    if not request.is_json:
-      return jsonify({
-        "error": "Content-Type must be application/json",
-        "status": "error"
-      }), 400
-    
-    data = request.get_json()
-    
-    if not data or 'user_input' not in data or 'query_result' not in data:
-      return jsonify({
-        "error": "Missing required fields: user_input, query_result",
-        "status": "error"
-      }), 400
-    
-    user_input = data.get('user_input', '').strip()
-    query_result = data.get('query_result', [])
-    
-    if not user_input:
-      return jsonify({
-        "error": "user_input cannot be empty",
-        "status": "error"
-      }), 400
-    
-    # Convert query_result to DataFrame if it's a list of dicts
-    if isinstance(query_result, list) and query_result:
-      result_df = pd.DataFrame(query_result)
-    else:
-      return jsonify({
-        "error": "No data available for visualization",
-        "status": "error"
-      }), 400
+    user_input, query_result, result_df, error = read_result_payload(
+      request.is_json, request.get_json(silent=True), "No data available for visualization"
+    )
+    if error:
+      return jsonify({"error": error, "status": "error"}), result_payload_status(error)
     
     # Create state and generate visualization
     from nodes.visualization import visualization_node
     state = AgentState(user_input=user_input, query_result=result_df)
     vis_state = visualization_node.invoke(state)
     
-    # Parse visualization suggestions
-    visualization_config = None
-    explanation = None
-    
-    if vis_state.suggestions:
-      try:
-        import json
-        # Split LLM response into explanation and JSON
-        suggestion_lines = vis_state.suggestions.split('\n', 1)
-        explanation = suggestion_lines[0].strip()
-        suggestion_json = suggestion_lines[1].strip() if len(suggestion_lines) > 1 else '{}'
-        visualization_config = json.loads(suggestion_json)
-        
-        # Process data based on visualization config
-        top_n = visualization_config.get("top_n")
-        chart_type = visualization_config.get("chart_type")
-        
-        processed_data = query_result
-        if top_n and isinstance(top_n, int):
-          if chart_type in ["bar", "line"] and visualization_config.get("y"):
-            processed_data = result_df.sort_values(visualization_config["y"], ascending=False).head(top_n).to_dict('records')
-          elif chart_type == "pie" and visualization_config.get("values"):
-            processed_data = result_df.sort_values(visualization_config["values"], ascending=False).head(top_n).to_dict('records')
-        
-      except Exception as parse_error:
-        logger.warning(f"Failed to parse visualization config: {str(parse_error)}")
-        explanation = "Unable to generate visualization configuration"
-        visualization_config = None
-        processed_data = query_result
-    
-    response_data = {
-      "status": "success",
-      "timestamp": datetime.now().isoformat(),
-      "user_input": user_input,
-      "explanation": explanation,
-      "visualization_config": visualization_config,
-      "visualization_data": processed_data,
-      "data_summary": {
-        "row_count": len(result_df),
-        "columns": result_df.columns.tolist()
-      }
-    }
+    response_data = build_visualization_response(user_input, query_result, result_df, vis_state)
     
     logger.info("✅ Visualization config generated successfully")
     return jsonify(response_data), 200
@@ -199,11 +124,70 @@ def get_visualization():
     logger.error(f"❌ Error generating visualization: {error_msg}")
     logger.error(traceback.format_exc())
     
-    return jsonify({
-        "status": "error",
-        "error": error_msg,
-        "timestamp": datetime.now().isoformat()
-    }), 500
+    return jsonify(error_body(error_msg)), 500
+
+def read_user_input():
+  """Validate the /query JSON payload. Returns (user_input, None) or (None, error response)."""
+  user_input, error = read_query_payload(request.is_json, request.get_json(silent=True))
+  if error:
+    return None, (jsonify({"error": error, "status": "error"}), 400)
+  
+  # Check if graph is initialized
+  if text_to_sql_graph is None:
+    return None, (jsonify({
+      "error": "Text-to-SQL graph not initialized",
+      "status": "error"
+    }), 500)
+  
+  return user_input, None
+
+def columnar_query_response(user_input: str, mimetype: str):
+  """/query as columnar JSON, Arrow IPC or Parquet: the graph stops after validation and the cursor's chunks fill a ResultBuilder."""
+  start_time = datetime.now()
+  result = text_to_sql_graph.invoke(new_agent_state(user_input, defer_execution=True))
+  sql = rows_to_stream(result)
+  builder = None
+  if sql:
+    result["sql_executions"] = 1
+    try:
+      builder = fetch_result(sql, result_builder(mimetype))
+    except Exception as e:
+      result["execution_error"] = str(e)
+    record_deferred_execution(result, result.get("execution_error") is None)
+  execution_time = (datetime.now() - start_time).total_seconds()
+  
+  if builder is None:
+    # Nothing to encode (greeting, failed validation or execution): the JSON body says why
+    return jsonify(build_query_response(user_input, result, execution_time)), 200
+  
+  body = result_metadata(user_input, result, execution_time, builder.columns, builder.row_count, builder.truncated)
+  payload = builder.encode(mimetype, body)
+  logger.info(f"✅ Query processed in {execution_time:.2f}s, {builder.row_count} rows as {mimetype} ({len(payload)} bytes)")
+  return Response(payload, mimetype=mimetype, headers=columnar_headers(builder))
+
+def paged_query_response(user_input: str, page_size: int):
+  """/query with page_size: the graph stops after validation, the SQL runs on a held cursor and only the first page is fetched."""
+  start_time = datetime.now()
+  result = text_to_sql_graph.invoke(new_agent_state(user_input, defer_execution=True))
+  sql = rows_to_stream(result)
+  page = None
+  if sql:
+    result["sql_executions"] = 1
+    try:
+      page = open_paged_result(sql, page_size)
+    except Exception as e:
+      result["execution_error"] = str(e)
+    record_deferred_execution(result, result.get("execution_error") is None)
+  execution_time = (datetime.now() - start_time).total_seconds()
+  
+  if page is None:
+    return jsonify(build_query_response(user_input, result, execution_time)), 200
+  
+  paging_id, columns, rows, next_cursor = page
+  body = result_metadata(user_input, result, execution_time, columns)
+  body.update(page_body(columns, rows, paging_id, 0, next_cursor))
+  logger.info(f"✅ Query processed in {execution_time:.2f}s, first page of {len(rows)} rows" + (" (cursor held)" if paging_id else ""))
+  return jsonify(body), 200
 
 @app.route('/query', methods=['POST'])
 def process_query():
@@ -213,146 +197,46 @@ def process_query():
   Expected JSON payload:
   {
       "user_input": "Show me all customers from New York",
+      "page_size": 50,  # optional (or true): first page plus paging.next_cursor for /results/<paging.id>
       "session_id": "optional_session_id"
   }
+  
+  The result is row-oriented JSON unless ?format= or the Accept header asks for:
+  - columnar (application/vnd.text2sql.columnar+json): the same body with
+    query_result as {"columns": [{"name", "type"}], "data": [one array per column]}
+  - arrow / parquet (application/vnd.apache.arrow.stream / application/vnd.apache.parquet):
+    columnar bytes, with the JSON body in the schema metadata
   """
   try:
-    # Validate request
-    if not request.is_json:
-      return jsonify({
-        "error": "Content-Type must be application/json",
-        "status": "error"
-      }), 400
-    
-    data = request.get_json()
-    
-    # Validate required fields
-    if not data or 'user_input' not in data:
-      return jsonify({
-        "error": "Missing required field: user_input",
-        "status": "error"
-      }), 400
-    
-    user_input = data.get('user_input', '').strip()
-    session_id = data.get('session_id', 'default_session')
+    user_input, error_response = read_user_input()
+    if error_response:
+      return error_response
     
-    if not user_input:
-      return jsonify({
-        "error": "user_input cannot be empty",
-        "status": "error"
-      }), 400
-    
-    # Check if graph is initialized
-    if text_to_sql_graph is None:
-      return jsonify({
-        "error": "Text-to-SQL graph not initialized",
-        "status": "error"
-      }), 500
+    # ✅ Content negotiation: columnar JSON / Arrow IPC / Parquet on request, row-oriented JSON by default
+    mimetype = negotiate_format(request.args.get("format"), request.headers.get("Accept"))
+    if mimetype is None:
+      return jsonify({"error": UNSUPPORTED_FORMAT, "status": "error"}), 406
     
     logger.info(f"Processing query: {user_input[:100]}...")
     
-    # Create initial state
-    initial_state = AgentState(
-      user_input=user_input,
-      detected_intent=None,
-      relevant_columns=None,
-      relevant_tables=None,
-      similarity_scores=None,
-      generated_sql=None,
-      used_prompt=None,
-      schema_description=None,
-      validated_sql=None,
-      validation_passed=None,
-      validation_error=None,
-      query_result=None,
-      execution_error=None,
-      explanation=None,
-      suggestions=None,
-      final_output=None,
-      insights=None,
-      visualization_config=None,
-      visualization_data=None,
-      error=None,
-      debug_info={
-        'prompt': None,  # Will store the prompt sent to LLM
-        'schema_context': None  # Will store relevant schema context
-      }
-    )
+    if mimetype != JSON_MIMETYPE:
+      return columnar_query_response(user_input, mimetype)
+    
+    # ✅ Paging: first page now, later pages from the held cursor via /results/<id>
+    page_size, error = read_page_size(request.get_json())
+    if error:
+      return jsonify({"error": error, "status": "error"}), 400
+    if page_size:
+      return paged_query_response(user_input, page_size)
     
     # Execute the graph
     start_time = datetime.now()
-    result = text_to_sql_graph.invoke(initial_state)
+    result = text_to_sql_graph.invoke(new_agent_state(user_input))
     end_time = datetime.now()
     execution_time = (end_time - start_time).total_seconds()
     
-    query_results = []
-    query_metadata = {
-      "row_count": 0,
-      "columns": [],
-      "message": None
-    }
-    execution_error = None
-    
-    if result.get("generated_sql") and result.get("generated_sql").strip():
-      try:
-        logger.info(f"Executing SQL: {result.get('generated_sql')}")
-        result_df = run_query(result.get("generated_sql"))
-        
-        if not result_df.empty:
-          query_results = result_df.to_dict('records')
-          query_metadata = {
-            "message": f"Query returned {len(result_df)} row(s)",
-            "columns": result_df.columns.tolist(),
-            "row_count": len(result_df)
-          }
-        else: 
-          query_results = []
-          query_metadata = {
-            "columns": [],
-            "row_count": 0,
-            "message": "No data found for this query"
-          }
-        logger.info(f"SQL executed successfully, returned {len(result_df)} rows")
-      
-      except Exception as sql_error:
-        execution_error = str(sql_error)
-        logger.error(f"Error executing SQL: {execution_error}")
-        query_results = []
-        query_metadata = {
-          "row_count": 0,
-          "columns": [],
-          "message": f"SQL execution failed: {execution_error}"
-        }
-    
     # Prepare response
-    response_data = {
-      "status": "success",
-      "timestamp": datetime.now().isoformat(),
-      "execution_time": execution_time,
-      "user_input": user_input,
-      "prompt_sent_to_llm": result.get("debug_info", {}).get("prompt"),
-      "relevant_schema_context": result.get("debug_info", {}).get("schema_context"),
-      "detected_intent": result.get("detected_intent"),
-      "relevant_columns": result.get("relevant_columns", []),
-      "relevant_tables": result.get("relevant_tables", []),
-      "similarity_scores": result.get("similarity_scores", {}),
-      "generated_sql": result.get("generated_sql"),
-      "used_prompt": result.get("used_prompt"),
-      "schema_description": result.get("schema_description"),
-      "validated_sql": result.get("validated_sql"),
-      "validation_passed": result.get("validation_passed"),
-      "validation_error": result.get("validation_error"),
-      "query_result": query_results,
-      "query_metadata": query_metadata,
-      "execution_error": execution_error or result.get("execution_error"),
-      "explanation": result.get("explanation"),
-      "suggestions": result.get("suggestions", []),
-      "final_output": result.get("final_output"),
-      "insights": result.get("insights"),
-      "visualization_config": result.get("visualization_config"),
-      "visualization_data": result.get("visualization_data"),
-      "error": result.get("error")
-    }
+    response_data = build_query_response(user_input, result, execution_time)
     
     logger.info(f"✅ Query processed successfully in {execution_time:.2f}s")
     return jsonify(response_data), 200
@@ -362,11 +246,165 @@ def process_query():
     logger.error(f"❌ Error processing query: {error_msg}")
     logger.error(traceback.format_exc())
     
-    return jsonify({
-        "status": "error",
-        "error": error_msg,
-        "timestamp": datetime.now().isoformat()
-    }), 500
+    return jsonify(error_body(error_msg)), 500
+
+def sse_event(event: str, data) -> str:
+  return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+@app.route('/query/stream', methods=['POST'])
+def stream_query():
+  """
+  Same payload as /query; answers with Server-Sent Events instead of one JSON body:
+    event: node       {"node", "elapsed_ms", ...progress fields}  after each graph node
+    event: sql_token  {"node", "token"}                            while SQL is generated
+    event: result     the /query response body
+    event: error      {"status": "error", "error"}
+  """
+  user_input, error_response = read_user_input()
+  if error_response:
+    return error_response
+  
+  logger.info(f"Streaming query: {user_input[:100]}...")
+  
+  def generate():
+    start_time = datetime.now()
+    final_state = None
+    sql_tokens = {}  # node -> SqlTokenFilter
+    try:
+      for mode, payload in text_to_sql_graph.stream(
+        new_agent_state(user_input), stream_mode=["updates", "messages", "values"]
+      ):
+        if mode == "messages":
+          chunk, metadata = payload
+          token = getattr(chunk, "content", "")
+          node = metadata.get("langgraph_node")
+          if token and node in SQL_TOKEN_NODES:
+            token = sql_tokens.setdefault(node, SqlTokenFilter()).feed(token)
+            if token:
+              yield sse_event("sql_token", {"node": node, "token": token})
+        elif mode == "updates":
+          elapsed_ms = round((datetime.now() - start_time).total_seconds() * 1000, 1)
+          for node, update in payload.items():
+            yield sse_event("node", {"node": node, "elapsed_ms": elapsed_ms, **node_progress(update)})
+        else:
+          final_state = payload
+      
+      execution_time = (datetime.now() - start_time).total_seconds()
+      yield sse_event("result", build_query_response(user_input, state_dict(final_state), execution_time))
+      logger.info(f"✅ Streamed query processed in {execution_time:.2f}s")
+    except Exception as e:
+      logger.error(f"❌ Error streaming query: {str(e)}")
+      logger.error(traceback.format_exc())
+      yield sse_event("error", error_body(str(e)))
+  
+  return Response(
+    stream_with_context(generate()),
+    mimetype="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # no proxy buffering
+  )
+
+@app.route('/query/rows', methods=['POST'])
+def stream_query_rows():
+  """
+  Same payload as /query (plus an optional "chunk_size"); streams the result as
+  newline-delimited JSON from a server-side cursor, without max_result_rows:
+    {"meta": {...}}              the /query body without query_result; meta.query_metadata.columns
+    [value, value, ...]          one array per row, in column order
+    {"end": {"row_count": n}}    or {"error": "..."} when the query fails mid-stream
+  Rows are fetched settings.stream_chunk_rows at a time, so memory stays flat.
+  """
+  try:
+    user_input, error_response = read_user_input()
+    if error_response:
+      return error_response
+    
+    logger.info(f"Streaming rows for query: {user_input[:100]}...")
+    
+    # The graph stops after validation; the SQL runs while the response streams
+    start_time = datetime.now()
+    result = text_to_sql_graph.invoke(new_agent_state(user_input, defer_execution=True))
+    execution_time = (datetime.now() - start_time).total_seconds()
+    sql = rows_to_stream(result)
+    chunk_size = request.get_json().get("chunk_size")
+    
+  except Exception as e:
+    error_msg = str(e)
+    logger.error(f"❌ Error processing query: {error_msg}")
+    logger.error(traceback.format_exc())
+    return jsonify(error_body(error_msg)), 500
+  
+  def generate():
+    if sql is None:
+      yield ndjson_line(build_rows_meta(user_input, result, execution_time, []))
+      yield ndjson_line({"end": {"row_count": 0}})
+      return
+    chunks = stream_rows(sql, chunk_size if isinstance(chunk_size, int) and chunk_size > 0 else None)
+    row_count = 0
+    try:
+      try:
+        columns = next(chunks)
+      except Exception as e:
+        record_deferred_execution(result, False)
+        yield ndjson_line(build_rows_meta(user_input, result, execution_time, [], execution_error=str(e)))
+        yield ndjson_line({"end": {"row_count": 0}})
+        return
+      yield ndjson_line(build_rows_meta(user_input, result, execution_time, columns))
+      for rows in chunks:
+        row_count += len(rows)
+        yield "".join(ndjson_line(row) for row in rows)
+      record_deferred_execution(result, True)
+      yield ndjson_line({"end": {"row_count": row_count}})
+      logger.info(f"✅ Streamed {row_count} rows")
+    except Exception as e:
+      logger.error(f"❌ Error streaming rows after {row_count}: {str(e)}")
+      record_deferred_execution(result, False)
+      yield ndjson_line({"error": str(e)})
+    finally:
+      chunks.close()  # returns the connection when the client disconnects early
+  
+  return Response(
+    stream_with_context(generate()),
+    mimetype="application/x-ndjson",
+    headers={"X-Accel-Buffering": "no"}
+  )
+
+@app.route('/results/<paging_id>', methods=['GET'])
+def get_result_page(paging_id):
+  """
+  A later page of a paged /query (payload with "page_size")
+  
+  GET /results/<paging.id>?cursor=<paging.next_cursor>
+  Any cursor returned earlier can be read again. A worker that no longer
+  holds the result's cursor runs the query again; 404 once the paging id
+  was unused for paging.reopen_seconds.
+  """
+  try:
+    offset = parse_cursor(request.args.get("cursor"))
+  except ValueError:
+    return jsonify({"error": INVALID_CURSOR, "status": "error"}), 400
+  
+  try:
+    page = read_page(paging_id, offset)
+  except Exception as e:
+    error_msg = str(e)
+    logger.error(f"❌ Error reading result page: {error_msg}")
+    logger.error(traceback.format_exc())
+    return jsonify(error_body(error_msg)), 500
+  
+  if page is None:
+    return jsonify({"error": PAGING_NOT_FOUND, "status": "error"}), 404
+  
+  columns, rows, next_cursor = page
+  return jsonify({
+    "status": "success",
+    "timestamp": datetime.now().isoformat(),
+    **page_body(columns, rows, paging_id, offset, next_cursor)
+  }), 200
+
+@app.route('/results/<paging_id>', methods=['DELETE'])
+def close_result_pages(paging_id):
+  """Release the held cursor before it goes idle."""
+  return jsonify({"status": "success", "closed": close_paged_result(paging_id)}), 200
 
 @app.errorhandler(404)
 def not_found(error):
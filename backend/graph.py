@@ -3,13 +3,17 @@
 Wires all nodes with conditional logic and state transitions.
 """
 
+import logging
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph
 from state import AgentState
+from core.config_loader import load_config
 
 # Import all nodes
+from nodes.answer_cache import cache_lookup_node, cache_update_node
 from nodes.schema_initializer import schema_initializer_node  # ✅ NEW
 from nodes.intent_classifier import intent_classifier_node
 from nodes.embedding_matcher import embedding_matcher_node
@@ -21,55 +25,181 @@ from nodes.logger import logger_node
 from nodes.insights import insights_node
 from nodes.visualization import visualization_node
 
+config = load_config()
+GRAPH_CONFIG = config.get("graph", {})
+logger = logging.getLogger(__name__)
+
+
+def speculative(*nodes):
+    """
+    Run nodes one after another as a single speculative step, so the whole
+    chain overlaps intent classification (LangGraph runs the nodes of a step
+    in parallel, but steps one after another). A failure is logged instead of
+    failing the request: a greeting must not fail because retrieval did, and
+    intent_join sends data questions without SQL to sql_generator to retry.
+    """
+    def speculative_updates(updates: dict) -> dict:
+        # intent_classifier writes debug_info in the same step; intent_join promotes this copy
+        if "debug_info" in updates:
+            updates["speculative_debug_info"] = updates.pop("debug_info")
+        return updates
+
+    def run(state: AgentState) -> dict:
+        updates = {}
+        try:
+            for node in nodes:
+                update = node.invoke(state)
+                updates.update(update)
+                state = state.copy(update=update)
+        except Exception as e:
+            logger.warning(f"Speculative step failed, retried after intent classification: {str(e)}")
+        return speculative_updates(updates)
+
+    async def arun(state: AgentState) -> dict:
+        # graph.ainvoke (asgi_api.py): the nodes' async variants await their I/O
+        updates = {}
+        try:
+            for node in nodes:
+                update = await node.ainvoke(state)
+                updates.update(update)
+                state = state.copy(update=update)
+        except Exception as e:
+            logger.warning(f"Speculative step failed, retried after intent classification: {str(e)}")
+        return speculative_updates(updates)
+
+    return RunnableLambda(run, afunc=arun)
+
+
+def on_event_loop(node: RunnableLambda) -> RunnableLambda:
+    """
+    Under graph.ainvoke (asgi_api.py) LangGraph runs sync-only nodes in a
+    thread pool. For a node that only rearranges state (no I/O, locks, model
+    or index builds, or work that grows with the result) the thread hop
+    costs more than the node: run it on the loop instead. Anything heavier
+    (the validator's optional EXPLAIN, the formatter's markdown table, the
+    log file, answer cache updates) stays on the thread pool.
+    """
+    func = node.func
+
+    async def afunc(state: AgentState):
+        return func(state)
+    return RunnableLambda(func, afunc=afunc)
+
+
+def join_intent_and_retrieval(state: AgentState) -> dict:
+    """
+    Meeting point of the speculative branches. For greet/fallback the
+    speculative schema retrieval and SQL are discarded.
+    """
+    if state.detected_intent in ("ask_question", "undecided"):
+        return {"debug_info": state.speculative_debug_info} if state.speculative_debug_info else {}
+    return {
+        "schema_key": None,
+        "relevant_columns": None,
+        "relevant_tables": None,
+        "generated_sql": None,
+        "used_prompt": None,
+        "debug_info": {
+            "user_query": state.user_input,
+            "detected_intent": state.detected_intent,
+            "reason": state.error or "SQL generation skipped due to intent classification"
+        },
+    }
+
 
 def create_graph():
 
     # Define the graph
     graph = StateGraph(AgentState)
 
+    # ⚡ graph.speculative_retrieval: schema retrieval (and, with speculative_generation,
+    # SQL generation) runs in parallel with intent classification, so the critical
+    # path is the slower branch instead of their sum. Opt-in: greet/fallback turns
+    # then also pay for the retrieval they discard
+    speculative_retrieval = GRAPH_CONFIG.get("speculative_retrieval", False)
+    speculative_sql = speculative_retrieval and GRAPH_CONFIG.get("speculative_generation", False) \
+        and not config["llm"].get("combined_intent_sql", False)  # the combined call needs the intent first
+
     # ➕ Add all nodes
-    graph.add_node("schema_init", schema_initializer_node)        # ✅ NEW
+    graph.add_node("cache_lookup", cache_lookup_node)
+    graph.add_node("schema_init", schema_initializer_node)  # ✅ NEW
     graph.add_node("intent_classifier", intent_classifier_node)
     graph.add_node("embedding_matcher", embedding_matcher_node)
     graph.add_node("sql_generator", sql_generator_node)         # ✅ returns RunnableLambda
-    graph.add_node("sql_validator", sql_validator_node)         # ✅ returns RunnableLambda
+    graph.add_node("sql_validator", sql_validator_node)  # ✅ returns RunnableLambda
     graph.add_node("sql_executor", sql_executor_node)
+    graph.add_node("cache_update", cache_update_node)
     graph.add_node("formatter", formatter_node)
     graph.add_node("logger", logger_node)
     graph.add_node("insights", insights_node)
     graph.add_node("visualization", visualization_node)
 
-    # 🔁 Entry point → schema initializer → intent classifier
-    graph.set_entry_point("schema_init")                          # ✅ start with schema init
-    graph.add_edge("schema_init", "intent_classifier")            # ✅ connect it to next step
+    # 🔁 Entry point → semantic answer cache; a hit skips intent, retrieval and generation
+    graph.set_entry_point("cache_lookup")
+    graph.add_conditional_edges(
+        "cache_lookup",
+        lambda s: "sql_validator" if s.cache_hit
+        else "schema_init" if speculative_retrieval
+        else "intent_classifier",  # greet/fallback never touch the schema
+        ["sql_validator", "schema_init", "intent_classifier"]
+    )
+
+    if speculative_retrieval:
+        # ⚡ Fan-out: intent classification ∥ retrieval (+ SQL generation), joined in intent_join
+        if speculative_sql:
+            graph.add_node("speculative_retrieval", speculative(embedding_matcher_node, sql_generator_node))
+        else:
+            graph.add_node("speculative_retrieval", speculative(embedding_matcher_node))
+        graph.add_node("intent_join", on_event_loop(RunnableLambda(join_intent_and_retrieval)))
+        graph.add_edge("schema_init", "intent_classifier")
+        graph.add_edge("schema_init", "speculative_retrieval")
+        # Waits for both branches; greet/fallback discard the speculative work
+        graph.add_edge(["intent_classifier", "speculative_retrieval"], "intent_join")
+        graph.add_conditional_edges(
+            "intent_join",
+            lambda s: "formatter" if s.detected_intent not in ("ask_question", "undecided")
+            else "sql_validator" if s.generated_sql is not None
+            else "sql_generator",
+            ["formatter", "sql_validator", "sql_generator"]
+        )
+    else:
+        # 🔀 Conditional branching after intent classification
+        graph.add_conditional_edges(
+            "intent_classifier",
+            lambda s: s.detected_intent or "fallback",  # ✅ Default to 'fallback'
+            {
+                "ask_question": "schema_init",
+                "undecided": "schema_init",  # ✅ llm.combined_intent_sql: sql_generator decides intent and SQL
+                "greet": "formatter",
+                "fallback": "formatter"
+            }
+        )
+        # ➡️ Sequential steps with semantic matching
+        graph.add_edge("schema_init", "embedding_matcher")         # ✅ schema context only for data questions
+        graph.add_edge("embedding_matcher", "sql_generator")       # ✅ NEW: Apply semantic corrections
 
-    # 🔀 Conditional branching after intent classification
     graph.add_conditional_edges(
-        "intent_classifier",
-        lambda s: s.detected_intent or "fallback",  # ✅ Default to 'fallback'
+        "sql_generator",
+        lambda s: s.detected_intent == "ask_question",  # False only after a combined call said greet/fallback
         {
-            "ask_question": "embedding_matcher",
-            "greet": "formatter",
-            "fallback": "formatter"
+            True: "sql_validator",
+            False: "formatter"
         }
     )
 
-    # ➡️ Sequential steps with semantic matching
-    graph.add_edge("embedding_matcher", "sql_generator")           # ✅ NEW: Apply semantic corrections
-    graph.add_edge("sql_generator", "sql_validator")
-
     # 🔀 Conditional branching after SQL validation
     graph.add_conditional_edges(
         "sql_validator",
-        lambda s: s.validation_passed if s.validation_passed is not None else False,
+        lambda s: bool(s.validation_passed) and not s.defer_execution,  # deferred runs execute outside the graph
         {
             True: "sql_executor",
-            False: "formatter"
+            False: "cache_update"
         }
     )
 
     # ➡️ Final steps
-    graph.add_edge("sql_executor", "formatter")
+    graph.add_edge("sql_executor", "cache_update")                 # ✅ remember SQL that executed
+    graph.add_edge("cache_update", "formatter")
     graph.add_edge("formatter", "logger")
 
     # 🛑 Define finish point
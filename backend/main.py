@@ -1,8 +1,8 @@
 import streamlit as st
 from graph import create_graph
 from state import AgentState
-from core.db_utils import run_query  # ✅ Make sure this file exists
 import numpy as np
+import pandas as pd
 from core.embedding_loader import load_embedding_model
 from core.config_loader import load_config
 
@@ -157,9 +157,11 @@ with col2:
                     st.code(final_state.generated_sql, language="sql")
                     st.markdown('</div>', unsafe_allow_html=True)
 
-                    # ✅ Step 3: Run SQL and show result table
+                    # ✅ Step 3: Show the result table produced by sql_executor_node (no second execution)
                     try:
-                        result_df = run_query(final_state.generated_sql)
+                        result_df = final_state.query_result
+                        if not isinstance(result_df, pd.DataFrame):
+                            raise RuntimeError(final_state.validation_error or final_state.execution_error or "No query result available.")
                         if result_df.empty:
                             st.markdown('<div class="card">', unsafe_allow_html=True)
                             st.warning("No data found in the database for this query.")
@@ -0,0 +1,73 @@
+# nodes/answer_cache.py
+
+"""
+✅ Semantic Answer Cache Nodes
+cache_lookup (graph entry): encodes the question once and, on a hit, sets the
+cached SQL and routes straight to sql_validator.
+cache_update (before formatter): stores SQL that validated and executed, and
+drops cached SQL that no longer validates or executes. With defer_execution
+the SQL has not run yet: the server calls record_deferred_execution once the
+rows were sent (/query/rows, columnar formats, paged /query).
+"""
+
+from langchain_core.runnables import RunnableLambda
+from core.answer_cache import answer_cache_enabled, get_answer_cache
+from core.metadata_store import get_metadata_store
+from core.model_registry import get_sentence_transformer
+from core.retrieval_context import RetrievalContext
+from state import AgentState
+
+def cache_lookup(state: AgentState) -> AgentState:
+    if not answer_cache_enabled() or not (state.user_input or "").strip():
+        return state.copy(update={"cache_hit": False})
+
+    # ✅ The embedding is computed once; embedding_matcher reuses it on a miss
+    ctx = RetrievalContext.encode(state.user_input, get_sentence_transformer())
+    schema_key = get_metadata_store().fingerprint
+    entry, similarity = get_answer_cache().lookup(state.user_input, ctx.vector, schema_key)
+    if entry is None:
+        return state.copy(update={"retrieval_context": ctx, "cache_hit": False})
+
+    return state.copy(update={
+        "retrieval_context": ctx,
+        "cache_hit": True,
+        "detected_intent": "ask_question",
+        "schema_key": schema_key,
+        "generated_sql": entry.sql,
+        "used_prompt": "semantic_cache",
+        "debug_info": {
+            "user_query": state.user_input,
+            "detected_intent": "ask_question",
+            "reason": "Reused SQL of a semantically equivalent cached question",
+            "cached_question": entry.question,
+            "cache_similarity": round(similarity, 4),
+            "sql": entry.sql,
+        },
+    })
+
+def record_outcome(user_input: str, retrieval_context, sql: str, schema_key: str, cache_hit: bool, succeeded: bool):
+    """Store SQL that validated and executed; drop a cached SQL that failed."""
+    if not answer_cache_enabled() or retrieval_context is None or not sql:
+        return
+    cache = get_answer_cache()
+    if cache_hit:
+        if not succeeded:
+            cache.discard(sql)
+    elif succeeded:
+        cache.store(user_input, retrieval_context.vector, sql, schema_key)
+
+def cache_update(state: AgentState) -> AgentState:
+    if state.defer_execution and state.validation_passed:
+        return state  # not executed yet: record_deferred_execution settles it
+    succeeded = state.validation_passed and state.execution_error is None and state.query_result is not None
+    record_outcome(state.user_input, state.retrieval_context, state.generated_sql, state.schema_key,
+                   state.cache_hit, succeeded)
+    return state
+
+def record_deferred_execution(result: dict, succeeded: bool):
+    """cache_update for a defer_execution run, once the caller executed the SQL (result: final graph state)."""
+    record_outcome(result.get("user_input"), result.get("retrieval_context"), result.get("generated_sql"),
+                   result.get("schema_key"), result.get("cache_hit"), succeeded)
+
+cache_lookup_node = RunnableLambda(cache_lookup)
+cache_update_node = RunnableLambda(cache_update)
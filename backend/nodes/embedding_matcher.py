@@ -1,67 +1,13 @@
+import asyncio
 from core.config_loader import load_config
+from core.retrieval_context import RetrievalContext
+from core.model_registry import get_sentence_transformer
+from core.schema_search import asearch_schema, match_relevant_columns
 config = load_config()
 SEM_SEARCH = config['semantic_search']
 
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
 from langchain_core.runnables import RunnableLambda
 
-COLLECTION_NAME = "schema_embeddings"
-model = SentenceTransformer(config['sentence_transformer']['model'])
-client = QdrantClient(config['qdrant']['host'], port=config['qdrant']['port'])
-
-# Helper to filter by type
-def filter_by_type(type_name):
-    return Filter(must=[FieldCondition(key="type", match=MatchValue(value=type_name))])
-
-def match_relevant_columns(query: str) -> list:
-    top_k = SEM_SEARCH['column_top_k']
-    query_emb = model.encode([query])[0]
-    hits = client.search(
-        collection_name=COLLECTION_NAME,
-        query_vector=query_emb,
-        limit=top_k * 2,  # get more, filter below
-        query_filter=filter_by_type("column")
-    )
-    # Return column names in format table.column
-    return [f"{hit.payload['table_name']}.{hit.payload['column_name']}" for hit in hits[:top_k]]
-
-def match_relevant_tables(query: str) -> list:
-    top_k = SEM_SEARCH['table_top_k']
-    query_emb = model.encode([query])[0]
-    hits = client.search(
-        collection_name=COLLECTION_NAME,
-        query_vector=query_emb,
-        limit=top_k * 2,
-        query_filter=filter_by_type("table")
-    )
-    return [hit.payload['table_name'] for hit in hits[:top_k]]
-
-def match_relevant_values(query: str) -> list:
-    top_k = SEM_SEARCH['value_top_k']
-    # For value-level semantics, just return the top columns with possible_values
-    query_emb = model.encode([query])[0]
-    hits = client.search(
-        collection_name=COLLECTION_NAME,
-        query_vector=query_emb,
-        limit=top_k * 3,
-        query_filter=filter_by_type("column")
-    )
-    results = []
-    for hit in hits:
-        payload = hit.payload
-        if payload.get('possible_values'):
-            results.append({
-                "table": payload['table_name'],
-                "column": payload['column_name'],
-                "possible_values": payload['possible_values'],
-                "description": payload.get('description', '')
-            })
-        if len(results) >= top_k:
-            break
-    return results
-
 def extract_tables_from_columns(columns: list) -> list:
     tables = set()
     for col in columns:
@@ -70,10 +16,27 @@ def extract_tables_from_columns(columns: list) -> list:
             tables.add(table)
     return list(tables)
 
-embedding_matcher_node = RunnableLambda(
-    lambda state: state.copy(update={
-        "relevant_columns": (cols := match_relevant_columns(state.user_input)),
+def schema_update(ctx: RetrievalContext) -> dict:
+    cols = match_relevant_columns(ctx)
+    # Partial update: this node may run in parallel with intent_classifier
+    return {
+        "retrieval_context": ctx,
+        "relevant_columns": cols,
         "relevant_tables": extract_tables_from_columns(cols),
-        "relevant_tables_table_emb": match_relevant_tables(state.user_input)
-    })
-)
+    }
+
+def match_schema(state):
+    # ✅ Encode the question once (cache_lookup may already have); sql_generator reuses the context
+    ctx = state.retrieval_context or RetrievalContext.encode(state.user_input, get_sentence_transformer())
+    return schema_update(ctx)
+
+async def amatch_schema(state):
+    """match_schema with the vector search awaited (ASGI server)."""
+    ctx = state.retrieval_context
+    if ctx is None:
+        # Encoding is CPU-bound: keep it off the event loop
+        ctx = await asyncio.to_thread(RetrievalContext.encode, state.user_input, get_sentence_transformer())
+    await asearch_schema(ctx)
+    return schema_update(ctx)
+
+embedding_matcher_node = RunnableLambda(match_schema, afunc=amatch_schema)
@@ -5,108 +5,166 @@
 Detects user intent: ask_question, greet, or fallback.
 """
 
+import asyncio
+import logging
+import time
 from langchain_core.runnables import RunnableLambda
 from langchain_core.messages import HumanMessage
 from core.llm_loader import load_llm
+from core.llm_cache import cached_ainvoke, cached_invoke
+from core.intent_index import fast_path_enabled, get_intent_index, intent_index_ready, record_intent_call
+from core.config_loader import load_config
 from state import AgentState
 
+config = load_config()
 llm = load_llm()
+logger = logging.getLogger(__name__)
+
+# Labelled utterances: rendered into the LLM prompt and used by the local kNN fast path
+INTENT_EXAMPLES = [
+    ("Hello there!", "greet"),
+    ("Hi!", "greet"),
+    ("Good morning!", "greet"),
+    ("What is the average loan amount by loan type?", "ask_question"),
+    ("List all customers who have never missed a payment.", "ask_question"),
+    ("Show all accounts with a negative balance.", "ask_question"),
+    ("How many employees work at the Mumbai branch?", "ask_question"),
+    ("List all transactions above $1000 in the last month.", "ask_question"),
+    ("Who are the top 5 customers by account balance?", "ask_question"),
+    ("List all people with their phone numbers.", "ask_question"),
+    ("Show me people who have loans.", "ask_question"),
+    ("Get phone numbers for all customers.", "ask_question"),
+    ("List people with their addresses.", "ask_question"),
+    ("Show customer contact information.", "ask_question"),
+    ("Create a list of customers in the North region.", "ask_question"),
+    ("Delete all accounts with a zero balance.", "fallback"),
+    ("Update the phone number of customer 42.", "fallback"),
+    ("Can you sing a song?", "fallback"),
+    ("Tell me a joke.", "fallback"),
+    ("What's the weather today?", "fallback"),
+    ("Who won the cricket match yesterday?", "fallback"),
+]
 
-FORBIDDEN_KEYWORDS = [
-    "delete", "update", "remove", "insert", "drop", "alter", "truncate", "create", "grant", "revoke", "erase"
+# Only for the fast path (kept out of the prompt): every label needs well over intent_classifier.k
+# utterances, or its questions never win the k-nearest vote
+FAST_PATH_EXAMPLES = INTENT_EXAMPLES + [
+    (text, "greet") for text in (
+        "Hello", "Hey", "Hey there!", "Hi there", "Hiya", "Greetings!", "Good afternoon!",
+        "Good evening", "Morning!", "Howdy!", "Hello, how are you?", "Hi, how's it going?",
+        "Hey, what's up?", "Nice to meet you!", "Hello assistant",
+    )
 ]
 
-def detect_intent_and_reason(user_query: str) -> (str, str):
-    lowered = user_query.lower()
-    if any(word in lowered for word in FORBIDDEN_KEYWORDS):
-        return "fallback", "Data manipulation not allowed. Only read-only (SELECT) queries are supported."
-    # Otherwise, use LLM as before
-    prompt = """You are an intent classifier for a banking text-to-SQL agent.
+INTENT_PROMPT = """You are an intent classifier for a banking text-to-SQL agent.
 Classify the user's query into one of these intents: ask_question, greet, fallback.
 Respond with only one of: ask_question, greet, fallback.
 
 Definitions:
 - ask_question: The user is asking a question about banking data (accounts, loans, balances, transactions, branches, employees, customers, people, phone numbers, addresses, etc.)
 - greet: The user is greeting (hello, hi, good morning, etc.)
-- fallback: The user is asking something completely unrelated to banking or not a question.
+- fallback: The user is asking something completely unrelated to banking, not a question, or asking to change data (delete, update, insert, drop, ...).
 
 IMPORTANT: In banking context, "people" refers to "customers", "phone numbers" are customer contact details, and "addresses" are customer addresses. These are all banking-related queries.
 
 Examples:
-User: Hello there!
-Intent: greet
-
-User: Hi!
-Intent: greet
-
-User: Good morning!
-Intent: greet
-
-User: What is the average loan amount by loan type?
-Intent: ask_question
-
-User: List all customers who have never missed a payment.
-Intent: ask_question
-
-User: Show all accounts with a negative balance.
-Intent: ask_question
-
-User: How many employees work at the Mumbai branch?
-Intent: ask_question
-
-User: List all transactions above $1000 in the last month.
-Intent: ask_question
-
-User: Who are the top 5 customers by account balance?
-Intent: ask_question
-
-User: List all people with their phone numbers.
-Intent: ask_question
-
-User: Show me people who have loans.
-Intent: ask_question
-
-User: Get phone numbers for all customers.
-Intent: ask_question
-
-User: List people with their addresses.
-Intent: ask_question
-
-User: Show customer contact information.
-Intent: ask_question
-
-User: Can you sing a song?
-Intent: fallback
-
-User: Tell me a joke.
-Intent: fallback
-
-User: What's the weather today?
-Intent: fallback
-
-User: Who won the cricket match yesterday?
-Intent: fallback
-
-User: {query}
-Intent:""".format(query=user_query)
-
-    response = llm.invoke([HumanMessage(content=prompt)])
-    intent = response.content.strip().lower()
+{examples}
+
+User: {{query}}
+Intent:""".format(examples="\n\n".join(f"User: {text}\nIntent: {label}" for text, label in INTENT_EXAMPLES))
+
+# llm.combined_intent_sql: intents the fast path cannot decide are left to sql_generator's combined call
+COMBINED_INTENT_SQL = config["llm"].get("combined_intent_sql", False)
+UNDECIDED = "undecided"
+
+FALLBACK_REASON = "Query is unrelated to banking, not a valid question, or asks to modify data. Only read-only (SELECT) queries are supported."
+
+def classify_locally(user_query: str, vector=None):
+    """kNN fast path: (intent, similarity, agreement), intent None in the ambiguous band."""
+    if vector is None:
+        from core.model_registry import get_sentence_transformer
+        vector = get_sentence_transformer().encode([user_query])[0]
+    return get_intent_index(FAST_PATH_EXAMPLES).classify(vector)
+
+def fast_path_intent(user_query: str, vector=None):
+    """Intent from the local classifier, or None when it is disabled, unavailable or unsure."""
+    if not fast_path_enabled():
+        return None
+    start = time.perf_counter()
+    try:
+        intent, _, _ = classify_locally(user_query, vector)
+    except Exception as e:
+        # The LLM still answers; the fast path is only an optimization
+        logger.warning(f"Local intent classifier unavailable: {str(e)}")
+        return None
+    if intent is not None:
+        record_intent_call("fast_path", time.perf_counter() - start)
+    return intent
+
+def with_reason(intent: str) -> (str, str):
     if intent == "fallback":
-        return "fallback", "Query is unrelated to banking or not a valid question."
+        return "fallback", FALLBACK_REASON
     return intent, ""
 
-# ✅ RunnableLambda for AgentState
-intent_classifier_node = RunnableLambda(
-    lambda state: (
-        lambda intent, reason: state.copy(update={
+def intent_messages(user_query: str) -> list:
+    return [HumanMessage(content=INTENT_PROMPT.format(query=user_query))]
+
+# Read-only enforcement happens on the generated SQL (core/sql_guard.py), not on
+# words in the question: "create a list of customers" is a valid question.
+def detect_intent_and_reason(user_query: str, vector=None, allow_undecided: bool = False) -> (str, str):
+    intent = fast_path_intent(user_query, vector)
+    if intent is not None:
+        return with_reason(intent)
+    if allow_undecided:
+        return UNDECIDED, ""
+
+    start = time.perf_counter()
+    # ✅ Same prompt, same answer: repeated questions are served from the persistent cache
+    intent = cached_invoke(llm, intent_messages(user_query)).strip().lower()
+    record_intent_call("llm", time.perf_counter() - start)
+    return with_reason(intent)
+
+async def adetect_intent_and_reason(user_query: str, vector=None, allow_undecided: bool = False) -> (str, str):
+    """detect_intent_and_reason with the LLM call awaited (ASGI server)."""
+    if vector is not None and intent_index_ready():
+        intent = fast_path_intent(user_query, vector)  # a kNN lookup over the built index
+    else:
+        # Encoding the question or building the index is CPU-bound: keep it off the event loop
+        intent = await asyncio.to_thread(fast_path_intent, user_query, vector)
+    if intent is not None:
+        return with_reason(intent)
+    if allow_undecided:
+        return UNDECIDED, ""
+
+    start = time.perf_counter()
+    intent = (await cached_ainvoke(llm, intent_messages(user_query))).strip().lower()
+    record_intent_call("llm", time.perf_counter() - start)
+    return with_reason(intent)
+
+def intent_update(state: AgentState, intent: str, reason: str) -> dict:
+    # A partial update: may run in parallel with retrieval
+    return {
+        "detected_intent": intent,
+        "debug_info": {
+            "user_query": state.user_input,
             "detected_intent": intent,
-            "debug_info": {
-                "user_query": state.user_input,
-                "detected_intent": intent,
-                "reason": reason or "Intent classification completed"
-            },
-            "error": reason if intent == "fallback" else None
-        })
-    )(*detect_intent_and_reason(state.user_input))
-)
+            "reason": reason or "Intent classification completed"
+        },
+        "error": reason if intent == "fallback" else None
+    }
+
+def question_vector(state: AgentState):
+    # ✅ Encoded once by cache_lookup
+    return state.retrieval_context.vector if state.retrieval_context is not None else None
+
+def classify_intent(state: AgentState) -> dict:
+    return intent_update(state, *detect_intent_and_reason(
+        state.user_input, question_vector(state), allow_undecided=COMBINED_INTENT_SQL
+    ))
+
+async def aclassify_intent(state: AgentState) -> dict:
+    return intent_update(state, *await adetect_intent_and_reason(
+        state.user_input, question_vector(state), allow_undecided=COMBINED_INTENT_SQL
+    ))
+
+# ✅ RunnableLambda for AgentState; graph.ainvoke (asgi_api.py) uses the async variant
+intent_classifier_node = RunnableLambda(classify_intent, afunc=aclassify_intent)
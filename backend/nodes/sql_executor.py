@@ -2,31 +2,56 @@
 
 from langchain_core.runnables import RunnableLambda
 from core.db_utils import run_query
+from core.async_db import arun_query
 from state import AgentState
 import pandas as pd
 
-def execute_sql_query(state: AgentState) -> AgentState:
-    try:
-        query = getattr(state, 'validated_sql', None) or state.generated_sql
-        if not query:
-            state.query_result = None
-            state.error = "No SQL query provided."
-            return state
+def executor_query(state: AgentState):
+    return getattr(state, 'validated_sql', None) or state.generated_sql
 
-        result = run_query(query)
+def execution_update(state: AgentState, result=None, error: Exception = None) -> AgentState:
+    if error is not None:
+        state.query_result = None
+        state.execution_error = str(error)
+        state.error = f"❌ Query Execution Error: {str(error)}"
+    # ✅ Ensure it's a DataFrame
+    elif isinstance(result, pd.DataFrame):
+        state.query_result = result
+        state.result_truncated = result.attrs.get("truncated", False)
+        state.error = None
+    else:
+        state.query_result = None
+        state.error = str(result)  # This is likely an error message string
+    return state
 
-        # ✅ Ensure it's a DataFrame
-        if isinstance(result, pd.DataFrame):
-            state.query_result = result
-            state.error = None
-        else:
-            state.query_result = None
-            state.error = str(result)  # This is likely an error message string
+def execute_sql_query(state: AgentState) -> AgentState:
+    query = executor_query(state)
+    if not query:
+        state.query_result = None
+        state.error = "No SQL query provided."
+        return state
 
+    # ✅ The single execution of this question; flask_api and main.py reuse the result
+    state.sql_executions = (state.sql_executions or 0) + 1
+    try:
+        result = run_query(query)
     except Exception as e:
+        return execution_update(state, error=e)
+    return execution_update(state, result)
+
+async def aexecute_sql_query(state: AgentState) -> AgentState:
+    """execute_sql_query on the asyncpg pool (ASGI server)."""
+    query = executor_query(state)
+    if not query:
         state.query_result = None
-        state.error = f"❌ Query Execution Error: {str(e)}"
+        state.error = "No SQL query provided."
+        return state
 
-    return state
+    state.sql_executions = (state.sql_executions or 0) + 1
+    try:
+        result = await arun_query(query)
+    except Exception as e:
+        return execution_update(state, error=e)
+    return execution_update(state, result)
 
-sql_executor_node = RunnableLambda(execute_sql_query)
+sql_executor_node = RunnableLambda(execute_sql_query, afunc=aexecute_sql_query)
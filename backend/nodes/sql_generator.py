@@ -1,46 +1,109 @@
 """
 🧠 SQL Generator Node (Semantic Prompt Builder)
 Generates SQL from natural language using semantic prompt construction.
+
+With llm.combined_intent_sql enabled, questions the local intent classifier
+left undecided get one JSON-mode call that returns {"intent", "sql"}
+instead of an LLM intent call followed by SQL generation.
 """
 
 from langchain_core.runnables import RunnableLambda
 from core.llm_loader import load_llm
+from core.llm_cache import cached_ainvoke, cached_invoke
 from core.config_loader import load_config
 from core import prompt_builder
+from core.fewshot_selector import estimate_tokens
+from nodes.intent_classifier import FALLBACK_REASON, UNDECIDED
 from state import AgentState
-import re
+import json
 
 # ✅ Load config and LLM
 config = load_config()
 llm = load_llm()
 
-# ✅ Safe query validator (disallows data manipulation)
-def is_valid_query(sql: str) -> bool:
-    sql = sql.strip().lower()
-    forbidden_keywords = ['insert', 'update', 'delete', 'drop', 'alter', 'truncate']
-    return not any(re.match(fr"^{kw}\b", sql) for kw in forbidden_keywords)
+INTENTS = ("ask_question", "greet", "fallback")
 
-# ✅ SQL Generator Node using prompt_builder
-def generate_sql(state: AgentState) -> AgentState:
+def parse_intent_sql(content: str) -> (str, str):
+    """Read {"intent", "sql"} from a combined response; bare SQL is taken as ask_question."""
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`").split("\n", 1)[-1]
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return "ask_question", content.strip()
+    if not isinstance(payload, dict):
+        # Valid JSON but not {"intent", "sql"} (42, "SELECT 1", [], null): treat as bare SQL
+        return "ask_question", content.strip()
+    intent = str(payload.get("intent", "")).strip().lower()
+    if intent not in INTENTS:
+        intent = "fallback"
+    return intent, (str(payload.get("sql") or "").strip() if intent == "ask_question" else "")
+
+def prepare_generation(state: AgentState) -> (bool, str, dict):
+    """(combined, prompt, debug_info) for the SQL (or combined intent + SQL) call."""
     user_query = state.user_input or ""
     debug_info = {}
     debug_info['user_query'] = user_query
-    prompt = prompt_builder.build_prompt(user_query)
+    combined = state.detected_intent == UNDECIDED
+    if combined:
+        prompt = prompt_builder.build_combined_prompt(user_query, state.retrieval_context)
+    else:
+        prompt = prompt_builder.build_prompt(user_query, state.retrieval_context)
     debug_info['prompt'] = prompt
-    try:
-        max_tokens = config["llm"].get("max_tokens", 2000)
-        response = llm.invoke(prompt, max_tokens=max_tokens)
-        sql = getattr(response, "content", str(response)).strip()
+    debug_info['prompt_tokens'] = estimate_tokens(prompt)
+    if state.retrieval_context is not None and state.retrieval_context.fewshot is not None:
+        debug_info.update(state.retrieval_context.fewshot.as_debug_info())
+    return combined, prompt, debug_info
+
+def call_options(combined: bool) -> dict:
+    options = {"max_tokens": config["llm"].get("max_tokens", 2000)}
+    if combined:
+        # ✅ One structured call answers both intent and SQL
+        options["response_format"] = {"type": "json_object"}
+    return options
+
+def generation_update(combined: bool, debug_info: dict, content: str = None, error: Exception = None) -> dict:
+    intent = "ask_question"
+    if error is not None:
+        debug_info['sql'] = ""
+        debug_info['llm_exception'] = str(error)
+    else:
+        if combined:
+            intent, sql = parse_intent_sql(content)
+            debug_info['detected_intent'] = intent
+        else:
+            sql = content.strip()
         debug_info['sql'] = sql
         debug_info['llm_exception'] = None
-    except Exception as e:
-        debug_info['sql'] = ""
-        debug_info['llm_exception'] = str(e)
 
-    return state.copy(update={
+    update = {
         "generated_sql": debug_info['sql'],
-        "used_prompt": "semantic_prompt_builder",
+        "used_prompt": "combined_intent_sql" if combined else "semantic_prompt_builder",
         "debug_info": debug_info
-    })
+    }
+    if combined:
+        update["detected_intent"] = intent
+        update["error"] = FALLBACK_REASON if intent == "fallback" else None
+    # Partial update: with graph.speculative_generation this runs in parallel with intent_classifier
+    return update
+
+# ✅ SQL Generator Node using prompt_builder
+def generate_sql(state: AgentState) -> dict:
+    combined, prompt, debug_info = prepare_generation(state)
+    try:
+        content = cached_invoke(llm, prompt, **call_options(combined))
+    except Exception as e:
+        return generation_update(combined, debug_info, error=e)
+    return generation_update(combined, debug_info, content)
+
+async def agenerate_sql(state: AgentState) -> dict:
+    """generate_sql with the LLM call awaited (ASGI server)."""
+    combined, prompt, debug_info = prepare_generation(state)
+    try:
+        content = await cached_ainvoke(llm, prompt, **call_options(combined))
+    except Exception as e:
+        return generation_update(combined, debug_info, error=e)
+    return generation_update(combined, debug_info, content)
 
-sql_generator_node = RunnableLambda(generate_sql)
+sql_generator_node = RunnableLambda(generate_sql, afunc=agenerate_sql)
@@ -3,29 +3,56 @@
 """
 ✅ SQL Validator Node
 Ensures that generated SQL is a safe SELECT query.
+
+Validation runs offline: the SQL is parsed into an AST and checked against
+the metadata store (read-only statement, known tables and columns). An
+EXPLAIN round trip to PostgreSQL is made as an optional second stage when
+settings.validate_with_explain is enabled, and as a fallback when the only
+problems are columns the metadata does not list (it may lag the database).
 """
 
-import re
+import logging
 from langchain_core.runnables import RunnableLambda
 from state import AgentState
 from core.config_loader import load_config
-from sqlalchemy import create_engine, text
+from core.sql_analyzer import analyze_sql
 
 # Load configuration
 config = load_config()
+VALIDATE_WITH_EXPLAIN = config["settings"].get("validate_with_explain", False)
+logger = logging.getLogger(__name__)
 
-# Create engine once for efficiency
-engine = create_engine(config["postgres"]["uri"])
+_engine = None
 
-def validate_sql_syntax(sql: str) -> (bool, str):
+def get_engine():
+    # Created on first EXPLAIN only; offline validation never needs a connection
+    global _engine
+    if _engine is None:
+        from sqlalchemy import create_engine
+        _engine = create_engine(config["postgres"]["uri"])
+    return _engine
+
+def explain_sql(sql: str) -> (bool, str):
+    from sqlalchemy import text
     try:
-        with engine.connect() as conn:
-            # EXPLAIN will parse the SQL without executing it
+        with get_engine().connect() as conn:
+            # EXPLAIN will plan the SQL without executing it
             conn.execute(text(f"EXPLAIN {sql}"))
         return True, ''
     except Exception as e:
         return False, f"SQL Syntax Error: {str(e)}"
 
+def validate_sql_syntax(sql: str) -> (bool, str):
+    valid, error, columns_only = analyze_sql(sql)
+    if valid and VALIDATE_WITH_EXPLAIN:
+        return explain_sql(sql)
+    if not valid and columns_only:
+        # Columns missing from the metadata: PostgreSQL has the final say
+        if explain_sql(sql)[0]:
+            logger.warning(f"Metadata is missing columns the database has: {error}")
+            return True, ''
+    return valid, error
+
 def validate_and_fix_sql(state: AgentState) -> AgentState:
     sql = state.generated_sql
     valid, error = validate_sql_syntax(sql)
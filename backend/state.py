@@ -14,11 +14,13 @@ class AgentState(BaseModel):
     relevant_columns: Optional[List[str]] = None
     relevant_tables: Optional[List[str]] = None
     similarity_scores: Optional[Dict[str, float]] = None  # Optional: for tracking match confidence
+    retrieval_context: Optional[Any] = None  # RetrievalContext: question embedding encoded once per request
+    cache_hit: Optional[bool] = None  # True when the SQL was reused from the semantic answer cache
 
     # 🧠 SQL generation
     generated_sql: Optional[str] = None
     used_prompt: Optional[str] = None  # few_shot, base, fallback
-    schema_description: Optional[str] = None  # ✅ New: full schema for prompt
+    schema_key: Optional[str] = None  # ✅ Metadata store fingerprint; resolve the schema text via core.metadata_store
 
     # ✅ SQL validation
     validated_sql: Optional[str] = None
@@ -26,8 +28,11 @@ class AgentState(BaseModel):
     validation_error: Optional[str] = None
 
     # ⚙️ SQL execution
+    defer_execution: Optional[bool] = None  # True: stop after validation, the caller streams the rows (/query/rows)
     query_result: Optional[Any] = None  # Can be List[Dict] or str, or DataFrame
+    result_truncated: Optional[bool] = None  # True when the query had more than max_result_rows rows
     execution_error: Optional[str] = None
+    sql_executions: Optional[int] = None  # Postgres executions for this question (expected: 1)
 
     # 💬 Explanation and formatting
     explanation: Optional[str] = None
@@ -43,3 +48,4 @@ class AgentState(BaseModel):
 
     # 🐞 Debug information
     debug_info: Optional[Dict[str, Any]] = None  # Store debug info like user_query, prompt, sql, llm_exception
+    speculative_debug_info: Optional[Dict[str, Any]] = None  # debug_info of SQL generated in parallel with intent classification
@@ -0,0 +1,8 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Tests import backend modules the way the servers do (core.*, nodes.*), with the test configuration
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("TEXT2SQL_CONFIG", os.path.join(BACKEND_DIR, "tests", "config.yaml"))
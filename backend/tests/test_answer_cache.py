@@ -0,0 +1,59 @@
+# tests/test_answer_cache.py
+
+import numpy as np
+import pytest
+from core.answer_cache import SemanticAnswerCache, question_signature
+
+SCHEMA_KEY = "test-schema"
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Which customers have the highest balance?", "Which customers have the lowest balance?"),
+    ("How many savings accounts are open?", "How many checking accounts are open?"),
+    ("List customers in Boston", "List customers in Chicago"),
+    ("Total deposits in March", "Total deposits in April"),
+    ("Show the top 5 customers by balance", "Show the top 10 customers by balance"),
+    ("Loans with status 'approved'", "Loans with status 'rejected'"),
+    ("How many customers have a loan?", "Which customers have a loan?"),
+])
+def test_paraphrases_with_another_meaning_miss(cached, asked):
+    assert question_signature(cached) != question_signature(asked)
+
+    # Even with identical embeddings the SQL is not reused
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    vector = np.ones(4)
+    cache.store(cached, vector, "SELECT 1", SCHEMA_KEY)
+    entry, similarity = cache.lookup(asked, vector, SCHEMA_KEY)
+    assert entry is None and similarity == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Show me the customers in Boston", "List all customers in Boston"),
+    ("What is the average balance of savings accounts?", "Average balance of the savings accounts"),
+    ("Customers with a loan", "customer with a loan"),
+])
+def test_rephrasings_hit(cached, asked):
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    vector = np.ones(4)
+    cache.store(cached, vector, "SELECT 1", SCHEMA_KEY)
+    entry, _ = cache.lookup(asked, vector, SCHEMA_KEY)
+    assert entry is not None and entry.sql == "SELECT 1"
+
+
+def test_below_threshold_misses():
+    cache = SemanticAnswerCache(similarity_threshold=0.93)
+    cache.store("List customers in Boston", np.array([1.0, 0.0]), "SELECT 1", SCHEMA_KEY)
+    entry, _ = cache.lookup("List customers in Boston", np.array([0.6, 0.8]), SCHEMA_KEY)
+    assert entry is None
+
+
+def test_schema_change_drops_entries():
+    cache = SemanticAnswerCache()
+    cache.store("List customers in Boston", np.ones(4), "SELECT 1", SCHEMA_KEY)
+    entry, _ = cache.lookup("List customers in Boston", np.ones(4), "new-schema")
+    assert entry is None and cache.stats()["invalidations"] == 1
+
+
+def test_disabled_by_default():
+    from core.answer_cache import answer_cache_enabled
+    assert answer_cache_enabled() is False
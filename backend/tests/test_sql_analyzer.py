@@ -0,0 +1,118 @@
+# tests/test_sql_analyzer.py
+
+import pytest
+from core.metadata_store import MetadataStore
+from core.sql_analyzer import analyze_sql
+from core.sql_guard import FORBIDDEN_FUNCTIONS
+
+STORE = MetadataStore([
+    {
+        "table_name": "customers",
+        "columns": [
+            {"name": "customer_id", "type": "INTEGER"},
+            {"name": "first_name", "type": "VARCHAR"},
+            {"name": "branch_id", "type": "INTEGER"},
+        ],
+    },
+    {
+        "table_name": "accounts",
+        "columns": [
+            {"name": "account_id", "type": "INTEGER"},
+            {"name": "customer_id", "type": "INTEGER"},
+            {"name": "balance", "type": "NUMERIC"},
+            {"name": "opened_at", "type": "DATE"},
+        ],
+    },
+])
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT c.first_name, a.balance FROM customers c JOIN accounts a ON a.customer_id = c.customer_id",
+    "SELECT first_name, balance FROM customers JOIN accounts USING (customer_id)",
+    "SELECT first_name FROM customers WHERE customer_id IN (SELECT customer_id FROM accounts)",
+    "SELECT customer_id, SUM(balance) OVER (PARTITION BY customer_id ORDER BY opened_at) FROM accounts",
+    "SELECT COUNT(*) FILTER (WHERE balance > 0) AS funded FROM accounts",
+    "SELECT customer_id, COUNT(*) AS n FROM accounts GROUP BY customer_id ORDER BY n DESC",
+    'SELECT "first_name" FROM "customers"',
+    'SELECT C.First_Name FROM Customers C',
+    'SELECT "c".first_name FROM customers AS "c"',
+    "WITH totals AS (SELECT customer_id, SUM(balance) AS total FROM accounts GROUP BY customer_id) "
+    "SELECT c.first_name, t.total FROM customers c JOIN totals t ON t.customer_id = c.customer_id",
+    "SELECT month FROM generate_series(1, 12) AS month",
+    "SELECT table_name FROM information_schema.tables",
+])
+def test_valid_queries(sql):
+    assert analyze_sql(sql, STORE) == (True, '', False)
+
+
+def test_unknown_table_is_an_error():
+    valid, error, columns_only = analyze_sql("SELECT * FROM loans", STORE)
+    assert not valid and not columns_only
+    assert "Unknown table 'loans'" in error
+
+
+def test_quoted_identifiers_keep_their_case():
+    # "Customers" is not customers in PostgreSQL
+    valid, error, columns_only = analyze_sql('SELECT "First_Name" FROM "Customers"', STORE)
+    assert not valid and not columns_only
+    assert "Unknown table 'Customers'" in error
+
+    valid, error, columns_only = analyze_sql('SELECT "First_Name" FROM customers', STORE)
+    assert not valid and columns_only
+    assert "Column 'First_Name' not found" in error
+
+    valid, _, _ = analyze_sql('SELECT "C".first_name FROM customers c', STORE)
+    assert not valid
+
+
+def test_unknown_alias_is_an_error():
+    valid, error, columns_only = analyze_sql("SELECT x.balance FROM accounts a", STORE)
+    assert not valid and not columns_only
+    assert "Unknown table or alias 'x'" in error
+
+
+@pytest.mark.parametrize("sql, message", [
+    ("SELECT c.phone_number FROM customers c", "Column 'phone_number' does not exist in table 'customers'"),
+    ("SELECT status FROM accounts", "Column 'status' not found in referenced table(s): accounts"),
+])
+def test_unknown_column_is_left_to_the_database(sql, message):
+    # The metadata may lag the live database: the validator falls back to EXPLAIN
+    valid, error, columns_only = analyze_sql(sql, STORE)
+    assert not valid and columns_only
+    assert message in error
+
+
+def test_unknown_table_and_column_is_an_error():
+    valid, _, columns_only = analyze_sql(
+        "SELECT c.phone_number FROM customers c JOIN loans l ON l.customer_id = c.customer_id", STORE
+    )
+    assert not valid and not columns_only
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM accounts",
+    "SELECT 1; DROP TABLE customers",
+    "SELECT nextval('accounts_account_id_seq')",
+    "SELECT query_to_xml('DELETE FROM accounts RETURNING 1', true, false, '')",
+    "SELECT pg_sleep_for('5 minutes')",
+    "SELECT pg_sleep_until(now() + interval '1 hour')",
+    "SELECT pg_try_advisory_lock(42)",
+    "SELECT pg_advisory_lock_shared(42)",
+    "SELECT pg_notify('channel', 'payload')",
+    "SELECT lo_from_bytea(0, 'data')",
+    "SELECT account_id FROM accounts WHERE PG_TRY_ADVISORY_LOCK(account_id)",
+])
+def test_write_queries_are_rejected(sql):
+    valid, _, columns_only = analyze_sql(sql, STORE)
+    assert not valid and not columns_only
+
+
+@pytest.mark.parametrize("name", sorted(FORBIDDEN_FUNCTIONS))
+def test_forbidden_functions_are_rejected(name):
+    valid, error, _ = analyze_sql(f"SELECT {name}(1)", STORE)
+    assert not valid and f"{name}()" in error
+
+
+def test_syntax_error():
+    valid, error, _ = analyze_sql("SELECT FROM WHERE", STORE)
+    assert not valid and error
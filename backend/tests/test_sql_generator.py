@@ -0,0 +1,33 @@
+# tests/test_sql_generator.py
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+from nodes.sql_generator import parse_intent_sql
+
+
+def test_combined_answer():
+    assert parse_intent_sql('{"intent": "ask_question", "sql": " SELECT 1 "}') == ("ask_question", "SELECT 1")
+
+
+@pytest.mark.parametrize("intent", ["greet", "fallback"])
+def test_no_sql_for_other_intents(intent):
+    assert parse_intent_sql(f'{{"intent": "{intent}", "sql": "SELECT 1"}}') == (intent, "")
+
+
+def test_unknown_intent_is_fallback():
+    assert parse_intent_sql('{"intent": "delete_data", "sql": "DELETE FROM t"}') == ("fallback", "")
+
+
+def test_fenced_json():
+    content = '```json\n{"intent": "ask_question", "sql": "SELECT 1"}\n```'
+    assert parse_intent_sql(content) == ("ask_question", "SELECT 1")
+
+
+def test_bare_sql():
+    assert parse_intent_sql("SELECT first_name FROM customers") == ("ask_question", "SELECT first_name FROM customers")
+
+
+@pytest.mark.parametrize("content", ["42", '"SELECT 1"', "[]", "null"])
+def test_json_that_is_not_an_object(content):
+    assert parse_intent_sql(content) == ("ask_question", content)
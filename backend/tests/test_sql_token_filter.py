@@ -0,0 +1,39 @@
+# tests/test_sql_token_filter.py
+
+import json
+import pytest
+from api_common import SqlTokenFilter
+
+SQL = 'SELECT "Name"\nFROM t\tWHERE x = \'é\\\' -- ü'
+
+
+def stream(text: str, size: int) -> str:
+    token_filter = SqlTokenFilter()
+    return "".join(token_filter.feed(text[i:i + size]) for i in range(0, len(text), size))
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 1000])
+def test_escaped_sql_field(size):
+    # ensure_ascii: \\uXXXX escapes, split across tokens for small sizes
+    content = json.dumps({"intent": "ask_question", "sql": SQL}, ensure_ascii=True)
+    assert stream(content, size) == SQL
+
+
+@pytest.mark.parametrize("size", [1, 4, 1000])
+def test_raw_control_characters(size):
+    content = '{"intent":"ask_question","sql":"SELECT 1\nFROM t\tWHERE a = \\"b\\""}'
+    assert stream(content, size) == 'SELECT 1\nFROM t\tWHERE a = "b"'
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_plain_sql_passes_through(size):
+    assert stream("  SELECT 1\nFROM t", size) == "  SELECT 1\nFROM t"
+
+
+@pytest.mark.parametrize("content", ['{"intent": "greet", "sql": ""}', '{"intent": "fallback"}'])
+def test_no_sql(content):
+    assert stream(content, 2) == ""
+
+
+def test_invalid_escape_degrades_to_raw_text():
+    assert stream('{"sql": "SELECT \\q"}', 1000) == "SELECT \\q"
@@ -8,6 +8,7 @@ import React, { useState } from 'react'
 export default function InsightButton({
   userInput,
   queryResult,
+  resultId,
   messageIndex,
   disabled = false
 }) {
@@ -27,7 +28,7 @@ export default function InsightButton({
     toggleInsightsLoading(true);
 
     try {
-      const result = await fetchInsights(userInput, queryResult);
+      const result = await fetchInsights(userInput, queryResult, resultId);
 
       if (result.type === 'success') {
         addInsight({
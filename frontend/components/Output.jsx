@@ -8,7 +8,7 @@ import VisualizationButton from './VisualizationButton';
 
 export default function Output() {
 
-  const { queries, responses, isLoading } = useQueryContext();
+  const { queries, responses, isLoading, progress } = useQueryContext();
   const chatMessages = [];
   const bottomRef = useRef(null);
 
@@ -77,6 +77,7 @@ export default function Output() {
             output: responseData.final_output,
             suggestions: responseData.suggestions || [],
             results: responseData.query_result || [],
+            resultId: responseData.result_id,
           },
           debugInfo: debugInformation
         });
@@ -168,12 +169,14 @@ export default function Output() {
                     <InsightButton 
                       userInput={queries[message.messageIndex]}
                       queryResult={message.content.results}
+                      resultId={message.content.resultId}
                       messageIndex={message.messageIndex}
                       disabled={isLoading}
                     />
                     <VisualizationButton 
                       userInput={queries[message.messageIndex]}
                       queryResult={message.content.results}
+                      resultId={message.content.resultId}
                       messageIndex={message.messageIndex}
                       disabled={isLoading}
                     />
@@ -197,9 +200,12 @@ export default function Output() {
         <div className="flex w-full justify-start">
           <div className="max-w-xl lg:max-w-2xl px-4 py-3 rounded-xl shadow-md bg-yellow-100 text-yellow-800 dark:bg-yellow-800 dark:text-yellow-100">
             <div className="animate-pulse">
-              <span className="inline-block">Generating response</span>
+              <span className="inline-block">{progress.stage || "Generating response"}</span>
               <span className="inline-block animate-bounce">...</span>
             </div>
+            {progress.sql && (
+              <pre className="mt-2 text-xs whitespace-pre-wrap break-words font-mono">{progress.sql}</pre>
+            )}
           </div>
         </div>
       )}
@@ -1,10 +1,22 @@
 "use client";
 
 import { useQueryContext } from "@/lib/QueryProvider";
+import { streamQuery } from "@/utils/queryStreamAPI";
 import React, { useEffect } from "react";
 
+const NODE_LABELS = {
+  cache_lookup: "Checking recent answers",
+  intent_classifier: "Understanding the question",
+  speculative_retrieval: "Finding relevant tables",
+  embedding_matcher: "Finding relevant tables",
+  sql_generator: "Writing SQL",
+  sql_validator: "Validating SQL",
+  sql_executor: "Running the query",
+  formatter: "Formatting results",
+};
+
 export default function QueryAPICall() {
-  const { queries, currentQueryIndex, addResponse, toggleLoading } = useQueryContext();
+  const { queries, currentQueryIndex, addResponse, toggleLoading, updateProgress, resetProgress } = useQueryContext();
   
   useEffect(() => {
     const fetchLLMResonse = async () => {
@@ -18,18 +30,35 @@ export default function QueryAPICall() {
       console.log(currentQuery);
       
       try { 
-        const response = await fetch(apiURI, {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify({ user_input: currentQuery }),
-        });
+        let data;
+        if (process.env.NEXT_PUBLIC_QUERY_STREAM_API_URI) {
+          // Progressive rendering: node progress and SQL tokens arrive before the result
+          resetProgress();
+          data = await streamQuery(currentQuery, (event, payload) => {
+            if (event === "sql_token") {
+              updateProgress((prev) => ({ ...prev, sql: prev.sql + payload.token }));
+            } else if (event === "node") {
+              const stage = NODE_LABELS[payload.node];
+              updateProgress((prev) => ({
+                stage: stage || prev.stage,
+                sql: payload.generated_sql || prev.sql,
+              }));
+            }
+          });
+        } else {
+          const response = await fetch(apiURI, {
+            method: "POST",
+            headers: {
+              "Content-Type": "application/json",
+            },
+            body: JSON.stringify({ user_input: currentQuery }),
+          });
 
-        if (!response.ok) {
-          throw new Error("Network response was not ok");
+          if (!response.ok) {
+            throw new Error("Network response was not ok");
+          }
+          data = await response.json();
         }
-        const data = await response.json();
         // console.log("data:", data);
         
         addResponse({
@@ -46,6 +75,7 @@ export default function QueryAPICall() {
         });
 
       } finally {
+        resetProgress();
         toggleLoading(false);
       }
     };
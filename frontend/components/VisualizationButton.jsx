@@ -9,6 +9,7 @@ import ChartRenderer from './ui/ChartRenderer';
 export default function VisualizationButton({
   userInput,
   queryResult,
+  resultId,
   messageIndex,
   disabled = false
 }) {
@@ -27,7 +28,7 @@ export default function VisualizationButton({
     toggleVisualizationsLoading(true);
 
     try {
-      const result = await fetchVisualization(userInput, queryResult);
+      const result = await fetchVisualization(userInput, queryResult, resultId);
 
       if (result.type === 'success') {
         addVisualization({
@@ -15,6 +15,7 @@ export default function QueryProvider({ children }) {
   const [insightsLoading, setInsightsLoading] = useState(false);
   const [visualizations, setVisualizations] = useState([]);
   const [visualizationsLoading, setVisualizationsLoading] = useState(false);
+  const [progress, setProgress] = useState({ stage: null, sql: "" });
 
 
   const toggleInput = () => {
@@ -33,6 +34,14 @@ export default function QueryProvider({ children }) {
     setVisualizationsLoading(loading);
   }
 
+  const updateProgress = (update) => {
+    setProgress(update)
+  }
+
+  const resetProgress = () => {
+    setProgress({ stage: null, sql: "" })
+  }
+
   const addQuery = (newQuery) => {
     setQueries(prev => [...prev, newQuery]);
     setCurrentQueryIndex(prev => prev + 1);
@@ -58,6 +67,7 @@ export default function QueryProvider({ children }) {
     setIsLoading(false)
     setInsights([])
     setVisualizations([])
+    resetProgress()
   }
 
   return (
@@ -72,6 +82,7 @@ export default function QueryProvider({ children }) {
         insightsLoading,
         visualizations,
         visualizationsLoading,
+        progress,
         setCurrentQueryIndex, 
         addQuery, 
         toggleInput,
@@ -81,6 +92,8 @@ export default function QueryProvider({ children }) {
         toggleInsightsLoading,
         addVisualization,
         toggleVisualizationsLoading,
+        updateProgress,
+        resetProgress,
         clearChat, 
       }}
     >
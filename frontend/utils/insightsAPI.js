@@ -1,17 +1,23 @@
-export const fetchInsights = async (userInput, queryResult) => {
+export const fetchInsights = async (userInput, queryResult, resultId) => {
   const apiURI = process.env.NEXT_PUBLIC_INSIGHT_API_URI;
 
+  const post = (payload) => fetch(apiURI, {
+    method: 'POST',
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      user_input: userInput,
+      ...payload
+    }),
+  });
+
   try {
-    const response = await fetch(apiURI, {
-      method: 'POST',
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        user_input: userInput,
-        query_result: queryResult
-      }),
-    });
+    // The server keeps the /query result: send its id, and the rows only if it has expired (404)
+    let response = resultId ? await post({ result_id: resultId }) : null;
+    if (!response || response.status === 404) {
+      response = await post({ query_result: queryResult });
+    }
 
     if (!response.ok) {
       throw new Error(`Network response was not ok: ${response.status}`);
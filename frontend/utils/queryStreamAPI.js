@@ -0,0 +1,53 @@
+// Streams /query/stream (Server-Sent Events over a POST response).
+// onEvent(event, data) is called for every "node" and "sql_token" event;
+// the promise resolves with the "result" payload (same shape as /query).
+export const streamQuery = async (userInput, onEvent) => {
+  const apiURI = process.env.NEXT_PUBLIC_QUERY_STREAM_API_URI;
+
+  const response = await fetch(apiURI, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify({ user_input: userInput }),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Network response was not ok: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  const handleBlock = (block) => {
+    let event = "message";
+    const dataLines = [];
+    for (const line of block.split("\n")) {
+      if (line.startsWith("event:")) event = line.slice(6).trim();
+      else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+    }
+    if (!dataLines.length) return;
+    const data = JSON.parse(dataLines.join("\n"));
+    if (event === "error") throw new Error(data.error || "Failed to fetch response");
+    if (event === "result") result = data;
+    else onEvent?.(event, data);
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      handleBlock(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+    }
+  }
+  if (buffer.trim()) handleBlock(buffer);
+
+  if (!result) throw new Error("Stream ended without a result");
+  return result;
+};